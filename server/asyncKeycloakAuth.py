@@ -0,0 +1,694 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+import httpx # pyright: ignore[reportMissingImports]
+import jwt # pyright: ignore[reportMissingImports]
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+from config.service_config_reader import serviceConfig
+from config.settings import appSettings
+from cache.jwksCache import jwksCache, JwksEntry
+from cache.keyStore import keyStore
+from cache.tokenCache import tokenCache, token_digest
+from cache.introspectionCache import introspectionCache
+from singleFlight import asyncSingleFlight
+from circuitBreaker import circuitBreakers
+from metrics import keycloakRequestDuration, keycloakRequestsInFlight, upstream_operation
+from serverTiming import phase
+from keycloakAuth import (
+    KeycloakAuthError, KeycloakUnavailableError, KeycloakConfig, KeycloakHttpConfig, keycloakHttpConfig,
+    decode_token, invalidate_token, keycloak_unavailable
+)
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('asyncKeycloakAuth')
+
+class AsyncKeycloakAuth:
+    """
+    Asyncio Keycloak authentication client.
+    Clients are shared across requests, so unlike KeycloakAuth they never keep tokens:
+    every call takes the tokens it needs as arguments.
+    """
+    def __init__(self, config: KeycloakConfig, client: httpx.AsyncClient, http_config: KeycloakHttpConfig = None):
+        self.config = config
+        self.config.validate()
+        self.client = client
+        self.http_config = http_config or keycloakHttpConfig
+        logger.info("AsyncKeycloakAuth client initialized")
+
+    async def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a single request to Keycloak, timed in the upstream metrics
+
+        Raises:
+            httpx.RequestError: If the request fails
+        """
+        operation = upstream_operation(url)
+        keycloakRequestsInFlight.inc(operation)
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.RequestError:
+            keycloakRequestDuration.observe(time.perf_counter() - start, operation, 'error')
+            raise
+        finally:
+            keycloakRequestsInFlight.dec(operation)
+        keycloakRequestDuration.observe(
+            time.perf_counter() - start, operation, 'error' if response.status_code >= 500 else 'ok'
+        )
+        return response
+
+    async def _send(self, method: str, url: str, retries: int = 0, **kwargs) -> httpx.Response:
+        """
+        Send a request to Keycloak through the realm circuit breaker.
+        The breaker records one outcome per call whatever the number of attempts, like the
+        retrying adapter of KeycloakAuth; a call ending without outcome (e.g. cancelled) releases it.
+
+        Args:
+            method: HTTP method
+            url: Keycloak endpoint
+            retries: Retries on transport errors and 502/503/504, with jittered exponential backoff
+                     (idempotent calls only)
+            **kwargs: Extra arguments for httpx.AsyncClient.request
+
+        Returns:
+            The last response received
+
+        Raises:
+            KeycloakUnavailableError: If the realm circuit is open
+            httpx.RequestError: If the last attempt fails
+        """
+        breaker = circuitBreakers.get(self.config.realm)
+        if not breaker.allow():
+            logger.warning("Circuit open for realm %s, failing fast", self.config.realm)
+            raise KeycloakUnavailableError(
+                f"Keycloak unavailable for realm {self.config.realm}",
+                retry_after=breaker.retry_after()
+            )
+        recorded = False
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self._request(method, url, **kwargs)
+                    if response.status_code not in (502, 503, 504) or attempt >= retries:
+                        break
+                except httpx.RequestError as e:
+                    if not isinstance(e, httpx.TransportError) or attempt >= retries:
+                        breaker.record_failure()
+                        recorded = True
+                        raise
+                    logger.warning("%s %s failed: %s, retrying", method, url, e)
+                attempt += 1
+                await asyncio.sleep(self.http_config.backoff(attempt))
+            # Only server side errors tell Keycloak is unhealthy, 4xx are caller errors
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            recorded = True
+            return response
+        finally:
+            if not recorded:
+                breaker.release()
+
+    async def _get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        GET with bounded retries and jittered exponential backoff.
+        Only used for idempotent calls; connection failures of every call
+        are already retried by the transport.
+
+        Args:
+            url: URL to fetch
+            **kwargs: Extra arguments for httpx.AsyncClient.get
+
+        Returns:
+            The last response received
+
+        Raises:
+            KeycloakUnavailableError: If the realm circuit is open
+            httpx.RequestError: If the last attempt failed at transport level
+        """
+        return await self._send('GET', url, retries=self.http_config.max_retries, **kwargs)
+
+    async def _post_token_endpoint(self, payload: Dict[str, Any], operation: str) -> Dict[str, Any]:
+        """
+        POST a grant to the token endpoint
+
+        Args:
+            payload: Form payload of the grant
+            operation: Operation name used in error messages
+
+        Returns:
+            Dict with tokens
+
+        Raises:
+            KeycloakUnavailableError: If Keycloak is unreachable or fails (5xx), or the realm circuit is open
+            KeycloakAuthError: If Keycloak refuses the grant
+        """
+        try:
+            response = await self._send('POST', self.config.token_endpoint, data=payload)
+        except httpx.TransportError as e:
+            logger.error("%s failed, Keycloak unreachable: %s", operation, e)
+            raise keycloak_unavailable(self.config.realm, operation, e)
+        except httpx.HTTPError as e:
+            logger.error("%s failed: %s", operation, e)
+            raise KeycloakAuthError(f"{operation} failed: {str(e)}")
+        if response.status_code >= 500:
+            logger.error("%s failed, Keycloak answered %s", operation, response.status_code)
+            raise keycloak_unavailable(self.config.realm, operation, f"HTTP {response.status_code}")
+        try:
+            response.raise_for_status()
+            return response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("%s failed: %s", operation, e)
+            raise KeycloakAuthError(f"{operation} failed: {str(e)}")
+
+    async def authenticate_with_password(self, username: str, password: str) -> Dict[str, Any]:
+        """
+        Authenticate user with username and password (Resource Owner Password Credentials flow)
+
+        Args:
+            username: User's username
+            password: User's password
+
+        Returns:
+            Dict with tokens and user info
+
+        Raises:
+            KeycloakAuthError: If authentication fails
+        """
+        logger.debug("---> Function authenticate_with_password() called <---")
+        logger.info("Authenticating user: %s", username)
+
+        payload = {
+            'grant_type': 'password',
+            'client_id': self.config.client_id,
+            'username': username,
+            'password': password
+        }
+        if self.config.client_secret:
+            payload['client_secret'] = self.config.client_secret
+
+        with phase('keycloak_token'):
+            token_data = await self._post_token_endpoint(payload, "Authentication")
+        logger.info("User %s authenticated successfully", username)
+        return token_data
+
+    async def authenticate_with_client_credentials(self) -> Dict[str, Any]:
+        """
+        Authenticate as a service account using client credentials (Client Credentials flow)
+
+        Returns:
+            Dict with access token
+
+        Raises:
+            KeycloakAuthError: If authentication fails
+        """
+        logger.debug("---> Function authenticate_with_client_credentials() called <---")
+        logger.info("Authenticating with client credentials: %s", self.config.client_id)
+
+        if not self.config.client_secret:
+            logger.error("Client secret is required for client credentials flow")
+            raise KeycloakAuthError("Client secret is required for client credentials flow")
+
+        payload = {
+            'grant_type': 'client_credentials',
+            'client_id': self.config.client_id,
+            'client_secret': self.config.client_secret
+        }
+
+        token_data = await self._post_token_endpoint(payload, "Authentication")
+        logger.info("Service account authenticated successfully")
+        return token_data
+
+    async def refresh_access_token(self, refresh_token: str) -> Dict[str, Any]:
+        """
+        Refresh access token using refresh token
+
+        Args:
+            refresh_token: Refresh token
+
+        Returns:
+            Dict with new tokens
+
+        Raises:
+            KeycloakAuthError: If refresh fails
+        """
+        logger.debug("---> Function refresh_access_token() called <---")
+        if not refresh_token:
+            logger.error("No refresh token available for refreshing access token")
+            raise KeycloakAuthError("No refresh token available")
+
+        payload = {
+            'grant_type': 'refresh_token',
+            'client_id': self.config.client_id,
+            'refresh_token': refresh_token
+        }
+        if self.config.client_secret:
+            payload['client_secret'] = self.config.client_secret
+
+        token_data = await self._post_token_endpoint(payload, "Token refresh")
+        logger.info("Access token refreshed successfully")
+        return token_data
+
+    async def get_user_info(self, access_token: str) -> Dict[str, Any]:
+        """
+        Get authenticated user information
+
+        Args:
+            access_token: Access token
+
+        Returns:
+            Dict with user information
+
+        Raises:
+            KeycloakAuthError: If request fails
+        """
+        logger.debug("---> Function get_user_info() called <---")
+        if not access_token:
+            logger.error("No access token available for fetching user info")
+            raise KeycloakAuthError("No access token available")
+
+        try:
+            response = await self._get(
+                self.config.userinfo_endpoint,
+                headers={'Authorization': f'Bearer {access_token}'}
+            )
+            response.raise_for_status()
+            user_info = response.json()
+            logger.info("User info retrieved for: %s", user_info.get('preferred_username'))
+            return user_info
+        except httpx.HTTPError as e:
+            logger.error("Failed to fetch user info: %s", e)
+            raise KeycloakAuthError(f"Failed to fetch user info: {str(e)}")
+
+    async def introspect_token(self, token: str) -> Dict[str, Any]:
+        """
+        Introspect a token to check its validity and get claims, authenticating with HTTP Basic Auth
+
+        Args:
+            token: Token to introspect
+
+        Returns:
+            Dict with token information and validity
+
+        Raises:
+            KeycloakAuthError: If introspection fails
+        """
+        logger.debug("---> Function introspect_token() called <---")
+        if not self.config.client_secret:
+            logger.error("No Client secret found, client secret is required for token introspection")
+            raise KeycloakAuthError("Client secret is required for token introspection")
+
+        try:
+            response = await self._send(
+                'POST',
+                self.config.introspect_endpoint,
+                data={'token': token, 'token_type_hint': 'access_token'},
+                auth=(self.config.client_id, self.config.client_secret)
+            )
+            if response.status_code == 403:
+                logger.error("Access denied: Client not allowed to introspect tokens. Check client roles in Keycloak.")
+                raise KeycloakAuthError("Client not allowed to introspect tokens. Configure service account roles in Keycloak.")
+            response.raise_for_status()
+            introspection = response.json()
+            logger.info("Token introspection - Active: %s", introspection.get('active', False))
+            return introspection
+        except httpx.HTTPError as e:
+            logger.error("Token introspection failed: %s", e)
+            raise KeycloakAuthError(f"Token introspection failed: {str(e)}")
+
+    async def verify_token_locally(self, token: str, executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        Verify token locally using the cached realm public keys
+
+        Args:
+            token: JWT token to verify
+            executor: Executor running the signature verification (on the event loop if not provided)
+
+        Returns:
+            Dict with decoded token claims
+
+        Raises:
+            KeycloakAuthError: If verification fails
+        """
+        logger.debug("---> Function verify_token_locally() called <---")
+        try:
+            with phase('jwt_header'):
+                kid = jwt.get_unverified_header(token).get('kid')
+            if not kid:
+                logger.error("Token has no 'kid' in header")
+                raise KeycloakAuthError("Token has no 'kid' in header")
+
+            with phase('jwks'):
+                jwks_entry = await jwksCache.aget(self.config.realm, self._fetch_public_keys, kid=kid)
+            with phase('key'):
+                public_key = keyStore.get_key(self.config.realm, jwks_entry, kid)
+            if public_key is None:
+                logger.error("Public key with kid '%s' not found", kid)
+                raise KeycloakAuthError(f"Public key with kid '{kid}' not found")
+
+            with phase('rsa_verify'):
+                if executor is None:
+                    decoded_token = decode_token(token, public_key, self.config.client_id)
+                else:
+                    decoded_token = await asyncio.get_running_loop().run_in_executor(
+                        executor, decode_token, token, public_key, self.config.client_id
+                    )
+            logger.info("Token verified successfully for user: %s", decoded_token.get('preferred_username'))
+            return decoded_token
+
+        except KeycloakUnavailableError:
+            raise
+        except jwt.ExpiredSignatureError:
+            logger.error("Token has expired")
+            raise KeycloakAuthError("Token has expired")
+        except jwt.InvalidTokenError as e:
+            logger.error("Token verification failed: %s", e)
+            raise KeycloakAuthError(f"Invalid token: {str(e)}")
+        except Exception as e:
+            logger.error("Token verification error: %s", e)
+            raise KeycloakAuthError(f"Token verification error: {str(e)}")
+
+    async def get_public_keys(self, force_refresh: bool = False) -> Dict[str, Any]:
+        """
+        Get public keys for token verification (JWKS), served from the realm JWKS cache
+
+        Args:
+            force_refresh: Bypass the cache and fetch keys from Keycloak
+
+        Returns:
+            Dict with public keys
+
+        Raises:
+            KeycloakAuthError: If retrieval fails
+        """
+        logger.debug("---> Function get_public_keys() called <---")
+        if force_refresh:
+            async def fetch_and_store():
+                return await jwksCache.astore(self.config.realm, *(await self._fetch_public_keys()))
+            return (await asyncSingleFlight.do(('jwks', self.config.realm), fetch_and_store)).jwks
+        return (await self.get_jwks_entry()).jwks
+
+    async def get_jwks_entry(self) -> JwksEntry:
+        """
+        Get the cached JWKS entry of the realm. Keycloak is only called when the entry is
+        missing or expired, through the same shared refresh token verification uses (never forced).
+
+        Returns:
+            JwksEntry of the realm
+
+        Raises:
+            KeycloakAuthError: If the JWKS is not cached and cannot be fetched
+        """
+        return await jwksCache.aget(self.config.realm, self._fetch_public_keys)
+
+    async def _fetch_public_keys(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Fetch public keys (JWKS) from Keycloak
+
+        Returns:
+            Tuple with JWKS document and Cache-Control response header
+
+        Raises:
+            KeycloakUnavailableError: If Keycloak is unreachable or fails (5xx), or the realm circuit is open
+            KeycloakAuthError: If retrieval fails
+        """
+        logger.info("Fetching public keys (JWKS)")
+        try:
+            response = await self._get(self.config.jwks_endpoint)
+            if response.status_code >= 500:
+                raise keycloak_unavailable(self.config.realm, "Public keys retrieval", f"HTTP {response.status_code}")
+            response.raise_for_status()
+            keys = response.json()
+            logger.info("Retrieved %s public keys", len(keys.get('keys', [])))
+            return keys, response.headers.get('Cache-Control')
+        except httpx.TransportError as e:
+            logger.error("Failed to fetch public keys, Keycloak unreachable: %s", e)
+            raise keycloak_unavailable(self.config.realm, "Public keys retrieval", e)
+        except httpx.HTTPError as e:
+            logger.error("Failed to fetch public keys: %s", e)
+            raise KeycloakAuthError(f"Failed to fetch public keys: {str(e)}")
+
+    async def logout(self, refresh_token: str, access_token: str = None):
+        """
+        Logout user and revoke tokens
+
+        Args:
+            refresh_token: Refresh token to revoke
+            access_token: Access token to evict from verification caches
+
+        Raises:
+            KeycloakAuthError: If logout fails
+        """
+        logger.debug("---> Function logout() called <---")
+        if access_token:
+            # Shared cache backends do blocking I/O
+            await asyncio.to_thread(invalidate_token, access_token)
+        if not refresh_token:
+            logger.warning("No refresh token available for logout")
+            return
+
+        payload = {
+            'client_id': self.config.client_id,
+            'refresh_token': refresh_token
+        }
+        if self.config.client_secret:
+            payload['client_secret'] = self.config.client_secret
+
+        revoke_endpoint = f"{self.config.server_url}/realms/{self.config.realm}/protocol/openid-connect/revoke"
+        try:
+            response = await self._send('POST', revoke_endpoint, data=payload)
+            response.raise_for_status()
+            logger.info("User logged out successfully")
+        except httpx.HTTPError as e:
+            logger.error("Logout failed: %s", e)
+            raise KeycloakAuthError(f"Logout failed: {str(e)}")
+
+class AsyncKeycloakClientRegistry:
+    """Long-lived AsyncKeycloakAuth clients, one per configured service, sharing one pooled httpx client"""
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http_config: KeycloakHttpConfig = None
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections
+        )
+        self.http_config = http_config or keycloakHttpConfig
+        self.timeout = httpx.Timeout(self.http_config.read_timeout, connect=self.http_config.connect_timeout)
+        self._clients: Dict[str, AsyncKeycloakAuth] = {}
+        self._http_client = None
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """
+        Get the httpx client shared by all registry clients, creating it on first use.
+        All traffic goes to the single Keycloak host, so the pool limits apply per host.
+        """
+        if self._http_client is None:
+            # Transport level retries only cover connection failures, safe for every call
+            transport = httpx.AsyncHTTPTransport(limits=self.limits, retries=self.http_config.max_retries)
+            self._http_client = httpx.AsyncClient(transport=transport, timeout=self.timeout)
+        return self._http_client
+
+    def get(self, service: str) -> AsyncKeycloakAuth:
+        """
+        Get the client of a service, creating it on first use
+
+        Args:
+            service: Name of the service
+
+        Returns:
+            AsyncKeycloakAuth client configured for the service
+
+        Raises:
+            KeycloakAuthError: If the service is not configured
+        """
+        client = self._clients.get(service)
+        if client is None:
+            if not serviceConfig.service_exists(service):
+                raise KeycloakAuthError(f"Service '{service}' not found in configuration")
+            logger.info("Creating async Keycloak client for service %s", service)
+            client = AsyncKeycloakAuth(KeycloakConfig(service=service), self._get_http_client(), self.http_config)
+            self._clients[service] = client
+        return client
+
+    def load_all(self):
+        """Create clients for every configured service"""
+        for service in serviceConfig.list_services():
+            self.get(service)
+
+    async def warm_up(self) -> Dict[str, Any]:
+        """
+        Create clients for every configured service, prefetch the JWKS of
+        each distinct realm in parallel and pre-build the realm public keys
+
+        Returns:
+            Dictionary with warmed up and failed realms and warm-up duration
+        """
+        logger.info("Warming up Keycloak clients and realm keys ...")
+        start = time.perf_counter()
+        realms: Dict[str, AsyncKeycloakAuth] = {}
+        for service in serviceConfig.get_all_services():
+            auth = self.get(service)
+            realms.setdefault(auth.config.realm, auth)
+
+        outcomes = await asyncio.gather(
+            *(auth.get_public_keys() for auth in realms.values()),
+            return_exceptions=True
+        )
+        warmed, failed = [], []
+        for realm, outcome in zip(realms.keys(), outcomes):
+            entry = await jwksCache.alookup(realm)
+            if isinstance(outcome, Exception) or entry is None:
+                logger.warning("Warm-up of realm %s failed: %s", realm, outcome)
+                failed.append(realm)
+                continue
+            keyStore.sync(realm, entry)
+            warmed.append(realm)
+
+        duration = time.perf_counter() - start
+        logger.info("Warm-up completed in %.3fs: realms warmed %s, failed %s", duration, warmed, failed)
+        return {"realms": warmed, "failed": failed, "duration_seconds": round(duration, 3)}
+
+    def invalidate(self, services: Iterable[str]):
+        """
+        Drop the clients of services, recreated from the current configuration on next use
+
+        Args:
+            services: Names of the services
+        """
+        for service in services:
+            self._clients.pop(service, None)
+
+    async def aclose(self):
+        """Drop all clients and close the shared httpx client"""
+        self._clients.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+        logger.info("Async Keycloak client registry closed")
+
+############################################################
+##### Initialize async Keycloak client registry instance #####
+############################################################
+asyncKeycloakRegistry = AsyncKeycloakClientRegistry(
+    max_connections=appSettings.keycloak_max_connections,
+    max_keepalive_connections=appSettings.keycloak_max_keepalive_connections
+)
+# Clients of services changed on service configuration reload are recreated on next use
+serviceConfig.add_listener(asyncKeycloakRegistry.invalidate)
+
+# Batch verifications run the CPU-bound signature checks in this pool, off the event loop
+verifyExecutor = ThreadPoolExecutor(
+    max_workers=appSettings.verify_batch_concurrency,
+    thread_name_prefix='token-verify'
+)
+
+# Convenience coroutines for quick usage
+async def authenticate_user_async(username: str, password: str, service: str) -> Dict[str, Any]:
+    """Quick coroutine to authenticate a user and return tokens"""
+    logger.debug("---> Quick function authenticate_user_async() called <---")
+    auth = asyncKeycloakRegistry.get(service)
+    return await auth.authenticate_with_password(username, password)
+
+async def authenticate_service_account_async(service: str) -> str:
+    """Quick coroutine to authenticate a service account and return access token"""
+    logger.debug("---> Quick function authenticate_service_account_async() called <---")
+    auth = asyncKeycloakRegistry.get(service)
+    # Concurrent callers for the same service share one token request
+    tokens = await asyncSingleFlight.do(
+        ('client_credentials', auth.config.realm, auth.config.client_id),
+        auth.authenticate_with_client_credentials
+    )
+    return tokens['access_token']
+
+async def verify_token_async(
+    token: str,
+    service: str,
+    method: str = 'local',
+    executor: Optional[Executor] = None
+) -> Dict[str, Any]:
+    """
+    Quick coroutine to verify a token
+
+    Args:
+        token: Token to verify
+        service: Name of the service
+        method: 'local' (default, no special permissions needed) or 'introspect' (requires permissions)
+        executor: Executor running the local signature verification (on the event loop if not provided)
+    """
+    logger.debug("---> Quick function verify_token_async() called <---")
+    auth = asyncKeycloakRegistry.get(service)
+    if method == 'local':
+        with phase('token_cache'):
+            claims = await tokenCache.aget(token, service)
+        if claims is not None:
+            logger.debug("Token found in verified token cache")
+            return claims
+        claims = await auth.verify_token_locally(token, executor)
+        await tokenCache.aput(token, service, claims)
+        return claims
+    introspection = await introspectionCache.aget(token, service)
+    if introspection is not None:
+        logger.debug("Token found in introspection cache")
+        return introspection
+    async def introspect() -> Dict[str, Any]:
+        result = await auth.introspect_token(token)
+        await introspectionCache.aput(token, service, result)
+        return result
+    # Concurrent introspections of the same token share one Keycloak call
+    return await asyncSingleFlight.do(('introspect', service, token_digest(token)), introspect)
+
+
+async def verify_tokens_async(
+    items: List[Tuple[str, str]],
+    concurrency: int = 8
+) -> List[Union[Dict[str, Any], Exception]]:
+    """
+    Quick coroutine to verify many tokens locally.
+    Items are grouped by realm so each realm JWKS is looked up once,
+    then tokens are verified in parallel up to the concurrency limit,
+    their signatures being checked in the verifyExecutor thread pool.
+
+    Args:
+        items: List of (token, service) pairs
+        concurrency: Maximum number of verifications in flight
+
+    Returns:
+        List with, for each item in order, the decoded claims or the exception raised
+    """
+    logger.debug("---> Quick function verify_tokens_async() called <---")
+    results: List[Union[Dict[str, Any], Exception]] = [None] * len(items)
+
+    # Group items by realm, unknown services fail individually
+    realms: Dict[str, AsyncKeycloakAuth] = {}
+    for index, (token, service) in enumerate(items):
+        try:
+            auth = asyncKeycloakRegistry.get(service)
+            realms.setdefault(auth.config.realm, auth)
+        except KeycloakAuthError as e:
+            results[index] = e
+
+    # Shared key lookup per realm
+    await asyncio.gather(
+        *(auth.get_public_keys() for auth in realms.values()),
+        return_exceptions=True
+    )
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    async def verify_item(index: int, token: str, service: str):
+        async with semaphore:
+            try:
+                results[index] = await verify_token_async(token, service, executor=verifyExecutor)
+            except Exception as e:
+                results[index] = e
+
+    await asyncio.gather(*(
+        verify_item(index, token, service)
+        for index, (token, service) in enumerate(items)
+        if results[index] is None
+    ))
+    return results
\ No newline at end of file
@@ -1,38 +1,82 @@
 import os
+import asyncio
 import uvicorn # pyright: ignore[reportMissingImports]
 from contextlib import asynccontextmanager
-from datetime import datetime, UTC
 from fastapi import FastAPI, HTTPException # pyright: ignore[reportMissingImports]
 from fastapi.requests import Request # pyright: ignore[reportMissingImports]
-from fastapi.responses import JSONResponse, RedirectResponse # pyright: ignore[reportMissingImports]
+from fastapi.responses import RedirectResponse # pyright: ignore[reportMissingImports]
 from fastapi.middleware.cors import CORSMiddleware # pyright: ignore[reportMissingImports]
 from fastapi.middleware.trustedhost import TrustedHostMiddleware # pyright: ignore[reportMissingImports]
 from fastapi.middleware.gzip import GZipMiddleware # pyright: ignore[reportMissingImports]
 from apiRouter import api
-from middlewares import https_enforcement_middleware
-from config.settings import settings
+from middlewares import HttpsEnforcementMiddleware, MetricsMiddleware, ServerTimingMiddleware
+from metrics import monitor_event_loop, EVENT_LOOP_LAG_INTERVAL
+from fastResponses import DEFAULT_RESPONSE_CLASS, utc_timestamp
+from config.settings import appSettings
+from keycloakAuth import keycloakRegistry, serviceTokenManager
+from asyncKeycloakAuth import asyncKeycloakRegistry, verifyExecutor
+from config.service_config_reader import serviceConfig
+from cache.cacheBackend import sharedBackend
+from cache.jwksCache import jwksCache
 # Initialize logger at the top so it's available everywhere 
 from logger.loggerFactory import logger_factory
 logger = logger_factory.get_logger('authServer')
 
 # ========== START - VARIABLES SECTION ========== #
-SERVICE_NAME = settings.get('APP_NAME')
+SERVICE_NAME = appSettings.app_name
 # HTTPs enforcement and allowed hosts from config
-ENFORCE_HTTPS = settings.get('ENFORCE_HTTPS')
-ALLOWED_HOSTS = settings.get('ALLOWED_HOSTS').split(',')
+ENFORCE_HTTPS = appSettings.enforce_https
+ALLOWED_HOSTS = list(appSettings.allowed_hosts)
+# Number of worker processes, each worker imports the app on its own
+API_WORKERS = appSettings.api_workers
 # ========== END - VARIABLES SECTION ========== #
 
+async def warm_up(app):
+    """
+    Warm up Keycloak clients, realm JWKS and public keys, then mark the service ready
+    """
+    try:
+        keycloakRegistry.load_all()
+        app.state.warmup = await asyncKeycloakRegistry.warm_up()
+    except Exception as e:
+        logger.error(f"Warm-up of {SERVICE_NAME} failed: {str(e)}")
+    app.state.ready = True
+    logger.info(f"{SERVICE_NAME} ready")
+
 @asynccontextmanager
 async def lifespan(app):
     """
     Lifespan event handler to initialize service on startup
     """
+    # Readiness reports not ready until warm-up completes
+    app.state.ready = False
+    app.state.warmup = None
+    warmup_task = None
+    lag_task = asyncio.create_task(monitor_event_loop(EVENT_LOOP_LAG_INTERVAL))
+    # Services added or changed in the service configuration file are picked up without restart
+    watch_task = None
+    if appSettings.service_config_poll_interval > 0:
+        watch_task = asyncio.create_task(serviceConfig.watch(appSettings.service_config_poll_interval))
     try:
+        # Keys from the previous run let tokens verify even if Keycloak is not up yet
+        jwksCache.load_snapshots()
+        warmup_task = asyncio.create_task(warm_up(app))
         logger.info(f"{SERVICE_NAME} initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize {SERVICE_NAME} {str(e)}")
     yield
-    # Add shutdown/cleanup logic here if needed
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    lag_task.cancel()
+    if watch_task is not None:
+        watch_task.cancel()
+    # Close pooled Keycloak connections
+    serviceTokenManager.close()
+    await asyncKeycloakRegistry.aclose()
+    keycloakRegistry.close()
+    verifyExecutor.shutdown(wait=False, cancel_futures=True)
+    if sharedBackend is not None:
+        sharedBackend.close()
 
 # ************************************************************
 # *************** START Initialize FastAPI app ***************
@@ -42,8 +86,11 @@ app = FastAPI(
     description="A secured SSL enforced REST API for security service operations",
     version="1.0.0",
     lifespan=lifespan,
-    redirect_slashes=False
+    redirect_slashes=False,
+    default_response_class=DEFAULT_RESPONSE_CLASS
 )
+# Settings snapshot parsed at startup, available to endpoints as request.app.state.settings
+app.state.settings = appSettings
 
 # =======================================================================
 # ================== START - Enable CORS configuration ==================
@@ -77,10 +124,8 @@ if ALLOWED_HOSTS and ALLOWED_HOSTS != ['*']:
         TrustedHostMiddleware, 
         allowed_hosts=ALLOWED_HOSTS)
 
-# Custom HTTPS enforcement middleware
-@app.middleware("http")
-async def custom_https_middleware(request: Request, call_next):
-    return await https_enforcement_middleware(request, call_next)
+# Custom HTTPS enforcement middleware (pure ASGI)
+app.add_middleware(HttpsEnforcementMiddleware)
 ######################################################################
 ################### END - TLS/SSL Configurations ###################
 ######################################################################
@@ -93,6 +138,10 @@ async def custom_https_middleware(request: Request, call_next):
 # tweak this to see the most efficient size
 app.add_middleware(GZipMiddleware, minimum_size=100)
 
+# Outermost middlewares, so recorded latency covers the whole middleware stack
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ServerTimingMiddleware)
+
 # Include API router to enable API endpoints
 app.include_router(api)
 # Root endpoint redirecting to API docs
@@ -103,19 +152,20 @@ async def root():
 # Exception handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
-    return JSONResponse(
+    return DEFAULT_RESPONSE_CLASS(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
             "path": request.url.path,
-            "timestamp": datetime.now(UTC).isoformat(),
+            "timestamp": utc_timestamp(),
         },
+        headers=exc.headers,
     )
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unexpected error: {str(exc)}")
-    return JSONResponse(
+    return DEFAULT_RESPONSE_CLASS(
         status_code=500,
         content={
             "detail": "An unexpected error occurred",
@@ -133,27 +183,36 @@ def main():
     global ENFORCE_HTTPS
 
     logger.info(f"Configuration loaded successfully.")
-    logger.info(f"  APP_NAME: {settings.get('APP_NAME')}")
-    logger.info(f"  API_HOST: {settings.get('API_HOST')}")
-    logger.info(f"  API_PORT: {settings.get('API_PORT')}")
-    logger.info(f"  API_PORT_SECURE: {settings.get('API_PORT_SECURE')}")
-    logger.info(f"  SSL_KEYFILE: {settings.get('SSL_KEYFILE')}")
-    logger.info(f"  SSL_CERTFILE: {settings.get('SSL_CERTFILE')}")
-    logger.info(f"  ENFORCE_HTTPS: {settings.get('ENFORCE_HTTPS')}")
-    logger.info(f"  ALLOWED_HOSTS: {settings.get('ALLOWED_HOSTS')}")
-    logger.info(f"  KEYCLOAK_SERVER_URL: {settings.get('KEYCLOAK_SERVER_URL')}")
+    logger.info(f"  APP_NAME: {appSettings.app_name}")
+    logger.info(f"  API_HOST: {appSettings.api_host}")
+    logger.info(f"  API_PORT: {appSettings.api_port}")
+    logger.info(f"  API_PORT_SECURE: {appSettings.api_port_secure}")
+    logger.info(f"  SSL_KEYFILE: {appSettings.ssl_keyfile}")
+    logger.info(f"  SSL_CERTFILE: {appSettings.ssl_certfile}")
+    logger.info(f"  ENFORCE_HTTPS: {appSettings.enforce_https}")
+    logger.info(f"  ALLOWED_HOSTS: {','.join(appSettings.allowed_hosts)}")
+    logger.info(f"  KEYCLOAK_SERVER_URL: {appSettings.keycloak_server_url}")
+    logger.info(f"  API_WORKERS: {API_WORKERS}")
+    logger.info(f"  CACHE_BACKEND: {type(sharedBackend).__name__ if sharedBackend else 'memory'}")
     
     logger.info(f"Starting {SERVICE_NAME} server...")
-    host=settings.get('API_HOST')
-    port=settings.get('API_PORT')
+    host=appSettings.api_host
+    port=appSettings.api_port
     
     # Get SSL configuration from settings
-    ssl_keyfile = settings.get('SSL_KEYFILE')
-    ssl_certfile = settings.get('SSL_CERTFILE')
+    ssl_keyfile = appSettings.ssl_keyfile
+    ssl_certfile = appSettings.ssl_certfile
     
     # Determine if SSL is configured
     use_ssl = ssl_keyfile and ssl_certfile
 
+    # Several workers need the app as an import string, so each worker process loads it
+    target = "authServer:app" if API_WORKERS > 1 else app
+    if API_WORKERS > 1:
+        logger.info(f"Starting {API_WORKERS} workers")
+        if sharedBackend is None:
+            logger.warning("⚠️  CACHE_BACKEND=memory with several workers: each worker caches (and fetches) on its own")
+
     if ENFORCE_HTTPS and use_ssl:
         if not os.path.exists(ssl_keyfile):
             logger.error(f"SSL key file not found: {ssl_keyfile}")
@@ -162,12 +221,12 @@ def main():
             logger.error(f"SSL certificate file not found: {ssl_certfile}")
             exit(1)
         
-        port=settings.get('API_PORT_SECURE')
+        port=appSettings.api_port_secure
         logger.info(f"🔒 Starting server with HTTPS on {host}:{port}")
         logger.info(f"   SSL Key: {ssl_keyfile}")
         logger.info(f"   SSL Cert: {ssl_certfile}")
         # Start Uvicorn with SSL
-        uvicorn.run(app, host=host, port=port, ssl_keyfile=ssl_keyfile, ssl_certfile=ssl_certfile)
+        uvicorn.run(target, host=host, port=port, workers=API_WORKERS, ssl_keyfile=ssl_keyfile, ssl_certfile=ssl_certfile)
     else:
         if ENFORCE_HTTPS:
             logger.warning("⚠️  ENFORCE_HTTPS is enabled but no SSL certificates configured!")
@@ -177,7 +236,7 @@ def main():
         logger.info(f"🌐 Starting server with HTTP on {host}:{port}")
         logger.warning("⚠️  Running without TLS/SSL - not recommended for production")
         # Start Uvicorn without SSL 
-        uvicorn.run(app, host=host, port=port)
+        uvicorn.run(target, host=host, port=port, workers=API_WORKERS)
 
 ################### MAIN PROGRAM EXECUTION ###################
 if __name__ == "__main__":
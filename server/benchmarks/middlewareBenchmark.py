@@ -0,0 +1,104 @@
+"""
+Per-request overhead of the HTTPS enforcement middleware.
+
+Compares a bare app, the previous @app.middleware("http") implementation
+(BaseHTTPMiddleware, headers rebuilt on every response) and the pure ASGI
+HttpsEnforcementMiddleware. Requests are driven in-process through the ASGI
+interface, so only middleware cost is measured (no sockets, no HTTP parsing).
+
+Usage (from the server directory):
+    python3 benchmarks/middlewareBenchmark.py [requests]
+"""
+import asyncio
+import os
+import sys
+import time
+
+# Run from the server directory with HTTPS enforcement on, as in production
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ENFORCE_HTTPS", "true")
+os.environ.setdefault("ALLOWED_HOSTS", "localhost")
+
+from fastapi import FastAPI # pyright: ignore[reportMissingImports]
+from fastapi.requests import Request # pyright: ignore[reportMissingImports]
+from fastapi.responses import RedirectResponse # pyright: ignore[reportMissingImports]
+from middlewares import HttpsEnforcementMiddleware
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+
+    # Not a health probe path, so every variant goes through enforcement and security headers
+    @app.get("/v1/benchmark")
+    async def benchmark():
+        return {"status": "ok"}
+
+    return app
+
+async def legacy_https_middleware(request: Request, call_next):
+    """Previous implementation, kept here as the benchmark reference"""
+    if request.url.path == "/health":
+        return await call_next(request)
+    is_https = (
+        request.url.scheme == "https" or
+        request.headers.get("x-forwarded-proto") == "https" or
+        request.headers.get("x-forwarded-ssl") == "on"
+    )
+    if not is_https:
+        return RedirectResponse(url=str(request.url).replace("http://", "https://", 1), status_code=307)
+    response = await call_next(request)
+    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+    response.headers["X-Content-Type-Options"] = "nosniff"
+    response.headers["X-Frame-Options"] = "DENY"
+    response.headers["X-XSS-Protection"] = "1; mode=block"
+    return response
+
+def build_variants():
+    bare = create_app()
+    legacy = create_app()
+    legacy.middleware("http")(legacy_https_middleware)
+    asgi = create_app()
+    asgi.add_middleware(HttpsEnforcementMiddleware, enforce_https=True)
+    return {"bare": bare, "legacy (BaseHTTPMiddleware)": legacy, "pure ASGI": asgi}
+
+async def run(app, requests: int) -> float:
+    """Send requests through the app and return the mean time per request in microseconds"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/v1/benchmark",
+        "raw_path": b"/v1/benchmark",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"x-forwarded-proto", b"https")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    # Warm up (route compilation, lazy imports)
+    for _ in range(200):
+        await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+async def main(requests: int):
+    results = {}
+    for name, app in build_variants().items():
+        results[name] = await run(app, requests)
+    baseline = results["bare"]
+    print(f"{requests} requests per variant")
+    for name, micros in results.items():
+        print(f"  {name:<28} {micros:8.1f} us/request  (+{micros - baseline:6.1f} us middleware)")
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
@@ -0,0 +1,129 @@
+"""
+Per-request cost of the health, verify and auth endpoints, with and without FAST_RESPONSES.
+
+Requests are driven in-process through the ASGI interface of the real app with its
+middlewares removed (routing, validation, endpoint and serialization, no sockets),
+so only the cost changed by the response mode is measured. Keycloak is kept out of the measure:
+verify is answered from the verified token cache and the Keycloak login call of
+/auth is replaced by a canned token response.
+
+Usage (from the server directory, with a service_config.json and .env in place):
+    python3 benchmarks/responseBenchmark.py [requests]            # both modes, in subprocesses
+    python3 benchmarks/responseBenchmark.py [requests] --current  # current environment only
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+ROUNDS = 5
+
+TOKEN_RESPONSE = {
+    "access_token": "a" * 900,
+    "expires_in": 300,
+    "refresh_token": "r" * 700,
+    "refresh_expires_in": 1800,
+    "token_type": "Bearer",
+    "scope": "openid profile email",
+}
+
+async def call(app, method: str, path: str, body: bytes = b"", headers=()) -> int:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"x-forwarded-proto", b"https"),
+                    (b"content-length", str(len(body)).encode()), *headers],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+async def measure(app, requests: int, *args, **kwargs) -> float:
+    """Mean time per request in microseconds, best of ROUNDS rounds to filter out machine noise"""
+    for _ in range(200):
+        status = await call(app, *args, **kwargs)
+    if status != 200:
+        raise RuntimeError(f"{args[1]} answered {status}")
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await call(app, *args, **kwargs)
+        best = min(best, (time.perf_counter() - start) / requests * 1e6)
+    return best
+
+async def run_current(requests: int):
+    from authServer import app
+    from config.service_config_reader import serviceConfig
+    from cache.tokenCache import tokenCache
+    import routers.authRouters as authRouters
+
+    # The middleware stack is built on the first request, drop the user middlewares before it
+    app.user_middleware = []
+
+    service = serviceConfig.list_services()[0]
+    token = "benchmark-token"
+    tokenCache.put(token, service, {"sub": "benchmark", "exp": time.time() + 3600})
+
+    async def canned_login(username, password, service):
+        return dict(TOKEN_RESPONSE)
+    authRouters.authenticate_user_async = canned_login
+
+    results = {
+        "GET /v1/monitor/health": await measure(app, requests, "GET", "/v1/monitor/health"),
+        "POST /v1/security/verify": await measure(
+            app, requests, "POST", "/v1/security/verify",
+            json.dumps({"service": service}).encode(),
+            headers=[(b"content-type", b"application/json"), (b"authorization", f"Bearer {token}".encode())]
+        ),
+        "POST /v1/security/auth": await measure(
+            app, requests, "POST", "/v1/security/auth",
+            json.dumps({"username": "bench", "password": "bench", "service": service}).encode(),
+            headers=[(b"content-type", b"application/json")]
+        ),
+    }
+    print(json.dumps(results))
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    requests = int(args[0]) if args else 2000
+    if "--current" in sys.argv:
+        asyncio.run(run_current(requests))
+        return
+    modes = {}
+    for fast in ("false", "true"):
+        env = dict(os.environ, FAST_RESPONSES=fast, LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"))
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), str(requests), "--current"],
+            cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        modes[fast] = json.loads(output.strip().splitlines()[-1])
+    print(f"{requests} requests per endpoint, best of {ROUNDS} rounds, us/request")
+    print(f"  {'endpoint':<28} {'default':>10} {'fast':>10}")
+    for endpoint in modes["false"]:
+        print(f"  {endpoint:<28} {modes['false'][endpoint]:10.1f} {modes['true'][endpoint]:10.1f}")
+
+if __name__ == "__main__":
+    main()
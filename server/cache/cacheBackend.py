@@ -0,0 +1,471 @@
+import abc
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import stat
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+from config.settings import appSettings
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('cacheBackend')
+
+# Rough per-entry overhead (key, tuple, OrderedDict node) added to the value size
+_ENTRY_OVERHEAD = 200
+
+def default_shm_directory() -> str:
+    """
+    Default directory of the shm backend, private to the current user: under $XDG_RUNTIME_DIR
+    when set, else a user id suffixed directory in /dev/shm (or the temporary directory)
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'windfire-security')
+    base = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+    return os.path.join(base, f'windfire-security-{os.getuid()}')
+
+def _encode(value: Any) -> bytes:
+    """Serialize a cache value for shared backends"""
+    return json.dumps(value, separators=(',', ':'), default=str).encode()
+
+class CacheBackendError(Exception):
+    """Custom exception for cache backend errors"""
+    pass
+
+class CacheBackend(abc.ABC):
+    """
+    Key/value store used by the caches. Values are JSON-serializable objects.
+    Shared backends are visible to every worker, so a delete reaches all of them.
+    Coroutines use the asyncio variants (aget, aset, adelete), which run the calls of
+    blocking backends (socket or file I/O) in a worker thread, off the event loop.
+    """
+    shared = False
+    blocking = False
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value or None if missing or expired"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, ttl: float):
+        """Store a value for ttl seconds"""
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        """Drop a value"""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Drop every value"""
+
+    async def aget(self, key: str) -> Optional[Any]:
+        """Asyncio variant of get()"""
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key)
+        return self.get(key)
+
+    async def aset(self, key: str, value: Any, ttl: float):
+        """Asyncio variant of set()"""
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value, ttl)
+        else:
+            self.set(key, value, ttl)
+
+    async def adelete(self, key: str):
+        """Asyncio variant of delete()"""
+        if self.blocking:
+            await asyncio.to_thread(self.delete, key)
+        else:
+            self.delete(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get backend counters"""
+        return {}
+
+    def close(self):
+        """Release backend resources"""
+        pass
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU store bounded by entry count and estimated bytes"""
+    def __init__(self, max_entries: int = 10000, max_bytes: int = None):
+        """
+        Initialize the in-process store
+
+        Args:
+            max_entries: Maximum number of entries
+            max_bytes: Maximum estimated size of stored values in bytes (unbounded if not provided)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'evictions': 0, 'expirations': 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, size = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                self._bytes -= size
+                self._stats['expirations'] += 1
+                return None
+            self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        size = len(_encode(value)) + _ENTRY_OVERHEAD if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            self._entries[key] = (value, time.monotonic() + ttl, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+        return stats
+
+class SharedMemoryBackend(CacheBackend):
+    """
+    Store shared by the workers of one host: one file per key in a tmpfs directory
+    (/dev/shm), written with an atomic rename and read with a single read call.
+    Each file starts with the entry expiry (wall clock, 8 bytes) followed by the JSON value.
+    """
+    shared = True
+    blocking = True
+    _HEADER = struct.Struct('!d')
+
+    def __init__(self, directory: str = None, max_entries: int = 50000, sweep_every: int = 256):
+        """
+        Initialize the shared memory store
+
+        Args:
+            directory: Directory holding the entries (default: default_shm_directory())
+            max_entries: Maximum number of entries kept after a sweep
+            sweep_every: Number of writes between sweeps of expired entries
+
+        Raises:
+            CacheBackendError: If the directory is not owned by the current user or is open to other users
+        """
+        self.directory = directory or default_shm_directory()
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._stats = {'evictions': 0, 'expirations': 0, 'errors': 0}
+        self._check_directory()
+        logger.info("Shared memory cache backend in %s", self.directory)
+
+    def _check_directory(self):
+        """
+        Create the directory, or check an existing one: entries are trusted as verified claims and keys,
+        so a directory another user could write to (or delete from) is refused
+        """
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+        info = os.lstat(self.directory)
+        if not stat.S_ISDIR(info.st_mode):
+            raise CacheBackendError(f"Shared memory cache directory {self.directory} is not a directory")
+        if info.st_uid != os.getuid():
+            raise CacheBackendError(
+                f"Shared memory cache directory {self.directory} is owned by uid {info.st_uid}, not by the server user"
+            )
+        if info.st_mode & 0o077:
+            raise CacheBackendError(
+                f"Shared memory cache directory {self.directory} is accessible to other users "
+                f"(mode {stat.S_IMODE(info.st_mode):o}, expected 700)"
+            )
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            self._stats['errors'] += 1
+            logger.warning("Shared memory cache read failed: %s", e)
+            return None
+        if len(data) < self._HEADER.size:
+            return None
+        (expires_at,) = self._HEADER.unpack_from(data)
+        if time.time() >= expires_at:
+            self._stats['expirations'] += 1
+            self._unlink(path)
+            return None
+        try:
+            return json.loads(data[self._HEADER.size:])
+        except ValueError:
+            return None
+
+    def set(self, key: str, value: Any, ttl: float):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(self._HEADER.pack(time.time() + ttl) + _encode(value))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self._stats['errors'] += 1
+            logger.warning("Shared memory cache write failed: %s", e)
+            self._unlink(tmp_path)
+            return
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep()
+
+    def _unlink(self, path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def delete(self, key: str):
+        self._unlink(self._path(key))
+
+    def sweep(self):
+        """Drop expired entries, then the oldest ones while above max_entries"""
+        now = time.time()
+        alive = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    with open(entry.path, 'rb') as f:
+                        (expires_at,) = self._HEADER.unpack(f.read(self._HEADER.size))
+                except (OSError, struct.error):
+                    continue
+                if now >= expires_at:
+                    self._unlink(entry.path)
+                    self._stats['expirations'] += 1
+                else:
+                    alive.append((expires_at, entry.path))
+        if len(alive) > self.max_entries:
+            alive.sort()
+            for _, path in alive[:len(alive) - self.max_entries]:
+                self._unlink(path)
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                self._unlink(entry.path)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats['backend'] = 'shm'
+        return stats
+
+class RedisBackend(CacheBackend):
+    """
+    Store shared by workers on any host, speaking the Redis protocol (RESP2) over a plain socket.
+    Backend failures are logged and reported as cache misses, they never fail a request.
+    """
+    shared = True
+    blocking = True
+
+    def __init__(self, url: str = 'redis://127.0.0.1:6379/0', prefix: str = 'windfire-security:', timeout: float = 0.5):
+        """
+        Initialize the Redis protocol store
+
+        Args:
+            url: redis://[:password@]host:port/db URL of the server
+            prefix: Prefix of every key written by this server
+            timeout: Socket timeout in seconds
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._stats = {'errors': 0}
+        logger.info("Redis cache backend on %s:%s/%s", self.host, self.port, self.db)
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile('rb')
+        if self.password:
+            self._call_locked('AUTH', self.password)
+        if self.db:
+            self._call_locked('SELECT', str(self.db))
+
+    def _disconnect(self):
+        if self._sock is not None:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line:
+            # A connection error (not a server reply), so the command is retried on a new connection
+            raise ConnectionResetError("Connection closed by server")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise CacheBackendError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(payload)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise CacheBackendError(f"Unexpected reply: {line!r}")
+
+    def _call_locked(self, *args: str) -> Any:
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def _call(self, *args) -> Any:
+        """Send a command, reconnecting once on a broken connection"""
+        with self._lock:
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._call_locked(*args)
+                except (OSError, CacheBackendError) as e:
+                    self._disconnect()
+                    if attempt == 2 or isinstance(e, CacheBackendError):
+                        raise
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            data = self._call('GET', self.prefix + key)
+        except (OSError, CacheBackendError) as e:
+            self._stats['errors'] += 1
+            logger.warning("Redis cache GET failed: %s", e)
+            return None
+        return json.loads(data) if data is not None else None
+
+    def set(self, key: str, value: Any, ttl: float):
+        milliseconds = int(ttl * 1000)
+        if milliseconds <= 0:
+            return
+        try:
+            self._call('SET', self.prefix + key, _encode(value), 'PX', str(milliseconds))
+        except (OSError, CacheBackendError) as e:
+            self._stats['errors'] += 1
+            logger.warning("Redis cache SET failed: %s", e)
+
+    def delete(self, key: str):
+        try:
+            self._call('DEL', self.prefix + key)
+        except (OSError, CacheBackendError) as e:
+            self._stats['errors'] += 1
+            logger.warning("Redis cache DEL failed: %s", e)
+
+    def clear(self):
+        try:
+            cursor = '0'
+            while True:
+                cursor, keys = self._call('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', '500')
+                cursor = cursor.decode() if isinstance(cursor, bytes) else cursor
+                if keys:
+                    self._call('DEL', *keys)
+                if cursor == '0':
+                    break
+        except (OSError, CacheBackendError) as e:
+            self._stats['errors'] += 1
+            logger.warning("Redis cache clear failed: %s", e)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        stats['backend'] = 'redis'
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+def create_shared_backend(name: str) -> Optional[CacheBackend]:
+    """
+    Create the backend shared by the caches
+
+    Args:
+        name: 'memory' (per process, returns None), 'shm' or 'redis'
+
+    Returns:
+        The shared backend or None for in-process caches
+
+    Raises:
+        CacheBackendError: If the backend name is unknown
+    """
+    name = (name or 'memory').strip().lower()
+    if name == 'memory':
+        return None
+    if name == 'shm':
+        return SharedMemoryBackend(
+            directory=appSettings.cache_shm_dir,
+            max_entries=appSettings.cache_shm_max_entries
+        )
+    if name == 'redis':
+        return RedisBackend(
+            url=appSettings.cache_redis_url,
+            prefix=appSettings.cache_key_prefix
+        )
+    raise CacheBackendError(f"Unknown cache backend: {name}")
+
+##################################################
+##### Initialize shared cache backend instance #####
+##################################################
+# With several workers caches are shared on the host unless configured otherwise
+_default_backend = 'shm' if appSettings.api_workers > 1 else 'memory'
+sharedBackend = create_shared_backend(appSettings.cache_backend or _default_backend)
@@ -0,0 +1,144 @@
+import time
+from typing import Dict, Any, Iterable, Optional
+from config.settings import appSettings
+from config.service_config_reader import serviceConfig
+from cache.cacheBackend import CacheBackend, MemoryBackend, sharedBackend
+from cache.tokenCache import token_digest
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('introspectionCache')
+
+class IntrospectionCache:
+    """
+    Short lived cache of token introspection results, keyed by service (and its configuration fingerprint) and token digest.
+    Entries live in an in-process LRU, or in the shared backend when the server runs several workers.
+    """
+    def __init__(self, active_ttl: int = 30, inactive_ttl: int = 5, max_entries: int = 10000,
+                 backend: CacheBackend = None):
+        """
+        Initialize the introspection cache
+
+        Args:
+            active_ttl: Seconds an 'active: true' result is cached (never past the token 'exp')
+            inactive_ttl: Seconds an 'active: false' result is cached
+            max_entries: Maximum number of cached results (0 disables the cache)
+            backend: Store of the entries (default: in-process LRU bounded by max_entries)
+        """
+        self.active_ttl = active_ttl
+        self.inactive_ttl = inactive_ttl
+        self.max_entries = max_entries
+        self.backend = backend or MemoryBackend(max_entries=max_entries)
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Check if the cache is enabled"""
+        return self.max_entries > 0
+
+    def _key(self, token: str, service: str) -> str:
+        return 'introspect:' + token_digest(token, serviceConfig.cache_scope(service))
+
+    def _found(self, introspection: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Count a lookup and copy the result found"""
+        if introspection is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['hits'] += 1
+        return dict(introspection)
+
+    def _ttl(self, introspection: Dict[str, Any]) -> float:
+        """Seconds a result stays cached: active_ttl (never past the token 'exp') or inactive_ttl"""
+        if not introspection.get('active', False):
+            return self.inactive_ttl
+        ttl = self.active_ttl
+        exp = introspection.get('exp')
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        return ttl
+
+    def get(self, token: str, service: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached introspection result of a token
+
+        Args:
+            token: Raw token
+            service: Name of the service that introspected the token
+
+        Returns:
+            Introspection result or None if not cached or expired
+        """
+        if not self.enabled:
+            return None
+        return self._found(self.backend.get(self._key(token, service)))
+
+    async def aget(self, token: str, service: str) -> Optional[Dict[str, Any]]:
+        """Asyncio variant of get(), not blocking the event loop on a shared backend"""
+        if not self.enabled:
+            return None
+        return self._found(await self.backend.aget(self._key(token, service)))
+
+    def put(self, token: str, service: str, introspection: Dict[str, Any]):
+        """
+        Cache an introspection result
+
+        Args:
+            token: Raw token
+            service: Name of the service that introspected the token
+            introspection: Result returned by Keycloak
+        """
+        if not self.enabled:
+            return
+        ttl = self._ttl(introspection)
+        if ttl > 0:
+            self.backend.set(self._key(token, service), introspection, ttl)
+
+    async def aput(self, token: str, service: str, introspection: Dict[str, Any]):
+        """Asyncio variant of put(), not blocking the event loop on a shared backend"""
+        if not self.enabled:
+            return
+        ttl = self._ttl(introspection)
+        if ttl > 0:
+            await self.backend.aset(self._key(token, service), introspection, ttl)
+
+    def invalidate(self, token: str, services: Iterable[str]):
+        """
+        Drop the cached introspection results of a token (e.g. on logout)
+
+        Args:
+            token: Raw token
+            services: Names of the services the token may have been introspected for
+        """
+        for service in services:
+            self.backend.delete(self._key(token, service))
+        self._stats['invalidations'] += 1
+
+    def clear(self):
+        """Drop all cached results"""
+        self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hit/miss counters, hit ratio and backend counters
+        """
+        stats = dict(self._stats)
+        stats.update(self.backend.get_stats())
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+##################################################
+##### Initialize introspection cache instance #####
+##################################################
+introspectionCache = IntrospectionCache(
+    active_ttl=appSettings.introspection_cache_active_ttl,
+    inactive_ttl=appSettings.introspection_cache_inactive_ttl,
+    max_entries=appSettings.introspection_cache_max_entries,
+    backend=sharedBackend
+)
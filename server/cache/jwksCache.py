@@ -0,0 +1,473 @@
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Tuple, Awaitable
+from config.settings import appSettings
+from cache.cacheBackend import CacheBackend, sharedBackend
+from cache.jwksSnapshot import JwksSnapshotStore, jwksSnapshots
+from singleFlight import singleFlight, asyncSingleFlight
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory, LogSampler
+logger = logger_factory.get_logger('jwksCache')
+
+# Matches max-age / s-maxage directives in a Cache-Control header
+_MAX_AGE_RE = re.compile(r'(?:^|,)\s*(?:s-maxage|max-age)\s*=\s*"?(\d+)"?', re.IGNORECASE)
+
+@dataclass
+class JwksEntry:
+    """Dataclass representing a cached JWKS document for a realm"""
+    jwks: Dict[str, Any]
+    kids: frozenset
+    fetched_at: float
+    expires_at: float
+    version: int
+    fetched_wall: float = 0.0
+
+    def is_fresh(self, now: float = None) -> bool:
+        """Check if the entry is still within its TTL"""
+        return (now or time.monotonic()) < self.expires_at
+
+class JwksCache:
+    """
+    Process-wide cache of Keycloak JWKS documents keyed by realm.
+    With a shared backend, fetched documents are published to the other workers and adopted from them,
+    so a realm is fetched once per host (or cluster) instead of once per worker.
+    """
+    def __init__(
+        self,
+        ttl: int = 300,
+        max_ttl: int = 3600,
+        min_refresh_interval: int = 10,
+        max_staleness: int = 86400,
+        backend: CacheBackend = None,
+        sync_interval: float = 1.0,
+        snapshots: JwksSnapshotStore = None,
+        stale_log_every: int = 100
+    ):
+        """
+        Initialize the JWKS cache
+
+        Args:
+            ttl: Default time to live (seconds) of a cached JWKS
+            max_ttl: Upper bound (seconds) for a TTL taken from Cache-Control headers
+            min_refresh_interval: Minimum interval (seconds) between forced refreshes of a realm
+            max_staleness: Maximum age (seconds) of an expired JWKS still served when Keycloak is unavailable
+            backend: Shared backend publishing JWKS documents to other workers (optional)
+            sync_interval: Minimum interval (seconds) between checks of the shared backend for a realm
+            snapshots: On-disk store of the last fetched JWKS of each realm (optional)
+            stale_log_every: Log 1 of every N stale JWKS served for a realm
+        """
+        self.ttl = ttl
+        self.max_ttl = max_ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.max_staleness = max_staleness
+        self.backend = backend
+        self.sync_interval = sync_interval
+        self.snapshots = snapshots
+        # Outages serve stale keys on every request: warn once, then 1 of every stale_log_every times
+        self._stale_log_sampler = LogSampler(every=stale_log_every)
+        self._entries: Dict[str, JwksEntry] = {}
+        self._last_forced_refresh: Dict[str, float] = {}
+        self._last_sync: Dict[str, float] = {}
+        self._version = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'forced_refreshes': 0,
+            'forced_refreshes_throttled': 0,
+            'stale_served': 0,
+            'shared_adopted': 0,
+            'snapshots_loaded': 0,
+        }
+
+    def _ttl_from_cache_control(self, cache_control: Optional[str]) -> int:
+        """
+        Compute the TTL of a JWKS response from its Cache-Control header
+
+        Args:
+            cache_control: Value of the Cache-Control response header
+
+        Returns:
+            TTL in seconds
+        """
+        if not cache_control:
+            return self.ttl
+        if 'no-store' in cache_control.lower():
+            return 0
+        match = _MAX_AGE_RE.search(cache_control)
+        if match:
+            return min(int(match.group(1)), self.max_ttl)
+        return self.ttl
+
+    def _sync_due(self, realm: str, force: bool) -> bool:
+        """Check if the shared backend should be checked for a realm now (at most once per sync_interval unless forced)"""
+        now = time.monotonic()
+        if not force and now - self._last_sync.get(realm, -self.sync_interval) < self.sync_interval:
+            return False
+        self._last_sync[realm] = now
+        return True
+
+    def _apply_shared(self, realm: str, document: Optional[Dict[str, Any]]) -> Optional[JwksEntry]:
+        """
+        Adopt the JWKS another worker published for a realm, or drop ours if it was invalidated there
+
+        Args:
+            realm: Keycloak realm
+            document: Document read from the shared backend (None if missing or backend unavailable)
+
+        Returns:
+            Current JwksEntry of the realm or None
+        """
+        entry = self._entries.get(realm)
+        if document is None:
+            # Missing or backend unavailable: keep what this worker has
+            return entry
+        fetched_wall = entry.fetched_wall if entry is not None else 0.0
+        if 'invalidated_at' in document:
+            if entry is not None and document['invalidated_at'] >= fetched_wall:
+                with self._lock:
+                    self._entries.pop(realm, None)
+                return None
+            return entry
+        if document['fetched_at'] <= fetched_wall:
+            return entry
+        entry = self._adopt(realm, document['jwks'], document['fetched_at'], document['expires_at'])
+        with self._lock:
+            self._stats['shared_adopted'] += 1
+        logger.debug("JWKS for realm %s adopted from shared cache", realm)
+        return entry
+
+    def _sync_shared(self, realm: str, force: bool = False) -> Optional[JwksEntry]:
+        """
+        Sync a realm with the shared backend
+
+        Args:
+            realm: Keycloak realm
+            force: Check the backend even within sync_interval of the last check
+
+        Returns:
+            Current JwksEntry of the realm or None
+        """
+        if not self._sync_due(realm, force):
+            return self._entries.get(realm)
+        return self._apply_shared(realm, self.backend.get('jwks:' + realm))
+
+    async def _async_sync_shared(self, realm: str, force: bool = False) -> Optional[JwksEntry]:
+        """Asyncio variant of _sync_shared(), reading the shared backend off the event loop"""
+        if not self._sync_due(realm, force):
+            return self._entries.get(realm)
+        return self._apply_shared(realm, await self.backend.aget('jwks:' + realm))
+
+    def _adopt(self, realm: str, jwks: Dict[str, Any], fetched_wall: float, expires_wall: float) -> JwksEntry:
+        """
+        Store a JWKS fetched elsewhere (another worker or a previous run), keeping its age and expiry
+
+        Args:
+            realm: Keycloak realm
+            jwks: JWKS document
+            fetched_wall: Wall clock time the document was fetched
+            expires_wall: Wall clock time the document expires
+
+        Returns:
+            The stored JwksEntry
+        """
+        now = time.monotonic()
+        wall = time.time()
+        with self._lock:
+            self._version += 1
+            entry = JwksEntry(
+                jwks=jwks,
+                kids=frozenset(key.get('kid') for key in jwks.get('keys', []) if key.get('kid')),
+                fetched_at=now - max(0.0, wall - fetched_wall),
+                expires_at=now + (expires_wall - wall),
+                version=self._version,
+                fetched_wall=fetched_wall
+            )
+            self._entries[realm] = entry
+        return entry
+
+    def load_snapshots(self) -> int:
+        """
+        Load the on-disk JWKS snapshots, used until a fresh fetch succeeds.
+        Snapshots still within their TTL are served as fresh, older ones only as stale keys.
+
+        Returns:
+            Number of realms loaded
+        """
+        if self.snapshots is None:
+            return 0
+        loaded = 0
+        for snapshot in self.snapshots.load_all():
+            realm = snapshot['realm']
+            current = self._entries.get(realm)
+            if current is not None and current.fetched_wall >= snapshot['fetched_at']:
+                continue
+            self._adopt(realm, snapshot['jwks'], snapshot['fetched_at'], snapshot['expires_at'])
+            loaded += 1
+        with self._lock:
+            self._stats['snapshots_loaded'] += loaded
+        if loaded:
+            logger.info("Loaded JWKS snapshots of %d realms from %s", loaded, self.snapshots.directory)
+        return loaded
+
+    @staticmethod
+    def _sync_forced(entry: Optional[JwksEntry], kid: Optional[str]) -> bool:
+        """Check if the shared backend must be checked right away: entry missing, expired or lacking kid"""
+        return entry is None or not entry.is_fresh() or bool(kid and kid not in entry.kids)
+
+    def _fresh(self, entry: Optional[JwksEntry]) -> Optional[JwksEntry]:
+        """Count a lookup and return the entry if still fresh"""
+        with self._lock:
+            if entry is not None and entry.is_fresh():
+                self._stats['hits'] += 1
+                return entry
+            self._stats['misses'] += 1
+        return None
+
+    def lookup(self, realm: str, kid: str = None) -> Optional[JwksEntry]:
+        """
+        Get the cached JWKS of a realm if still fresh
+
+        Args:
+            realm: Keycloak realm
+            kid: Key id the caller needs; when unknown the shared backend is checked right away (optional)
+
+        Returns:
+            JwksEntry or None if missing or expired
+        """
+        entry = self._entries.get(realm)
+        if self.backend is not None:
+            entry = self._sync_shared(realm, force=self._sync_forced(entry, kid))
+        return self._fresh(entry)
+
+    async def alookup(self, realm: str, kid: str = None) -> Optional[JwksEntry]:
+        """Asyncio variant of lookup(), reading the shared backend off the event loop"""
+        entry = self._entries.get(realm)
+        if self.backend is not None:
+            entry = await self._async_sync_shared(realm, force=self._sync_forced(entry, kid))
+        return self._fresh(entry)
+
+    def _cache(self, realm: str, jwks: Dict[str, Any], cache_control: str = None) -> Tuple[JwksEntry, float, int]:
+        """
+        Keep a freshly fetched JWKS in this worker
+
+        Returns:
+            The stored JwksEntry, the wall clock time it was fetched and its TTL
+        """
+        now = time.monotonic()
+        wall = time.time()
+        ttl = self._ttl_from_cache_control(cache_control)
+        kids = frozenset(key.get('kid') for key in jwks.get('keys', []) if key.get('kid'))
+        with self._lock:
+            self._version += 1
+            entry = JwksEntry(
+                jwks=jwks,
+                kids=kids,
+                fetched_at=now,
+                expires_at=now + ttl,
+                version=self._version,
+                fetched_wall=wall
+            )
+            self._entries[realm] = entry
+            self._stats['refreshes'] += 1
+        logger.debug("JWKS cached for realm %s: %d keys, ttl %ss", realm, len(kids), ttl)
+        return entry, wall, ttl
+
+    def _shared_document(self, jwks: Dict[str, Any], wall: float, ttl: int) -> Tuple[Dict[str, Any], float]:
+        """Document published to the other workers and its TTL: kept for max_staleness so they can also serve it stale"""
+        return {'jwks': jwks, 'fetched_at': wall, 'expires_at': wall + ttl}, max(ttl, self.max_staleness)
+
+    def store(self, realm: str, jwks: Dict[str, Any], cache_control: str = None) -> JwksEntry:
+        """
+        Store a freshly fetched JWKS for a realm
+
+        Args:
+            realm: Keycloak realm
+            jwks: JWKS document as returned by Keycloak
+            cache_control: Value of the Cache-Control response header
+
+        Returns:
+            The stored JwksEntry
+        """
+        entry, wall, ttl = self._cache(realm, jwks, cache_control)
+        if self.backend is not None:
+            self.backend.set('jwks:' + realm, *self._shared_document(jwks, wall, ttl))
+        if self.snapshots is not None:
+            self.snapshots.save(realm, jwks, wall, wall + ttl)
+        return entry
+
+    async def astore(self, realm: str, jwks: Dict[str, Any], cache_control: str = None) -> JwksEntry:
+        """Asyncio variant of store(), publishing to the shared backend and writing the snapshot off the event loop"""
+        entry, wall, ttl = self._cache(realm, jwks, cache_control)
+        if self.backend is not None:
+            await self.backend.aset('jwks:' + realm, *self._shared_document(jwks, wall, ttl))
+        if self.snapshots is not None:
+            await self.snapshots.asave(realm, jwks, wall, wall + ttl)
+        return entry
+
+    def stale(self, realm: str) -> Optional[JwksEntry]:
+        """
+        Get the last known JWKS of a realm, even if expired, within the staleness limit
+
+        Args:
+            realm: Keycloak realm
+
+        Returns:
+            JwksEntry or None if missing or older than max_staleness
+        """
+        entry = self._entries.get(realm)
+        if entry is None or time.monotonic() - entry.fetched_at > self.max_staleness:
+            return None
+        with self._lock:
+            self._stats['stale_served'] += 1
+        if self._stale_log_sampler.should_log(realm):
+            logger.warning(
+                "Keycloak unavailable, serving stale JWKS for realm %s (logged 1 of every %d times)",
+                realm, self._stale_log_sampler.every
+            )
+        return entry
+
+    def should_force_refresh(self, realm: str, kid: str) -> bool:
+        """
+        Check if an unknown kid justifies a forced refresh of the realm JWKS.
+        Forced refreshes are rate limited per realm so tokens with bogus kids
+        cannot be used to hammer Keycloak.
+
+        Args:
+            realm: Keycloak realm
+            kid: Key id taken from the token header
+
+        Returns:
+            True if a refresh should be done, False otherwise
+        """
+        entry = self._entries.get(realm)
+        if entry is not None and kid in entry.kids:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_forced_refresh.get(realm)
+            if last is not None and now - last < self.min_refresh_interval:
+                self._stats['forced_refreshes_throttled'] += 1
+                return False
+            self._last_forced_refresh[realm] = now
+            self._stats['forced_refreshes'] += 1
+        logger.info("Key id '%s' not in cached JWKS for realm %s, forcing refresh", kid, realm)
+        return True
+
+    def get(
+        self,
+        realm: str,
+        fetcher: Callable[[], Tuple[Dict[str, Any], Optional[str]]],
+        kid: str = None
+    ) -> JwksEntry:
+        """
+        Get the JWKS of a realm, fetching it when missing, expired or lacking the requested kid
+
+        Args:
+            realm: Keycloak realm
+            fetcher: Callable returning the JWKS document and its Cache-Control header
+            kid: Key id the caller needs (optional)
+
+        Returns:
+            JwksEntry for the realm
+        """
+        entry = self.lookup(realm, kid)
+        flight_key = ('jwks', realm)
+        if entry is None or (
+            kid and kid not in entry.kids
+            and (singleFlight.in_flight(flight_key) or self.should_force_refresh(realm, kid))
+        ):
+            # Concurrent callers share a single fetch of the realm JWKS
+            try:
+                entry = singleFlight.do(flight_key, lambda: self.store(realm, *fetcher()))
+            except Exception:
+                # Keycloak failing or circuit open: keep verifying with the last known keys
+                entry = self.stale(realm)
+                if entry is None:
+                    raise
+        return entry
+
+    async def aget(
+        self,
+        realm: str,
+        fetcher: Callable[[], Awaitable[Tuple[Dict[str, Any], Optional[str]]]],
+        kid: str = None
+    ) -> JwksEntry:
+        """
+        Asyncio variant of get() taking a coroutine function as fetcher
+
+        Args:
+            realm: Keycloak realm
+            fetcher: Coroutine function returning the JWKS document and its Cache-Control header
+            kid: Key id the caller needs (optional)
+
+        Returns:
+            JwksEntry for the realm
+        """
+        entry = await self.alookup(realm, kid)
+        flight_key = ('jwks', realm)
+        if entry is None or (
+            kid and kid not in entry.kids
+            and (asyncSingleFlight.in_flight(flight_key) or self.should_force_refresh(realm, kid))
+        ):
+            # Concurrent callers share a single fetch of the realm JWKS
+            async def fetch_and_store() -> JwksEntry:
+                return await self.astore(realm, *(await fetcher()))
+            try:
+                entry = await asyncSingleFlight.do(flight_key, fetch_and_store)
+            except Exception:
+                # Keycloak failing or circuit open: keep verifying with the last known keys
+                entry = self.stale(realm)
+                if entry is None:
+                    raise
+        return entry
+
+    def invalidate(self, realm: str = None):
+        """
+        Drop cached JWKS, in every worker when the backend is shared
+
+        Args:
+            realm: Realm to drop (all realms if not provided)
+        """
+        with self._lock:
+            realms = list(self._entries) if realm is None else [realm]
+            if realm is None:
+                self._entries.clear()
+                self._last_forced_refresh.clear()
+            else:
+                self._entries.pop(realm, None)
+                self._last_forced_refresh.pop(realm, None)
+        if self.snapshots is not None:
+            for name in realms:
+                self.snapshots.delete(name)
+        if self.backend is not None:
+            # Tombstone rather than delete, so other workers drop their own copy on next sync
+            for name in realms:
+                self.backend.set('jwks:' + name, {'invalidated_at': time.time()}, self.max_staleness)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hit/miss/refresh counters and cached realms
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['realms'] = sorted(self._entries.keys())
+        return stats
+
+#########################################
+##### Initialize JWKS cache instance #####
+#########################################
+jwksCache = JwksCache(
+    ttl=appSettings.jwks_cache_ttl,
+    max_ttl=appSettings.jwks_cache_max_ttl,
+    min_refresh_interval=appSettings.jwks_min_refresh_interval,
+    max_staleness=appSettings.jwks_max_staleness,
+    backend=sharedBackend,
+    snapshots=jwksSnapshots
+)
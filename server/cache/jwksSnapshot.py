@@ -0,0 +1,126 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, List
+from urllib.parse import quote, unquote
+from config.settings import appSettings
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('jwksSnapshot')
+
+_PREFIX = 'jwks-'
+_SUFFIX = '.json'
+
+class JwksSnapshotStore:
+    """
+    On-disk snapshots of realm JWKS documents, one file per realm, so a restarted
+    server can verify tokens before Keycloak answers again.
+    Files are replaced atomically and read back with a single read call.
+    """
+    def __init__(self, directory: str = 'logs', max_age: int = 86400):
+        """
+        Initialize the snapshot store
+
+        Args:
+            directory: Directory holding the snapshots
+            max_age: Maximum age (seconds) of a snapshot loaded at startup (0 disables snapshots)
+        """
+        self.directory = directory
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        """Check if snapshots are enabled"""
+        return self.max_age > 0
+
+    def _path(self, realm: str) -> str:
+        return os.path.join(self.directory, f"{_PREFIX}{quote(realm, safe='')}{_SUFFIX}")
+
+    def save(self, realm: str, jwks: Dict[str, Any], fetched_at: float, expires_at: float):
+        """
+        Write the snapshot of a realm JWKS
+
+        Args:
+            realm: Keycloak realm
+            jwks: JWKS document
+            fetched_at: Wall clock time the document was fetched
+            expires_at: Wall clock time the document expires
+        """
+        if not self.enabled:
+            return
+        path = self._path(realm)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        data = json.dumps(
+            {'realm': realm, 'fetched_at': fetched_at, 'expires_at': expires_at, 'jwks': jwks},
+            separators=(',', ':')
+        ).encode()
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("JWKS snapshot of realm %s not written: %s", realm, e)
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+    async def asave(self, realm: str, jwks: Dict[str, Any], fetched_at: float, expires_at: float):
+        """Asyncio variant of save(), writing the file in a worker thread (slow disks such as SD cards never stall the event loop)"""
+        if self.enabled:
+            await asyncio.to_thread(self.save, realm, jwks, fetched_at, expires_at)
+
+    def load_all(self) -> List[Dict[str, Any]]:
+        """
+        Read every snapshot not older than max_age
+
+        Returns:
+            List of snapshots with realm, fetched_at, expires_at and jwks
+        """
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        now = time.time()
+        snapshots = []
+        for name in os.listdir(self.directory):
+            if not (name.startswith(_PREFIX) and name.endswith(_SUFFIX)):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path, 'rb') as f:
+                    snapshot = json.loads(f.read())
+                realm = snapshot['realm']
+                age = now - snapshot['fetched_at']
+                snapshot['jwks']['keys']
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning("Ignoring unreadable JWKS snapshot %s: %s", name, e)
+                continue
+            if realm != unquote(name[len(_PREFIX):-len(_SUFFIX)]):
+                continue
+            if age > self.max_age:
+                logger.info("Ignoring JWKS snapshot of realm %s: %ds old", realm, age)
+                continue
+            snapshots.append(snapshot)
+        return snapshots
+
+    def delete(self, realm: str):
+        """
+        Drop the snapshot of a realm
+
+        Args:
+            realm: Keycloak realm
+        """
+        try:
+            os.unlink(self._path(realm))
+        except OSError:
+            pass
+
+############################################
+##### Initialize JWKS snapshot instance #####
+############################################
+jwksSnapshots = JwksSnapshotStore(
+    directory=appSettings.jwks_snapshot_dir,
+    max_age=appSettings.jwks_snapshot_max_age
+)
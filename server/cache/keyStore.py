@@ -0,0 +1,136 @@
+import base64
+import threading
+from typing import Dict, Any, Optional, Tuple
+from cryptography.hazmat.primitives.asymmetric import rsa # pyright: ignore[reportMissingImports]
+from cache.jwksCache import JwksEntry
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('keyStore')
+
+try:
+    # PyJWT >= 2.0 ships RSAAlgorithm when cryptography is installed
+    from jwt.algorithms import RSAAlgorithm # pyright: ignore[reportMissingImports]
+except ImportError:
+    RSAAlgorithm = None
+
+def _b64_to_int(data: str) -> int:
+    """Decode a base64url encoded big-endian integer"""
+    padding = 4 - len(data) % 4
+    if padding != 4:
+        data += '=' * padding
+    return int.from_bytes(base64.urlsafe_b64decode(data), 'big')
+
+def jwk_to_public_key(jwk: Dict[str, Any]) -> rsa.RSAPublicKey:
+    """
+    Convert an RSA JWK into a public key object usable by jwt.decode
+
+    Args:
+        jwk: JWK as published in a Keycloak JWKS
+
+    Returns:
+        RSA public key object
+
+    Raises:
+        ValueError: If the key type is not supported or the key is malformed
+    """
+    if jwk.get('kty') != 'RSA':
+        raise ValueError(f"Unsupported key type: {jwk.get('kty')}")
+    if RSAAlgorithm is not None:
+        return RSAAlgorithm.from_jwk(jwk)
+    # Manual conversion using cryptography
+    return rsa.RSAPublicNumbers(_b64_to_int(jwk['e']), _b64_to_int(jwk['n'])).public_key()
+
+class KeyStore:
+    """Public key objects converted once from JWKS and indexed by (realm, kid)"""
+    def __init__(self):
+        self._keys: Dict[Tuple[str, str], Any] = {}
+        self._jwks_by_realm: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'conversions': 0,
+            'conversion_errors': 0,
+            'evictions': 0,
+        }
+
+    def get_key(self, realm: str, entry: JwksEntry, kid: str) -> Optional[Any]:
+        """
+        Get the public key object for a kid, syncing the realm first if its JWKS changed
+
+        Args:
+            realm: Keycloak realm
+            entry: Current cached JWKS entry of the realm
+            kid: Key id taken from the token header
+
+        Returns:
+            Public key object or None if kid is not published by the realm
+        """
+        if self._versions.get(realm) != entry.version:
+            self.sync(realm, entry)
+        return self._keys.get((realm, kid))
+
+    def sync(self, realm: str, entry: JwksEntry):
+        """
+        Align the stored keys of a realm with its JWKS: convert new keys,
+        keep unchanged ones and evict keys no longer published
+
+        Args:
+            realm: Keycloak realm
+            entry: Cached JWKS entry of the realm
+        """
+        with self._lock:
+            if self._versions.get(realm) == entry.version:
+                return
+            previous = self._jwks_by_realm.get(realm, {})
+            current: Dict[str, Dict[str, Any]] = {}
+            for jwk in entry.jwks.get('keys', []):
+                kid = jwk.get('kid')
+                if not kid or jwk.get('kty') != 'RSA':
+                    continue
+                current[kid] = jwk
+                if previous.get(kid) == jwk and (realm, kid) in self._keys:
+                    continue
+                try:
+                    self._keys[(realm, kid)] = jwk_to_public_key(jwk)
+                    self._stats['conversions'] += 1
+                except Exception as e:
+                    self._stats['conversion_errors'] += 1
+                    current.pop(kid, None)
+                    logger.error("Failed to convert JWK '%s' of realm %s to public key: %s", kid, realm, e)
+            for kid in previous.keys() - current.keys():
+                self._keys.pop((realm, kid), None)
+                self._stats['evictions'] += 1
+                logger.info("Public key '%s' of realm %s evicted", kid, realm)
+            self._jwks_by_realm[realm] = current
+            self._versions[realm] = entry.version
+
+    def invalidate(self, realm: str = None):
+        """
+        Drop stored keys
+
+        Args:
+            realm: Realm to drop (all realms if not provided)
+        """
+        with self._lock:
+            realms = list(self._jwks_by_realm.keys()) if realm is None else [realm]
+            for name in realms:
+                for kid in self._jwks_by_realm.pop(name, {}):
+                    self._keys.pop((name, kid), None)
+                self._versions.pop(name, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get key store counters
+
+        Returns:
+            Dictionary with conversion/eviction counters and number of stored keys
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['keys'] = len(self._keys)
+        return stats
+
+########################################
+##### Initialize key store instance #####
+########################################
+keyStore = KeyStore()
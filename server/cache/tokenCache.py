@@ -0,0 +1,154 @@
+import hashlib
+import time
+from typing import Dict, Any, Optional
+from config.settings import appSettings
+from config.service_config_reader import serviceConfig
+from cache.cacheBackend import CacheBackend, MemoryBackend, sharedBackend
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('tokenCache')
+
+def token_digest(token: str, service: str = '') -> str:
+    """
+    Compute the cache key of a token, so raw tokens are never kept in memory as keys
+
+    Args:
+        token: Raw token
+        service: Name of the service the token is verified for
+
+    Returns:
+        Hex SHA-256 digest of service and token
+    """
+    return hashlib.sha256(f"{service}\0{token}".encode()).hexdigest()
+
+class TokenCache:
+    """
+    Cache of verified token claims, each entry expiring at the token 'exp'.
+    Entries live in a bounded in-process LRU, or in the shared backend when the server runs several workers.
+    Keys are scoped by the service configuration fingerprint: entries of a service whose
+    realm, client_id or secret changed on reload are no longer reachable and age out.
+    """
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024, max_ttl: int = 300,
+                 backend: CacheBackend = None):
+        """
+        Initialize the token cache
+
+        Args:
+            max_entries: Maximum number of cached tokens (0 disables the cache)
+            max_bytes: Maximum estimated size of cached claims in bytes
+            max_ttl: Upper bound (seconds) for how long a token stays cached
+            backend: Store of the entries (default: in-process LRU bounded by max_entries and max_bytes)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_ttl = max_ttl
+        self.backend = backend or MemoryBackend(max_entries=max_entries, max_bytes=max_bytes)
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        """Check if the cache is enabled"""
+        return self.max_entries > 0
+
+    def _key(self, token: str, service: str) -> str:
+        return 'token:' + token_digest(token, serviceConfig.cache_scope(service))
+
+    def _found(self, claims: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Count a lookup and copy the claims found"""
+        if claims is None:
+            self._stats['misses'] += 1
+            return None
+        self._stats['hits'] += 1
+        return dict(claims)
+
+    def _ttl(self, claims: Dict[str, Any]) -> float:
+        """Seconds claims stay cached: until the token 'exp', bounded by max_ttl"""
+        ttl = self.max_ttl
+        exp = claims.get('exp')
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        return ttl
+
+    def get(self, token: str, service: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached claims of a verified token
+
+        Args:
+            token: Raw token
+            service: Name of the service
+
+        Returns:
+            Dict with decoded token claims or None if not cached or expired
+        """
+        if not self.enabled:
+            return None
+        return self._found(self.backend.get(self._key(token, service)))
+
+    async def aget(self, token: str, service: str) -> Optional[Dict[str, Any]]:
+        """Asyncio variant of get(), not blocking the event loop on a shared backend"""
+        if not self.enabled:
+            return None
+        return self._found(await self.backend.aget(self._key(token, service)))
+
+    def put(self, token: str, service: str, claims: Dict[str, Any]):
+        """
+        Cache the claims of a verified token until its expiry (bounded by max_ttl)
+
+        Args:
+            token: Raw token
+            service: Name of the service
+            claims: Decoded token claims
+        """
+        if not self.enabled:
+            return
+        ttl = self._ttl(claims)
+        if ttl > 0:
+            self.backend.set(self._key(token, service), claims, ttl)
+
+    async def aput(self, token: str, service: str, claims: Dict[str, Any]):
+        """Asyncio variant of put(), not blocking the event loop on a shared backend"""
+        if not self.enabled:
+            return
+        ttl = self._ttl(claims)
+        if ttl > 0:
+            await self.backend.aset(self._key(token, service), claims, ttl)
+
+    def invalidate(self, token: str, service: str):
+        """
+        Drop a token from the cache (of every worker when the backend is shared)
+
+        Args:
+            token: Raw token
+            service: Name of the service
+        """
+        self.backend.delete(self._key(token, service))
+
+    def clear(self):
+        """Drop all cached tokens"""
+        self.backend.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters
+
+        Returns:
+            Dictionary with hit/miss counters, hit ratio and backend counters
+        """
+        stats = dict(self._stats)
+        stats.update(self.backend.get_stats())
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+##########################################
+##### Initialize token cache instance #####
+##########################################
+tokenCache = TokenCache(
+    max_entries=appSettings.token_cache_max_entries,
+    max_bytes=appSettings.token_cache_max_bytes,
+    max_ttl=appSettings.token_cache_max_ttl,
+    backend=sharedBackend
+)
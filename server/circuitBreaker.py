@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Dict, Any
+from config.settings import appSettings
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('circuitBreaker')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding upstream calls.
+    After failure_threshold consecutive failures the circuit opens and calls fail fast;
+    after reset_timeout a single probe call is let through to decide whether to close it again.
+    Every allowed call must end with record_success, record_failure or release.
+    """
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Initialize the circuit breaker
+
+        Args:
+            name: Name used in logs and health output
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a probe is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check if a call may go upstream
+
+        Returns:
+            True if the call is allowed, False if the circuit is open
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                logger.info("Circuit %s half open, probing upstream", self.name)
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            # A probe that never reported back (lost caller) is expired after reset_timeout
+            if self._probe_in_flight and now - self._probe_started >= self.reset_timeout:
+                logger.warning("Circuit %s probe expired without outcome, probing again", self.name)
+                self._probe_in_flight = False
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                self._probe_started = now
+                return True
+            return False
+
+    def release(self):
+        """
+        Release an allowed call that ended without outcome (cancelled, or failed before
+        reaching upstream), so the half-open probe is handed out again instead of being held forever
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def record_success(self):
+        """Record a successful upstream call"""
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("Circuit %s closed", self.name)
+            self.state = CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """Record a failed upstream call"""
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning("Circuit %s open after %d failures", self.name, self.failures)
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+    def retry_after(self) -> int:
+        """Seconds until the circuit lets a probe through"""
+        if self.state == CLOSED:
+            return 0
+        return max(1, int(self.reset_timeout - (time.monotonic() - self.opened_at) + 0.999))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the circuit state for health output"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_after': self.retry_after(),
+            }
+
+class CircuitBreakerRegistry:
+    """Circuit breakers keyed by name (one per Keycloak realm)"""
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """Get the breaker of a name, creating it on first use"""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(
+                    name,
+                    CircuitBreaker(name, self.failure_threshold, self.reset_timeout)
+                )
+        return breaker
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get the state of every breaker"""
+        return {name: breaker.snapshot() for name, breaker in list(self._breakers.items())}
+
+#########################################################
+##### Initialize circuit breaker registry instance #####
+#########################################################
+circuitBreakers = CircuitBreakerRegistry(
+    failure_threshold=appSettings.circuit_failure_threshold,
+    reset_timeout=appSettings.circuit_reset_timeout
+)
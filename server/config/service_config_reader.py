@@ -1,26 +1,74 @@
+import asyncio
+import hashlib
 import json
 import os
-from typing import Dict, Any
-from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, Any, Callable, List, Mapping, Optional, Set, Tuple
+from dataclasses import dataclass, field
 # Initialize logger at the top so it's available everywhere 
 from logger.loggerFactory import logger_factory
 logger = logger_factory.get_logger('service_config_reader')
 
-class ServiceConfigReader(Exception):
+class ConfigError(Exception):
     """Custom exception for configuration errors"""
     pass
 
-@dataclass
+@dataclass(frozen=True)
 class ServiceConfig:
     """Dataclass representing a service configuration"""
     realm: str
     client_id: str
     client_secret: str
+    # Digest of realm, client_id and secret, scoping cached entries to this configuration
+    fingerprint: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        digest = hashlib.sha256(f"{self.realm}\0{self.client_id}\0{self.client_secret}".encode()).hexdigest()[:16]
+        object.__setattr__(self, 'fingerprint', digest)
     
     def __repr__(self):
         """Safe representation that doesn't expose client_secret"""
         return f"ServiceConfig(realm={self.realm}, client_id={self.client_id}, client_secret={'***'})"
 
+@dataclass(frozen=True)
+class ServiceIndex:
+    """Service names by realm and by (realm, client_id), built once per configuration for O(1) token lookups"""
+    by_realm: Mapping[str, Tuple[str, ...]]
+    by_client: Mapping[Tuple[str, str], Tuple[str, ...]]
+
+def build_index(services: Mapping[str, ServiceConfig]) -> ServiceIndex:
+    """
+    Index service configurations by realm and client_id
+    
+    Args:
+        services: Service configurations by service name
+        
+    Returns:
+        Immutable index, service names in configuration order
+    """
+    by_realm: Dict[str, List[str]] = {}
+    by_client: Dict[Tuple[str, str], List[str]] = {}
+    for name, service in services.items():
+        by_realm.setdefault(service.realm, []).append(name)
+        by_client.setdefault((service.realm, service.client_id), []).append(name)
+    return ServiceIndex(
+        by_realm=MappingProxyType({realm: tuple(names) for realm, names in by_realm.items()}),
+        by_client=MappingProxyType({key: tuple(names) for key, names in by_client.items()})
+    )
+
+def realm_from_issuer(issuer: str) -> Optional[str]:
+    """
+    Get the realm of a Keycloak issuer URL (iss claim), e.g. https://sso.example.com/realms/demo -> demo
+    
+    Args:
+        issuer: Issuer URL
+        
+    Returns:
+        Realm name, None if the URL is not a Keycloak realm issuer
+    """
+    head, separator, realm = (issuer or '').rstrip('/').rpartition('/realms/')
+    return realm if separator and realm and '/' not in realm else None
+
 class ServiceConfigReader:
     """Read and manage service configuration from JSON file"""
     def __init__(self, config_file: str = 'config/service_config.json'):
@@ -34,13 +82,40 @@ class ServiceConfigReader:
             ConfigError: If configuration file is not found or invalid
         """
         self.config_file = config_file
-        self.config: Dict[str, ServiceConfig] = {}
+        # Immutable mapping, replaced as a whole on reload so readers never see a partial configuration
+        self.config: Mapping[str, ServiceConfig] = MappingProxyType({})
+        self.index: ServiceIndex = build_index(self.config)
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._listeners: List[Callable[[Set[str]], None]] = []
         self._load_config()
     
     def _load_config(self):
         """
         Load configuration from JSON file
         
+        Raises:
+            ConfigError: If file doesn't exist or JSON is invalid
+        """
+        self._signature = self._file_signature()
+        self.config = MappingProxyType(self._read_config())
+        self.index = build_index(self.config)
+        logger.info(f"  Services: {list(self.config.keys())}")
+
+    def _file_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Modification time, size and inode of the configuration file, None if it doesn't exist"""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _read_config(self) -> Dict[str, ServiceConfig]:
+        """
+        Read and parse the configuration file into a new mapping, without touching the current one
+        
+        Returns:
+            Service configurations by service name
+            
         Raises:
             ConfigError: If file doesn't exist or JSON is invalid
         """
@@ -48,29 +123,34 @@ class ServiceConfigReader:
         
         # Check if file exists
         if not os.path.exists(self.config_file):
-            raise ServiceConfigReader(f"Configuration file not found: {self.config_file}")
+            raise ConfigError(f"Configuration file not found: {self.config_file}")
         
         try:
             with open(self.config_file, 'r') as f:
                 config_data = json.load(f)
             
             # Validate and parse configuration
-            self._parse_config(config_data)
+            services = self._parse_config(config_data)
             logger.info(f"Service configuration loaded successfully.")
-            logger.info(f"  Services: {list(self.config.keys())}")
+            return services
             
         except json.JSONDecodeError as e:
-            raise ServiceConfigReader(f"Invalid JSON in configuration file: {str(e)}")
+            raise ConfigError(f"Invalid JSON in configuration file: {str(e)}")
+        except ConfigError:
+            raise
         except Exception as e:
-            raise ServiceConfigReader(f"Failed to load configuration: {str(e)}")
+            raise ConfigError(f"Failed to load configuration: {str(e)}")
     
-    def _parse_config(self, config_data: Dict[str, Any]):
+    def _parse_config(self, config_data: Dict[str, Any]) -> Dict[str, ServiceConfig]:
         """
         Parse configuration data and validate structure
         
         Args:
             config_data: Raw configuration data from JSON
             
+        Returns:
+            Service configurations by service name
+            
         Raises:
             ConfigError: If configuration structure is invalid
         """
@@ -78,16 +158,17 @@ class ServiceConfigReader:
             raise ConfigError("Configuration must be a JSON object")
         
         if 'services' not in config_data:
-            raise ServiceConfigReader("Configuration must contain 'services' field")
+            raise ConfigError("Configuration must contain 'services' field")
         
         services = config_data.get('services', {})
         
         if not isinstance(services, dict):
-            raise ServiceConfigReader("'services' field must be a JSON object")
+            raise ConfigError("'services' field must be a JSON object")
         
+        parsed: Dict[str, ServiceConfig] = {}
         if not services:
             logger.info("No services configured in configuration file")
-            return
+            return parsed
         
         # Parse each service
         for service_name, service_config in services.items():
@@ -96,16 +177,17 @@ class ServiceConfigReader:
                 srv_client_id=service_config['client_id']
                 srv_client_secret=service_config['client_secret']
                 # Create ServiceConfig object
-                self.config[service_name] = ServiceConfig(
+                parsed[service_name] = ServiceConfig(
                     realm=service_config['realm'],
                     client_id=srv_client_id,
                     client_secret=srv_client_secret
                 )
                 logger.info(f"Loaded service configuration: {service_name}")
                 
-            except ServiceConfigReader as e:
+            except ConfigError as e:
                 logger.error(f"Invalid configuration for service '{service_name}': {str(e)}")
                 raise
+        return parsed
     
     def _validate_service_config(self, service_name: str, service_config: Any):
         """
@@ -119,19 +201,19 @@ class ServiceConfigReader:
             ConfigError: If configuration is invalid
         """
         if not isinstance(service_config, dict):
-            raise ServiceConfigReader(f"Service '{service_name}' configuration must be a JSON object")
+            raise ConfigError(f"Service '{service_name}' configuration must be a JSON object")
         
         required_fields = ['realm', 'client_id']
         
         for field in required_fields:
             if field not in service_config:
-                raise ServiceConfigReader(f"Service '{service_name}' is missing required field: '{field}'")
+                raise ConfigError(f"Service '{service_name}' is missing required field: '{field}'")
             
             if not isinstance(service_config[field], str):
-                raise ServiceConfigReader(f"Service '{service_name}' field '{field}' must be a string")
+                raise ConfigError(f"Service '{service_name}' field '{field}' must be a string")
             
             if not service_config[field].strip():
-                raise ServiceConfigReader(f"Service '{service_name}' field '{field}' cannot be empty")
+                raise ConfigError(f"Service '{service_name}' field '{field}' cannot be empty")
     
     def get_service(self, service_name: str) -> ServiceConfig:
         """
@@ -146,14 +228,15 @@ class ServiceConfigReader:
         Raises:
             ConfigError: If service not found
         """
-        if service_name not in self.config:
+        service = self.config.get(service_name)
+        if service is None:
             available_services = list(self.config.keys())
-            raise ServiceConfigReader(
+            raise ConfigError(
                 f"Service '{service_name}' not found in configuration. "
                 f"Available services: {available_services}"
             )
         
-        return self.config[service_name]
+        return service
     
     def get_all_services(self) -> Dict[str, ServiceConfig]:
         """
@@ -162,7 +245,7 @@ class ServiceConfigReader:
         Returns:
             Dictionary of all service configurations
         """
-        return self.config.copy()
+        return dict(self.config)
     
     def service_exists(self, service_name: str) -> bool:
         """
@@ -185,16 +268,141 @@ class ServiceConfigReader:
         """
         return list(self.config.keys())
     
-    def reload_config(self):
+    def find_services(self, realm: str, client_id: str = None) -> Tuple[str, ...]:
         """
-        Reload configuration from file
+        Get the services of a realm, or of a realm and client_id, in O(1)
+        
+        Args:
+            realm: Realm name
+            client_id: Client id (all services of the realm if not provided)
+            
+        Returns:
+            Service names, empty if none is configured
+        """
+        index = self.index
+        if client_id is None:
+            return index.by_realm.get(realm, ())
+        return index.by_client.get((realm, client_id), ())
+
+    def resolve_service(self, issuer: str, client_id: str) -> Optional[str]:
+        """
+        Find the service of a token from its issuer (iss) and authorized party (azp) claims.
+        Services sharing a realm and client_id verify tokens the same way, the first configured one is returned.
+        
+        Args:
+            issuer: Issuer URL of the token
+            client_id: Client the token was issued to
+            
+        Returns:
+            Service name, None if no service is configured for the issuer realm and client
+        """
+        realm = realm_from_issuer(issuer)
+        if realm is None or not client_id:
+            return None
+        services = self.find_services(realm, client_id)
+        return services[0] if services else None
+
+    def cache_scope(self, service_name: str) -> str:
+        """
+        Get the name under which entries of a service are cached: the service name and its
+        configuration fingerprint, so entries cached under a previous realm, client_id or secret
+        are never served after a reload (in any worker) while unchanged services keep theirs
+        
+        Args:
+            service_name: Name of the service
+            
+        Returns:
+            Cache scope of the service
+        """
+        service = self.config.get(service_name)
+        return service_name if service is None else f"{service_name}\0{service.fingerprint}"
+
+    def add_listener(self, listener: Callable[[Set[str]], None]):
+        """
+        Register a callable notified after each reload with the names of the services
+        added, removed or whose realm, client_id or secret changed
+        """
+        self._listeners.append(listener)
+
+    def _swap(self, services: Dict[str, ServiceConfig]) -> Set[str]:
+        """
+        Atomically replace the current configuration and notify listeners of the changed services
+        
+        Args:
+            services: New service configurations
+            
+        Returns:
+            Names of the services added, removed or changed
+        """
+        current = self.config
+        changed = {name for name in current.keys() | services.keys() if current.get(name) != services.get(name)}
+        # The index is replaced right after the mapping: a lookup racing a reload may name
+        # a service that was just removed, which then fails like any unknown service
+        self.config = MappingProxyType(services)
+        self.index = build_index(self.config)
+        if not changed:
+            logger.info("Service configuration reloaded, no service changed")
+            return changed
+        logger.info(
+            f"Service configuration reloaded: added {sorted(services.keys() - current.keys())}, "
+            f"removed {sorted(current.keys() - services.keys())}, "
+            f"changed {sorted(name for name in changed if name in current and name in services)}"
+        )
+        for listener in self._listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Service configuration listener failed: {str(e)}")
+        return changed
+
+    def reload_config(self) -> Set[str]:
+        """
+        Reload configuration from file. The new configuration is parsed first and swapped in
+        as a whole, so concurrent lookups see either the previous or the new configuration.
+        
+        Returns:
+            Names of the services added, removed or changed
         
         Raises:
-            ConfigError: If configuration file is invalid
+            ConfigError: If configuration file is invalid (the current configuration is kept)
         """
         logger.info("Reloading configuration...")
-        self.config.clear()
-        self._load_config()
+        self._signature = self._file_signature()
+        return self._swap(self._read_config())
+
+    def _read_if_changed(self) -> Optional[Dict[str, ServiceConfig]]:
+        """
+        Parse the configuration file if it changed since it was last read
+        
+        Returns:
+            New service configurations, None if the file did not change
+            
+        Raises:
+            ConfigError: If the changed file is invalid (reported once per change)
+        """
+        signature = self._file_signature()
+        if signature is None or signature == self._signature:
+            return None
+        self._signature = signature
+        return self._read_config()
+
+    async def watch(self, interval: float = 5.0):
+        """
+        Poll the configuration file modification time and reload it when it changes.
+        Files are read and parsed in a worker thread, off the request path. Runs until cancelled.
+        
+        Args:
+            interval: Seconds between checks
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                services = await asyncio.to_thread(self._read_if_changed)
+            except ConfigError as e:
+                logger.error(f"Service configuration not reloaded, keeping the current one: {str(e)}")
+                continue
+            if services is not None:
+                self._swap(services)
     
     def __repr__(self):
         """String representation of ConfigReader"""
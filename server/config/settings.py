@@ -1,63 +1,170 @@
 import os
-from typing import Any
-from dotenv import load_dotenv # pyright: ignore[reportMissingImports]
+from dataclasses import dataclass, field, fields
+from typing import Any, Optional, Tuple
 # Initialize logger at the top so it's available everywhere 
-from logger.loggerFactory import logger_factory
+from logger.loggerFactory import logger_factory, log_sampler, LogSampler
 logger = logger_factory.get_logger('settings')
 
-class Settings():
-    """Read and manage configuration from .env file"""
-    def __init__(self):
-        """
-        Initialize settings by loading .env file
-        """
-        self._load_env()
-    
-    def _load_env(self):
-        """
-        Load configuration from .env file
-        """
-        # Load environment from .env file
-        logger.info(f"Loading environment from .env file ...")
-        load_dotenv()
-        logger.info(f"Configuration loaded successfully.")
-        logger.info(f"  KEYCLOAK_SERVER_URL: {os.getenv('KEYCLOAK_SERVER_URL')}")
-        logger.info(f"  ENFORCE_HTTPS: {os.getenv('ENFORCE_HTTPS')}")
-        logger.info(f"  ALLOWED_HOSTS: {os.getenv('ALLOWED_HOSTS')}")
-        
-    def get(self, key: str) -> Any:
+# Accepted boolean spellings (case insensitive)
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+FALSE_VALUES = ('false', '0', 'no', 'off')
+
+class SettingsError(Exception):
+    """Custom exception for invalid configuration values"""
+    pass
+
+def _env(name: str, default: Any = None, minimum: float = None, maximum: float = None,
+         positive: bool = False, choices: Tuple[str, ...] = None, required: bool = False, secret: bool = False):
+    """Declare an AppSettings field read from environment variable name"""
+    return field(default=default, repr=not secret, metadata={
+        'env': name, 'minimum': minimum, 'maximum': maximum, 'positive': positive,
+        'choices': choices, 'required': required
+    })
+
+@dataclass(frozen=True)
+class AppSettings:
+    """
+    Typed, immutable snapshot of the configuration, parsed and validated once at startup.
+    Modules read plain attributes (e.g. appSettings.token_cache_max_ttl) instead of looking up the environment.
+    """
+    # Application and server
+    app_name: Optional[str] = _env('APP_NAME')
+    api_host: str = _env('API_HOST', '0.0.0.0')
+    api_port: int = _env('API_PORT', 8000, minimum=1, maximum=65535)
+    api_port_secure: int = _env('API_PORT_SECURE', 8443, minimum=1, maximum=65535)
+    api_workers: int = _env('API_WORKERS', 1, minimum=1)
+    ssl_keyfile: Optional[str] = _env('SSL_KEYFILE')
+    ssl_certfile: Optional[str] = _env('SSL_CERTFILE')
+    enforce_https: bool = _env('ENFORCE_HTTPS', False)
+    allowed_hosts: Tuple[str, ...] = _env('ALLOWED_HOSTS', required=True)
+    fast_responses: bool = _env('FAST_RESPONSES', False)
+    service_config_poll_interval: float = _env('SERVICE_CONFIG_POLL_INTERVAL', 5.0, minimum=0)
+    # Keycloak
+    keycloak_server_url: Optional[str] = _env('KEYCLOAK_SERVER_URL')
+    keycloak_max_connections: int = _env('KEYCLOAK_MAX_CONNECTIONS', 100, minimum=1)
+    keycloak_max_keepalive_connections: int = _env('KEYCLOAK_MAX_KEEPALIVE_CONNECTIONS', 20, minimum=0)
+    keycloak_pool_connections: int = _env('KEYCLOAK_POOL_CONNECTIONS', 10, minimum=1)
+    keycloak_pool_maxsize: int = _env('KEYCLOAK_POOL_MAXSIZE', 20, minimum=1)
+    keycloak_connect_timeout: float = _env('KEYCLOAK_CONNECT_TIMEOUT', 3.05, positive=True)
+    keycloak_read_timeout: float = _env('KEYCLOAK_READ_TIMEOUT', 10.0, positive=True)
+    keycloak_max_retries: int = _env('KEYCLOAK_MAX_RETRIES', 2, minimum=0)
+    keycloak_backoff_factor: float = _env('KEYCLOAK_BACKOFF_FACTOR', 0.2, minimum=0)
+    keycloak_backoff_max: float = _env('KEYCLOAK_BACKOFF_MAX', 2.0, minimum=0)
+    service_token_refresh_fraction: float = _env('SERVICE_TOKEN_REFRESH_FRACTION', 0.8, positive=True, maximum=1)
+    circuit_failure_threshold: int = _env('CIRCUIT_FAILURE_THRESHOLD', 5, minimum=1)
+    circuit_reset_timeout: float = _env('CIRCUIT_RESET_TIMEOUT', 30.0, positive=True)
+    # JWKS cache
+    jwks_cache_ttl: int = _env('JWKS_CACHE_TTL', 300, minimum=0)
+    jwks_cache_max_ttl: int = _env('JWKS_CACHE_MAX_TTL', 3600, minimum=0)
+    jwks_min_refresh_interval: int = _env('JWKS_MIN_REFRESH_INTERVAL', 10, minimum=0)
+    jwks_max_staleness: int = _env('JWKS_MAX_STALENESS', 86400, minimum=0)
+    jwks_snapshot_dir: str = _env('JWKS_SNAPSHOT_DIR', 'logs')
+    jwks_snapshot_max_age: int = _env('JWKS_SNAPSHOT_MAX_AGE', 86400, minimum=0)
+    jwks_publish_max_age: int = _env('JWKS_PUBLISH_MAX_AGE', 300, minimum=0)
+    # Token and introspection caches
+    token_cache_max_entries: int = _env('TOKEN_CACHE_MAX_ENTRIES', 10000, minimum=0)
+    token_cache_max_bytes: int = _env('TOKEN_CACHE_MAX_BYTES', 16 * 1024 * 1024, minimum=0)
+    token_cache_max_ttl: int = _env('TOKEN_CACHE_MAX_TTL', 300, minimum=0)
+    introspection_cache_active_ttl: int = _env('INTROSPECTION_CACHE_ACTIVE_TTL', 30, minimum=0)
+    introspection_cache_inactive_ttl: int = _env('INTROSPECTION_CACHE_INACTIVE_TTL', 5, minimum=0)
+    introspection_cache_max_entries: int = _env('INTROSPECTION_CACHE_MAX_ENTRIES', 10000, minimum=0)
+    # Shared cache backend (None: memory, or shm with several workers)
+    cache_backend: Optional[str] = _env('CACHE_BACKEND', choices=('memory', 'shm', 'redis'))
+    cache_shm_dir: Optional[str] = _env('CACHE_SHM_DIR')
+    cache_shm_max_entries: int = _env('CACHE_SHM_MAX_ENTRIES', 50000, minimum=1)
+    cache_redis_url: str = _env('CACHE_REDIS_URL', 'redis://127.0.0.1:6379/0')
+    cache_key_prefix: str = _env('CACHE_KEY_PREFIX', 'windfire-security:')
+    # Batch verification
+    verify_batch_max_items: int = _env('VERIFY_BATCH_MAX_ITEMS', 100, minimum=1)
+    verify_batch_concurrency: int = _env('VERIFY_BATCH_CONCURRENCY', 8, minimum=1)
+    # Forward-auth (reverse proxy auth_request / forwardAuth)
+    forward_auth_max_age: int = _env('FORWARD_AUTH_MAX_AGE', 60, minimum=0)
+    forward_auth_service_header: str = _env('FORWARD_AUTH_SERVICE_HEADER', 'X-Forward-Auth-Service')
+    forward_auth_resolve_service: bool = _env('FORWARD_AUTH_RESOLVE_SERVICE', False)
+    forward_auth_claim_headers: str = _env(
+        'FORWARD_AUTH_CLAIM_HEADERS',
+        'sub=X-Auth-Subject,preferred_username=X-Auth-User,email=X-Auth-Email,realm_access.roles=X-Auth-Roles'
+    )
+    # Logging pipeline (read by the logger factory when the first logger is created, validated here)
+    log_format: str = _env('LOG_FORMAT', 'text', choices=('text', 'json'))
+    log_stream: bool = _env('LOG_STREAM', False)
+    log_queue_size: int = _env('LOG_QUEUE_SIZE', 10000, minimum=1)
+    log_batch_size: int = _env('LOG_BATCH_SIZE', 256, minimum=1)
+    log_sample_every: int = _env('LOG_SAMPLE_EVERY', 1, minimum=1)
+    log_sample_routes: str = _env('LOG_SAMPLE_ROUTES', '')
+    # Metrics and Server-Timing
+    metrics_loop_lag_interval: float = _env('METRICS_LOOP_LAG_INTERVAL', 0.5, positive=True)
+    server_timing_enabled: bool = _env('SERVER_TIMING_ENABLED', False)
+    server_timing_token: Optional[str] = _env('SERVER_TIMING_TOKEN', secret=True)
+    server_timing_request_header: str = _env('SERVER_TIMING_REQUEST_HEADER', 'x-server-timing')
+
+    @staticmethod
+    def _parse(kind: Any, raw: str) -> Any:
+        """Parse a raw environment value into the type of a field"""
+        if kind is bool:
+            normalized = raw.lower()
+            if normalized not in TRUE_VALUES + FALSE_VALUES:
+                raise ValueError(f"expected one of {', '.join(TRUE_VALUES + FALSE_VALUES)}")
+            return normalized in TRUE_VALUES
+        if kind is int:
+            return int(raw)
+        if kind is float:
+            return float(raw)
+        if kind == Tuple[str, ...]:
+            return tuple(item.strip() for item in raw.split(',') if item.strip())
+        return raw
+
+    @classmethod
+    def from_env(cls) -> 'AppSettings':
         """
-        Get an environment variable value by key.
+        Build the settings snapshot from the environment (.env already loaded)
         
-        Args:
-            key: Environment variable name
-            
         Returns:
-            The value of the environment variable or None if not set
+            The validated settings
+            
+        Raises:
+            SettingsError: If a value is missing, malformed or out of range (all problems are reported at once)
         """
-        if key in 'ENFORCE_HTTPS':
-            value = None
-            raw = os.getenv(key)
-            if isinstance(raw, str):
-                normalized = raw.strip().lower()
-                value = normalized in ('true', '1', 'yes', 'on')
-            else:
-                value = bool(raw)
-            return value
-        
-        if key in 'API_PORT' or key in 'API_PORT_SECURE':
-            raw = os.getenv(key)
-            if raw is None or raw.strip() == '':
-                return None
+        values = {}
+        errors = []
+        for spec in fields(cls):
+            meta = spec.metadata
+            name = meta['env']
+            raw = (os.getenv(name) or '').strip()
+            if raw == '':
+                if meta['required']:
+                    errors.append(f"{name} is required")
+                continue
             try:
-                return int(raw.strip())
-            except (ValueError, TypeError):
-                print(f"Invalid integer for {key}: {raw}")
-            return None
-        
-        return os.getenv(key)
+                value = cls._parse(spec.type, raw)
+            except ValueError as e:
+                errors.append(f"{name}={raw!r} is invalid: {str(e)}")
+                continue
+            if meta['choices'] is not None:
+                value = value.lower()
+                if value not in meta['choices']:
+                    errors.append(f"{name}={raw!r} must be one of {', '.join(meta['choices'])}")
+            if meta['positive'] and value <= 0:
+                errors.append(f"{name}={raw!r} must be greater than 0")
+            if meta['minimum'] is not None and value < meta['minimum']:
+                errors.append(f"{name}={raw!r} must be at least {meta['minimum']}")
+            if meta['maximum'] is not None and value > meta['maximum']:
+                errors.append(f"{name}={raw!r} must be at most {meta['maximum']}")
+            values[spec.name] = value
+        if errors:
+            for error in errors:
+                logger.error(f"Invalid configuration: {error}")
+            raise SettingsError("Invalid configuration: " + "; ".join(errors))
+        return cls(**values)
 
 ####################################################
 ##### Initialize configuration reader instance #####
 ####################################################
-settings = Settings()
\ No newline at end of file
+# The .env file is loaded by the logger factory, imported first
+# Parsed once: fails fast at startup on a missing or bad value
+appSettings = AppSettings.from_env()
+# LOG_SAMPLE_EVERY applies to all routes, LOG_SAMPLE_ROUTES overrides it per route
+try:
+    log_sampler.configure(appSettings.log_sample_every, LogSampler.parse_routes(appSettings.log_sample_routes))
+except ValueError as e:
+    raise SettingsError(f"Invalid LOG_SAMPLE_ROUTES entry: {str(e)}")
@@ -0,0 +1,76 @@
+import json
+import time
+from typing import Any
+from fastapi.responses import JSONResponse, Response # pyright: ignore[reportMissingImports]
+from config.settings import appSettings
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('fastResponses')
+
+try:
+    import orjson # pyright: ignore[reportMissingImports]
+except ImportError:
+    orjson = None
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (same compact output as JSONResponse, several times faster)"""
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+def json_bytes(content: Any) -> bytes:
+    """
+    Encode content the way the default response class of the app does
+
+    Args:
+        content: JSON serializable content
+
+    Returns:
+        Compact UTF-8 JSON
+    """
+    if DEFAULT_RESPONSE_CLASS is ORJSONResponse:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def json_response(body: bytes, status_code: int = 200) -> Response:
+    """
+    Wrap an already encoded JSON body, skipping serialization and response model validation
+
+    Args:
+        body: Encoded JSON
+        status_code: HTTP status code
+
+    Returns:
+        Response sending body as is
+    """
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+# Second of the last formatted timestamp and its formatted date and time
+_timestamp_second = None
+_timestamp_prefix = ""
+
+def utc_timestamp() -> str:
+    """
+    Current UTC time in ISO 8601 format, like datetime.now(UTC).isoformat().
+    The date and time part is formatted once per second, only microseconds are formatted on each call.
+
+    Returns:
+        Timestamp, e.g. 2025-01-31T12:00:00.123456+00:00
+    """
+    global _timestamp_second, _timestamp_prefix
+    now = time.time()
+    second = int(now)
+    if second != _timestamp_second:
+        _timestamp_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _timestamp_second = second
+    return f"{_timestamp_prefix}.{int((now - second) * 1e6):06d}+00:00"
+
+##################################################
+##### Initialize fast response configuration #####
+##################################################
+# Opt-in: orjson as the default response class (falls back to JSONResponse when orjson is not installed)
+FAST_RESPONSES = appSettings.fast_responses
+if FAST_RESPONSES and orjson is None:
+    logger.warning("FAST_RESPONSES enabled but orjson is not installed, using the standard JSON encoder")
+DEFAULT_RESPONSE_CLASS = ORJSONResponse if FAST_RESPONSES and orjson is not None else JSONResponse
+# Constant response bodies, encoded once
+VALID_TOKEN_BODY = json_bytes({"status": "valid"})
@@ -0,0 +1,115 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+from config.settings import appSettings, SettingsError
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('forwardAuth')
+
+def parse_claim_headers(value: str) -> Tuple[Tuple[Tuple[str, ...], str], ...]:
+    """
+    Parse the claims forwarded to upstreams, e.g. "sub=X-Auth-Subject,realm_access.roles=X-Auth-Roles"
+
+    Args:
+        value: Comma separated claim=header pairs, nested claims as dotted paths
+
+    Returns:
+        Tuple of (claim path, header name) pairs
+
+    Raises:
+        SettingsError: If a pair is malformed
+    """
+    pairs = []
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        claim, separator, header = item.partition('=')
+        if not separator or not claim.strip() or not header.strip():
+            raise SettingsError(f"Invalid FORWARD_AUTH_CLAIM_HEADERS entry: {item.strip()!r}, expected claim=header")
+        pairs.append((tuple(claim.strip().split('.')), header.strip().lower()))
+    return tuple(pairs)
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """Get the token of an 'Authorization: Bearer <token>' header value, None if missing or another scheme"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(' ')
+    token = token.strip()
+    return token if scheme.lower() == 'bearer' and token else None
+
+def token_targets_client(claims: Dict[str, Any], client_id: str) -> bool:
+    """
+    Check that a verified token was issued to or for a client: its authorized party (azp)
+    or one of its audiences (aud) is the client_id. Signature verification alone accepts
+    tokens of every client of the realm.
+
+    Args:
+        claims: Verified token claims
+        client_id: Client id of the target service
+
+    Returns:
+        True if the token targets the client
+    """
+    if claims.get('azp') == client_id:
+        return True
+    audience = claims.get('aud')
+    if isinstance(audience, str):
+        return audience == client_id
+    return isinstance(audience, (list, tuple)) and client_id in audience
+
+def _header_value(value: Any) -> str:
+    """Render a claim as a header value: lists comma joined, no line breaks, non ASCII text percent-encoded"""
+    if isinstance(value, (list, tuple)):
+        value = ','.join(str(item) for item in value)
+    value = str(value).replace('\r', ' ').replace('\n', ' ')
+    return value if value.isascii() else quote(value, safe=" !#$&'()*+,-./:;<=>?@[]^_`{|}~")
+
+def claim_headers(claims: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Build the response headers forwarded to upstreams from verified token claims
+
+    Args:
+        claims: Verified token claims
+
+    Returns:
+        Header name to value, claims missing from the token are skipped
+    """
+    headers = {}
+    for path, header in FORWARD_AUTH_CLAIM_HEADERS:
+        value = claims
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+            if value is None:
+                break
+        if value is not None:
+            headers[header] = _header_value(value)
+    return headers
+
+def cache_control(claims: Dict[str, Any]) -> str:
+    """
+    Cache-Control of an allow decision: cacheable by the proxy for at most FORWARD_AUTH_MAX_AGE
+    seconds and never past the token expiry
+
+    Args:
+        claims: Verified token claims
+
+    Returns:
+        Cache-Control header value
+    """
+    remaining = int(claims.get('exp', 0) - time.time())
+    max_age = max(0, min(FORWARD_AUTH_MAX_AGE, remaining))
+    return f"max-age={max_age}" if max_age > 0 else "no-cache"
+
+#############################################
+##### Initialize forward-auth settings #####
+#############################################
+# Upper bound (seconds) of the time a proxy may reuse an allow decision
+FORWARD_AUTH_MAX_AGE = appSettings.forward_auth_max_age
+# Request header naming the target service when it is not in the path: the proxy must set it
+# (and drop any value sent by the client), like the service in the path it is trusted as is
+FORWARD_AUTH_SERVICE_HEADER = appSettings.forward_auth_service_header.lower()
+# Opt-in: without a service, resolve it from the token issuer and azp (any client of a configured realm is then allowed)
+FORWARD_AUTH_RESOLVE_SERVICE = appSettings.forward_auth_resolve_service
+FORWARD_AUTH_CLAIM_HEADERS = parse_claim_headers(appSettings.forward_auth_claim_headers)
+# Denials are never cached, so a refreshed token is accepted immediately
+DENY_HEADERS = {"cache-control": "no-store", "www-authenticate": "Bearer", "vary": "Authorization"}
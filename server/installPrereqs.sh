@@ -12,11 +12,21 @@ installPythonModules()
                 pydantic==2.5.0 \
                 PyJWT==2.8.0 \
                 requests==2.32.5 \
+                "urllib3>=2,<3" \
+                httpx==0.28.1 \
                 cryptography==41.0.0
 }
 
+# ===== INSTALL OPTIONAL PYTHON MODULES FUNCTION =====
+installOptionalPythonModules()
+{
+    # orjson is used as JSON encoder when FAST_RESPONSES=true
+    pip3 install --upgrade orjson==3.9.10 || echo "orjson not installed, FAST_RESPONSES will use the standard JSON encoder"
+}
+
 # ===== EXECUTION =====
 echo "Installing Python prerequisites..."
 installPythonModules
+installOptionalPythonModules
 echo -e "${GREEN}Python prerequisites installation complete.${RESET}"
 echo
\ No newline at end of file
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, Optional, Tuple
+from config.settings import appSettings
+from config.service_config_reader import serviceConfig
+from cache.jwksCache import JwksEntry
+from asyncKeycloakAuth import asyncKeycloakRegistry
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('jwksPublisher')
+
+# Media type of JWK Set documents (RFC 7517)
+JWKS_MEDIA_TYPE = "application/jwk-set+json"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match request header against an ETag (weak comparison, as required for If-None-Match)
+
+    Args:
+        if_none_match: Value of the If-None-Match header
+        etag: Current ETag, quoted
+
+    Returns:
+        True if the client copy is current
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+class JwksPublisher:
+    """
+    Publish the cached JWKS of configured realms to resource servers verifying tokens in-process.
+    Documents are served from the realm JWKS cache (Keycloak is only called by its regular refresh),
+    encoded once per set of cached JWKS versions and tagged with a content hash, identical in every worker.
+    """
+    def __init__(self, max_age: int = 300, max_documents: int = 256):
+        """
+        Initialize the publisher
+
+        Args:
+            max_age: Upper bound (seconds) of the Cache-Control max-age of published documents
+            max_documents: Maximum number of encoded documents kept (all realms and one per realm)
+        """
+        self.max_age = max_age
+        self.max_documents = max_documents
+        # Realms of a document -> (JWKS versions, body, ETag)
+        self._documents: Dict[Tuple[str, ...], Tuple[Tuple[int, ...], bytes, str]] = {}
+
+    def realm_services(self, service: str = None) -> Optional[Dict[str, str]]:
+        """
+        Get the realms to publish, each with a service used to reach it
+
+        Args:
+            service: Publish only the realm of this service (all configured realms if not provided)
+
+        Returns:
+            Service name by realm, None if the service is not configured
+        """
+        if service is None:
+            return {realm: services[0] for realm, services in serviceConfig.index.by_realm.items()}
+        config = serviceConfig.config.get(service)
+        return None if config is None else {config.realm: service}
+
+    async def _entries(self, realm_services: Dict[str, str]) -> Dict[str, JwksEntry]:
+        """
+        Get the cached JWKS of realms; realms that cannot be served are left out while at least one can
+
+        Raises:
+            Exception: The error of the first realm when none can be served
+        """
+        outcomes = await asyncio.gather(
+            *(asyncKeycloakRegistry.get(service).get_jwks_entry() for service in realm_services.values()),
+            return_exceptions=True
+        )
+        entries, errors = {}, []
+        for realm, outcome in zip(realm_services.keys(), outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("JWKS of realm %s not published: %s", realm, outcome)
+                errors.append(outcome)
+            else:
+                entries[realm] = outcome
+        if errors and not entries:
+            raise errors[0]
+        return entries
+
+    async def document(self, realm_services: Dict[str, str]) -> Tuple[bytes, str, int]:
+        """
+        Get the merged JWKS document of realms
+
+        Args:
+            realm_services: Service name by realm, as returned by realm_services()
+
+        Returns:
+            Encoded document, strong ETag and Cache-Control max-age (bounded by the JWKS cache freshness)
+
+        Raises:
+            Exception: If no realm JWKS is cached nor can be fetched
+        """
+        entries = await self._entries(realm_services)
+        realms = tuple(sorted(entries))
+        versions = tuple(entries[realm].version for realm in realms)
+        cached = self._documents.get(realms)
+        if cached is not None and cached[0] == versions:
+            body, etag = cached[1], cached[2]
+        else:
+            keys = [key for realm in realms for key in entries[realm].jwks.get('keys', [])]
+            body = json.dumps({"keys": keys}, sort_keys=True, separators=(",", ":")).encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+            if len(self._documents) >= self.max_documents:
+                self._documents.clear()
+            self._documents[realms] = (versions, body, etag)
+        now = time.monotonic()
+        freshness = min(entry.expires_at - now for entry in entries.values())
+        return body, etag, max(0, min(self.max_age, int(freshness)))
+
+##############################################
+##### Initialize JWKS publisher instance #####
+##############################################
+jwksPublisher = JwksPublisher(max_age=appSettings.jwks_publish_max_age)
@@ -1,18 +1,168 @@
 import requests # pyright: ignore[reportMissingModuleSource]
 import jwt # pyright: ignore[reportMissingImports]
+import inspect
 import json
-from typing import Dict, Any
-from datetime import datetime, timedelta
-from config.service_config_reader import serviceConfig
-from config.settings import settings
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, Iterable, Optional, Set, Tuple
+from requests.adapters import HTTPAdapter # pyright: ignore[reportMissingModuleSource]
+from urllib3.util.retry import Retry # pyright: ignore[reportMissingImports]
+from config.service_config_reader import serviceConfig, realm_from_issuer
+from config.settings import appSettings
+from cache.jwksCache import jwksCache
+from cache.keyStore import keyStore
+from cache.tokenCache import tokenCache, token_digest
+from cache.introspectionCache import introspectionCache
+from singleFlight import singleFlight
+from circuitBreaker import circuitBreakers
+from metrics import keycloakRequestDuration, keycloakRequestsInFlight, upstream_operation
+from serverTiming import phase
 # Initialize logger at the top so it's available everywhere 
 from logger.loggerFactory import logger_factory
 logger = logger_factory.get_logger('keycloakAuth')
 
+# Retry backoff_max and backoff_jitter are only accepted by urllib3 >= 2
+_RETRY_BACKOFF_OPTIONS = {'backoff_max', 'backoff_jitter'} <= set(inspect.signature(Retry.__init__).parameters)
+
 class KeycloakAuthError(Exception):
     """Custom exception for Keycloak authentication errors"""
     pass
 
+class KeycloakUnavailableError(KeycloakAuthError):
+    """Custom exception raised when Keycloak is unavailable and calls fail fast"""
+    def __init__(self, message: str, retry_after: int = 0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def keycloak_unavailable(realm: str, operation: str, error: Any) -> KeycloakUnavailableError:
+    """
+    Error of a call that could not reach Keycloak or that Keycloak failed (5xx): callers should retry later,
+    the request itself (e.g. credentials) was not refused
+    
+    Args:
+        realm: Realm called
+        operation: Operation name used in the error message
+        error: Transport error or failed status
+        
+    Returns:
+        Exception to raise, retry_after of at least 1 second (until the next probe if the circuit opened)
+    """
+    retry_after = max(1, circuitBreakers.get(realm).retry_after())
+    return KeycloakUnavailableError(f"{operation} failed, Keycloak unavailable: {error}", retry_after=retry_after)
+
+def decode_token(token: str, public_key: Any, client_id: str) -> Dict[str, Any]:
+    """
+    Decode and verify a RS256 token signature with a public key
+    
+    Args:
+        token: JWT token to verify
+        public_key: Public key object matching the token kid
+        client_id: Expected audience
+        
+    Returns:
+        Dict with decoded token claims
+        
+    Raises:
+        jwt.InvalidTokenError: If verification fails
+    """
+    # First try with audience verification
+    try:
+        return jwt.decode(
+            token,
+            public_key,
+            algorithms=['RS256'],
+            audience=client_id,
+            options={"verify_signature": True, "verify_aud": True}
+        )
+    except jwt.InvalidAudienceError:
+        # If audience validation fails, try without audience verification
+        logger.warning("Token audience mismatch. Expected: %s. Trying without audience verification...", client_id)
+        return jwt.decode(
+            token,
+            public_key,
+            algorithms=['RS256'],
+            options={"verify_signature": True, "verify_aud": False}
+        )
+
+@dataclass(frozen=True)
+class KeycloakHttpConfig:
+    """Connection pool, timeout and retry tuning shared by pooled Keycloak clients"""
+    pool_connections: int = 10
+    pool_maxsize: int = 20
+    connect_timeout: float = 3.05
+    read_timeout: float = 10
+    max_retries: int = 2
+    backoff_factor: float = 0.2
+    backoff_max: float = 2.0
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """(connect, read) timeout tuple as accepted by requests"""
+        return (self.connect_timeout, self.read_timeout)
+
+    def retry(self) -> Retry:
+        """
+        Retry policy: connection-level failures are retried for every call (the request
+        never reached Keycloak), read errors and 502/503/504 only for idempotent GETs.
+        With urllib3 < 2 the backoff is neither capped by backoff_max nor jittered.
+        """
+        backoff = {}
+        if _RETRY_BACKOFF_OPTIONS:
+            backoff = {'backoff_max': self.backoff_max, 'backoff_jitter': self.backoff_factor}
+        return Retry(
+            total=self.max_retries,
+            connect=self.max_retries,
+            read=self.max_retries,
+            status=self.max_retries,
+            other=0,
+            allowed_methods=frozenset({'GET'}),
+            status_forcelist=(502, 503, 504),
+            backoff_factor=self.backoff_factor,
+            raise_on_status=False,
+            **backoff
+        )
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Jittered exponential backoff delay before a retry
+        
+        Args:
+            attempt: Retry number, starting at 1
+            
+        Returns:
+            Delay in seconds
+        """
+        delay = min(self.backoff_max, self.backoff_factor * (2 ** (attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def create_session(self) -> requests.Session:
+        """Create a requests session mounting a pooled, retrying adapter"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.retry()
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+####################################################
+##### Initialize Keycloak HTTP tuning instance #####
+####################################################
+keycloakHttpConfig = KeycloakHttpConfig(
+    pool_connections=appSettings.keycloak_pool_connections,
+    pool_maxsize=appSettings.keycloak_pool_maxsize,
+    connect_timeout=appSettings.keycloak_connect_timeout,
+    read_timeout=appSettings.keycloak_read_timeout,
+    max_retries=appSettings.keycloak_max_retries,
+    backoff_factor=appSettings.keycloak_backoff_factor,
+    backoff_max=appSettings.keycloak_backoff_max
+)
+
 class KeycloakConfig:
     """Configuration for Keycloak connection"""
     def __init__(
@@ -20,15 +170,16 @@ class KeycloakConfig:
         server_url: str = None,
         service: str = None,
     ):    
-        logger.debug(f"KeycloakConfig: Initializing configuration")
-        self.server_url = server_url or settings.get('KEYCLOAK_SERVER_URL')
+        debug = logger.isEnabledFor(logging.DEBUG)
+        logger.debug("KeycloakConfig: Initializing configuration")
+        self.server_url = server_url or appSettings.keycloak_server_url
         self.service = service
         servicecfg = None
-        logger.debug(f"self.service is set to: {self.service}")
+        logger.debug("self.service is set to: %s", self.service)
         if not self.service is None:
-            logger.debug(f"self.service is not None, getting service config")
+            logger.debug("self.service is not None, getting service config")
             servicecfg = serviceConfig.get_service(self.service)
-            logger.debug(f"KeycloakConfig: got service config for {self.service}: {servicecfg}")
+            logger.debug("KeycloakConfig: got service config for %s: %s", self.service, servicecfg)
             self.realm = servicecfg.realm
             self.client_id = servicecfg.client_id
             self.client_secret = servicecfg.client_secret
@@ -42,40 +193,141 @@ class KeycloakConfig:
         self.jwks_endpoint = f"{self.server_url}/realms/{self.realm}/protocol/openid-connect/certs"
         self.introspect_endpoint = f"{self.server_url}/realms/{self.realm}/protocol/openid-connect/token/introspect"
 
-        logger.debug(f"KeycloakConfig: ")
-        logger.debug(f"     server_url: {self.server_url}")
-        logger.debug(f"     service: {self.service}")
-        logger.debug(f"     realm: {self.realm}")
-        logger.debug(f"     client_id: {self.client_id}")
-        logger.debug(f"     token_endpoint: {self.token_endpoint}")
-        logger.debug(f"     userinfo_endpoint: {self.userinfo_endpoint}")
-        logger.debug(f"     jwks_endpoint: {self.jwks_endpoint}")
-        logger.debug(f"     introspect_endpoint: {self.introspect_endpoint}")
+        if debug:
+            logger.debug("KeycloakConfig: ")
+            logger.debug("     server_url: %s", self.server_url)
+            logger.debug("     service: %s", self.service)
+            logger.debug("     realm: %s", self.realm)
+            logger.debug("     client_id: %s", self.client_id)
+            logger.debug("     token_endpoint: %s", self.token_endpoint)
+            logger.debug("     userinfo_endpoint: %s", self.userinfo_endpoint)
+            logger.debug("     jwks_endpoint: %s", self.jwks_endpoint)
+            logger.debug("     introspect_endpoint: %s", self.introspect_endpoint)
     
     def validate(self):
         """Validate configuration"""
         if not self.server_url or not self.realm or not self.client_id:
             raise KeycloakAuthError("Missing required Keycloak configuration")
-        logger.info(f"Keycloak configured: {self.server_url}/realms/{self.realm}")
+        logger.info("Keycloak configured: %s/realms/%s", self.server_url, self.realm)
 
 class KeycloakAuth:
     """Keycloak authentication client"""
-    def __init__(self, config: KeycloakConfig = None):
+    def __init__(
+        self,
+        config: KeycloakConfig = None,
+        session: requests.Session = None,
+        http_config: KeycloakHttpConfig = None
+    ):
         self.config = config or KeycloakConfig()
         self.config.validate()
+        self.http_config = http_config or keycloakHttpConfig
         self.access_token = None
         self.refresh_token = None
         self.token_expiry = None
-        self.session = requests.Session()
+        # A shared session is owned (and closed) by whoever provided it
+        self._owns_session = session is None
+        self.session = session or self.http_config.create_session()
         logger.info("KeycloakAuth client initialized")
 
-    def authenticate_with_password(self, username: str, password: str) -> Dict[str, Any]:
+    def close(self):
+        """Close the HTTP session if owned by this client"""
+        if self._owns_session:
+            self.session.close()
+
+    def _send(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request to Keycloak through the realm circuit breaker.
+        Retries happen inside the session adapter, so the breaker records one outcome per call.
+        
+        Args:
+            method: HTTP method
+            url: Keycloak endpoint
+            **kwargs: Extra arguments for requests.Session.request
+            
+        Returns:
+            The response received
+            
+        Raises:
+            KeycloakUnavailableError: If the realm circuit is open
+            requests.exceptions.RequestException: If the request fails
+        """
+        breaker = circuitBreakers.get(self.config.realm)
+        if not breaker.allow():
+            logger.warning("Circuit open for realm %s, failing fast", self.config.realm)
+            raise KeycloakUnavailableError(
+                f"Keycloak unavailable for realm {self.config.realm}",
+                retry_after=breaker.retry_after()
+            )
+        operation = upstream_operation(url)
+        keycloakRequestsInFlight.inc(operation)
+        start = time.perf_counter()
+        recorded = False
+        try:
+            try:
+                response = self.session.request(method, url, timeout=self.http_config.timeout, **kwargs)
+            except requests.exceptions.RequestException:
+                breaker.record_failure()
+                recorded = True
+                keycloakRequestDuration.observe(time.perf_counter() - start, operation, 'error')
+                raise
+            keycloakRequestDuration.observe(
+                time.perf_counter() - start, operation, 'error' if response.status_code >= 500 else 'ok'
+            )
+            # Only server side errors tell Keycloak is unhealthy, 4xx are caller errors
+            if response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            recorded = True
+            return response
+        finally:
+            keycloakRequestsInFlight.dec(operation)
+            # Any other error (or interruption) records no outcome, release the call
+            if not recorded:
+                breaker.release()
+
+    def _post_token_endpoint(self, payload: Dict[str, Any], operation: str) -> Dict[str, Any]:
+        """
+        POST a grant to the token endpoint
+        
+        Args:
+            payload: Form payload of the grant
+            operation: Operation name used in error messages
+            
+        Returns:
+            Dict with tokens
+            
+        Raises:
+            KeycloakUnavailableError: If Keycloak is unreachable or fails (5xx), or the realm circuit is open
+            KeycloakAuthError: If Keycloak refuses the grant
+        """
+        try:
+            response = self._send('POST', self.config.token_endpoint, data=payload)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logger.error("%s failed, Keycloak unreachable: %s", operation, e)
+            raise keycloak_unavailable(self.config.realm, operation, e)
+        except requests.exceptions.RequestException as e:
+            logger.error("%s failed: %s", operation, e)
+            raise KeycloakAuthError(f"{operation} failed: {str(e)}")
+        if response.status_code >= 500:
+            logger.error("%s failed, Keycloak answered %s", operation, response.status_code)
+            raise keycloak_unavailable(self.config.realm, operation, f"HTTP {response.status_code}")
+        try:
+            response.raise_for_status()
+            with phase('token_parse'):
+                return response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error("%s failed: %s", operation, e)
+            raise KeycloakAuthError(f"{operation} failed: {str(e)}")
+
+    def authenticate_with_password(self, username: str, password: str, store_tokens: bool = True) -> Dict[str, Any]:
         """
         Authenticate user with username and password (Resource Owner Password Credentials flow)
         
         Args:
             username: User's username
             password: User's password
+            store_tokens: Keep the returned tokens on this client (disable for shared clients)
             
         Returns:
             Dict with tokens and user info
@@ -83,8 +335,8 @@ class KeycloakAuth:
         Raises:
             KeycloakAuthError: If authentication fails
         """
-        logger.debug(f"---> Function authenticate_with_password() called <---")
-        logger.info(f"Authenticating user: {username}")
+        logger.debug("---> Function authenticate_with_password() called <---")
+        logger.info("Authenticating user: %s", username)
         
         payload = {
             'grant_type': 'password',
@@ -94,41 +346,32 @@ class KeycloakAuth:
         }
         
         if self.config.client_secret:
-            logger.debug(f"Adding client_secret to payload for client_id: {self.config.client_id}")
+            logger.debug("Adding client_secret to payload for client_id: %s", self.config.client_id)
             payload['client_secret'] = self.config.client_secret
         
-        try:
-            logger.info(f"self.config.token_endpoint: {self.config.token_endpoint}")
-
-            response = self.session.post(
-                self.config.token_endpoint,
-                data=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            token_data = response.json()
+        with phase('keycloak_token'):
+            token_data = self._post_token_endpoint(payload, "Authentication")
+        if store_tokens:
             self._store_tokens(token_data)
-            
-            logger.info(f"User {username} authenticated successfully")
-            return token_data
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Authentication failed for user {username}: {str(e)}")
-            raise KeycloakAuthError(f"Authentication failed: {str(e)}")
+        
+        logger.info("User %s authenticated successfully", username)
+        return token_data
     
-    def authenticate_with_client_credentials(self) -> Dict[str, Any]:
+    def authenticate_with_client_credentials(self, store_tokens: bool = True) -> Dict[str, Any]:
         """
         Authenticate as a service account using client credentials (Client Credentials flow)
         
+        Args:
+            store_tokens: Keep the returned tokens on this client (disable for shared clients)
+        
         Returns:
             Dict with access token
             
         Raises:
             KeycloakAuthError: If authentication fails
         """
-        logger.debug(f"---> Function authenticate_with_client_credentials() called <---")
-        logger.info(f"Authenticating with client credentials: {self.config.client_id}")
+        logger.debug("---> Function authenticate_with_client_credentials() called <---")
+        logger.info("Authenticating with client credentials: %s", self.config.client_id)
         
         if not self.config.client_secret:
             logger.error("Client secret is required for client credentials flow")
@@ -140,30 +383,20 @@ class KeycloakAuth:
             'client_secret': self.config.client_secret
         }
         
-        try:
-            response = self.session.post(
-                self.config.token_endpoint,
-                data=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            token_data = response.json()
+        token_data = self._post_token_endpoint(payload, "Service account authentication")
+        if store_tokens:
             self._store_tokens(token_data)
-            
-            logger.info("Service account authenticated successfully")
-            return token_data
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Service account authentication failed: {str(e)}")
-            raise KeycloakAuthError(f"Authentication failed: {str(e)}")
+        
+        logger.info("Service account authenticated successfully")
+        return token_data
     
-    def refresh_access_token(self, refresh_token: str = None) -> Dict[str, Any]:
+    def refresh_access_token(self, refresh_token: str = None, store_tokens: bool = True) -> Dict[str, Any]:
         """
         Refresh access token using refresh token
         
         Args:
             refresh_token: Refresh token (uses stored token if not provided)
+            store_tokens: Keep the returned tokens on this client (disable for shared clients)
             
         Returns:
             Dict with new tokens
@@ -171,7 +404,7 @@ class KeycloakAuth:
         Raises:
             KeycloakAuthError: If refresh fails
         """
-        logger.debug(f"---> Function refresh_access_token() called <---")
+        logger.debug("---> Function refresh_access_token() called <---")
         token_to_use = refresh_token or self.refresh_token
         
         if not token_to_use:
@@ -187,26 +420,15 @@ class KeycloakAuth:
         }
         
         if self.config.client_secret:
-            logger.debug(f"Adding client_secret to payload for client_id: {self.config.client_id}")
+            logger.debug("Adding client_secret to payload for client_id: %s", self.config.client_id)
             payload['client_secret'] = self.config.client_secret
         
-        try:
-            response = self.session.post(
-                self.config.token_endpoint,
-                data=payload,
-                timeout=10
-            )
-            response.raise_for_status()
-            
-            token_data = response.json()
+        token_data = self._post_token_endpoint(payload, "Token refresh")
+        if store_tokens:
             self._store_tokens(token_data)
-            
-            logger.info("Access token refreshed successfully")
-            return token_data
-            
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Token refresh failed: {str(e)}")
-            raise KeycloakAuthError(f"Token refresh failed: {str(e)}")
+        
+        logger.info("Access token refreshed successfully")
+        return token_data
 
     def get_user_info(self, access_token: str = None) -> Dict[str, Any]:
         """
@@ -221,7 +443,7 @@ class KeycloakAuth:
         Raises:
             KeycloakAuthError: If request fails
         """
-        logger.debug(f"---> Function get_user_info() called <---")
+        logger.debug("---> Function get_user_info() called <---")
         token = access_token or self.access_token
         
         if not token:
@@ -233,19 +455,19 @@ class KeycloakAuth:
         headers = {'Authorization': f'Bearer {token}'}
         
         try:
-            response = self.session.get(
+            response = self._send(
+                'GET',
                 self.config.userinfo_endpoint,
-                headers=headers,
-                timeout=10
+                headers=headers
             )
             response.raise_for_status()
             
             user_info = response.json()
-            logger.info(f"User info retrieved for: {user_info.get('preferred_username')}")
+            logger.info("User info retrieved for: %s", user_info.get('preferred_username'))
             return user_info
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch user info: {str(e)}")
+            logger.error("Failed to fetch user info: %s", e)
             raise KeycloakAuthError(f"Failed to fetch user info: {str(e)}")
 
     def introspect_token(self, token: str, use_basic_auth: bool = True) -> Dict[str, Any]:
@@ -262,7 +484,7 @@ class KeycloakAuth:
         Raises:
             KeycloakAuthError: If introspection fails
         """
-        logger.debug(f"---> Function introspect_token() called <---")
+        logger.debug("---> Function introspect_token() called <---")
         logger.info("Introspecting token")
         
         payload = {
@@ -283,16 +505,16 @@ class KeycloakAuth:
             # Alternative: include credentials in payload
             payload['client_id'] = self.config.client_id
             if self.config.client_secret:
-                logger.debug(f"Adding client_secret to payload for client_id: {self.config.client_id}")
+                logger.debug("Adding client_secret to payload for client_id: %s", self.config.client_id)
                 payload['client_secret'] = self.config.client_secret
         
         try:
-            response = self.session.post(
+            response = self._send(
+                'POST',
                 self.config.introspect_endpoint,
                 data=payload,
                 headers=headers,
-                auth=auth,
-                timeout=10
+                auth=auth
             )
             
             # Handle different response codes
@@ -304,11 +526,11 @@ class KeycloakAuth:
             
             introspection = response.json()
             is_active = introspection.get('active', False)
-            logger.info(f"Token introspection - Active: {is_active}")
+            logger.info("Token introspection - Active: %s", is_active)
             return introspection
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Token introspection failed: {str(e)}")
+            logger.error("Token introspection failed: %s", e)
             raise KeycloakAuthError(f"Token introspection failed: {str(e)}")
     
     def verify_token_locally(self, token: str) -> Dict[str, Any]:
@@ -325,109 +547,48 @@ class KeycloakAuth:
         Raises:
             KeycloakAuthError: If verification fails
         """
-        logger.debug(f"---> Function verify_token_locally() called <---")
+        logger.debug("---> Function verify_token_locally() called <---")
         logger.info("Verifying token locally using public keys")
         
         try:
-            import json
-            
             # Get unverified header to find kid
-            unverified_header = jwt.get_unverified_header(token)
+            with phase('jwt_header'):
+                unverified_header = jwt.get_unverified_header(token)
             kid = unverified_header.get('kid')
             
             if not kid:
                 logger.error("Token has no 'kid' in header")
                 raise KeycloakAuthError("Token has no 'kid' in header")
             
-            # Get public keys from Keycloak
-            jwks = self.get_public_keys()
-            
-            # Find the matching public key
-            public_key_data = None
-            for key in jwks.get('keys', []):
-                if key.get('kid') == kid:
-                    public_key_data = key
-                    break
-            
-            if not public_key_data:
-                logger.error(f"Public key with kid '{kid}' not found")
-                raise KeycloakAuthError(f"Public key with kid '{kid}' not found")
-            
-            # Convert JWK to PEM format - try multiple methods
-            public_key = None
-            
-            # Method 1: Try PyJWT's RSAAlgorithm (PyJWT >= 2.0)
-            try:
-                from jwt.algorithms import RSAAlgorithm # pyright: ignore[reportMissingImports]
-                public_key = RSAAlgorithm.from_jwk(json.dumps(public_key_data))
-                logger.debug("Using PyJWT RSAAlgorithm for key conversion")
-            except (ImportError, AttributeError) as e:
-                logger.error(f"PyJWT RSAAlgorithm not available: {e}")
+            # Get public keys from the JWKS cache (refreshed if kid is unknown)
+            with phase('jwks'):
+                jwks_entry = jwksCache.get(self.config.realm, self._fetch_public_keys, kid=kid)
             
-            # Method 2: Manual conversion using cryptography
-            if public_key is None:
-                try:
-                    from cryptography.hazmat.primitives.asymmetric import rsa # pyright: ignore[reportMissingImports]
-                    from cryptography.hazmat.backends import default_backend # pyright: ignore[reportMissingImports]
-                    import base64
-                    
-                    if public_key_data.get('kty') != 'RSA':
-                        logger.error(f"Unsupported key type: {public_key_data.get('kty')}")
-                        raise KeycloakAuthError(f"Unsupported key type: {public_key_data.get('kty')}")
-                    
-                    # Decode base64url encoded components
-                    def b64_decode(data):
-                        padding = 4 - len(data) % 4
-                        if padding != 4:
-                            data += '=' * padding
-                        return int.from_bytes(base64.urlsafe_b64decode(data), 'big')
-                    
-                    n = b64_decode(public_key_data['n'])  # modulus
-                    e = b64_decode(public_key_data['e'])  # exponent
-                    
-                    # Create RSA public key
-                    public_key = rsa.RSAPublicNumbers(e, n).public_key(default_backend())
-                    logger.debug("Using manual cryptography conversion for key")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to convert JWK to public key: {str(e)}")
-                    raise KeycloakAuthError(f"Failed to convert JWK to public key: {str(e)}")
+            # Find the matching public key, converted once per realm JWKS
+            with phase('key'):
+                public_key = keyStore.get_key(self.config.realm, jwks_entry, kid)
             
             if public_key is None:
-                logger.error("Could not convert JWK to public key")
-                raise KeycloakAuthError("Could not convert JWK to public key")
+                logger.error("Public key with kid '%s' not found", kid)
+                raise KeycloakAuthError(f"Public key with kid '{kid}' not found")
             
             # Decode and verify token
-            # First try with audience verification
-            try:
-                decoded_token = jwt.decode(
-                    token,
-                    public_key,
-                    algorithms=['RS256'],
-                    audience=self.config.client_id,
-                    options={"verify_signature": True, "verify_aud": True}
-                )
-            except jwt.InvalidAudienceError:
-                # If audience validation fails, try without audience verification
-                logger.warning(f"Token audience mismatch. Expected: {self.config.client_id}. Trying without audience verification...")
-                decoded_token = jwt.decode(
-                    token,
-                    public_key,
-                    algorithms=['RS256'],
-                    options={"verify_signature": True, "verify_aud": False}
-                )
+            with phase('rsa_verify'):
+                decoded_token = decode_token(token, public_key, self.config.client_id)
             
-            logger.info(f"Token verified successfully for user: {decoded_token.get('preferred_username')}")
+            logger.info("Token verified successfully for user: %s", decoded_token.get('preferred_username'))
             return decoded_token
             
+        except KeycloakUnavailableError:
+            raise
         except jwt.ExpiredSignatureError:
             logger.error("Token has expired")
             raise KeycloakAuthError("Token has expired")
         except jwt.InvalidTokenError as e:
-            logger.error(f"Token verification failed: {str(e)}")
+            logger.error("Token verification failed: %s", e)
             raise KeycloakAuthError(f"Invalid token: {str(e)}")
         except Exception as e:
-            logger.error(f"Token verification error: {str(e)}")
+            logger.error("Token verification error: %s", e)
             raise KeycloakAuthError(f"Token verification error: {str(e)}")
 
     def _________verify_token_locally(self, token: str) -> Dict[str, Any]:
@@ -479,9 +640,9 @@ class KeycloakAuth:
             # **** FOR DEBUGGING PURPOSES ****
             # Decode without verification to see what's in the token
             unverified = jwt.decode(token, options={"verify_signature": False})
-            logger.debug(f"Token claims: {unverified}")
-            logger.debug(f"Audience claim: {unverified.get('aud')}")
-            logger.debug(f"Client ID: {self.config.client_id}")
+            logger.debug("Token claims: %s", unverified)
+            logger.debug("Audience claim: %s", unverified.get('aud'))
+            logger.debug("Client ID: %s", self.config.client_id)
             # **** FOR DEBUGGING PURPOSES ****
 
             # Decode and verify token
@@ -495,58 +656,89 @@ class KeycloakAuth:
                 }
             )
             
-            logger.info(f"Token verified successfully for user: {decoded_token.get('preferred_username')}")
+            logger.info("Token verified successfully for user: %s", decoded_token.get('preferred_username'))
             return decoded_token
             
         except jwt.ExpiredSignatureError:
             logger.error("Token has expired")
             raise KeycloakAuthError("Token has expired")
         except jwt.InvalidTokenError as e:
-            logger.error(f"Token verification failed: {str(e)}")
+            logger.error("Token verification failed: %s", e)
             raise KeycloakAuthError(f"Invalid token: {str(e)}")
         except Exception as e:
-            logger.error(f"Token verification error: {str(e)}")
+            logger.error("Token verification error: %s", e)
             raise KeycloakAuthError(f"Token verification error: {str(e)}")
         
-    def get_public_keys(self) -> Dict[str, Any]:
+    def get_public_keys(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
-        Get public keys for token verification (JWKS)
+        Get public keys for token verification (JWKS), served from the realm JWKS cache
         
+        Args:
+            force_refresh: Bypass the cache and fetch keys from Keycloak
+            
         Returns:
             Dict with public keys
             
         Raises:
             KeycloakAuthError: If retrieval fails
         """
-        logger.debug(f"---> Function get_public_keys() called <---")
+        logger.debug("---> Function get_public_keys() called <---")
+        if force_refresh:
+            return singleFlight.do(
+                ('jwks', self.config.realm),
+                lambda: jwksCache.store(self.config.realm, *self._fetch_public_keys())
+            ).jwks
+        return jwksCache.get(self.config.realm, self._fetch_public_keys).jwks
+    
+    def _fetch_public_keys(self) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Fetch public keys (JWKS) from Keycloak
+        
+        Returns:
+            Tuple with JWKS document and Cache-Control response header
+            
+        Raises:
+            KeycloakUnavailableError: If Keycloak is unreachable or fails (5xx), or the realm circuit is open
+            KeycloakAuthError: If retrieval fails
+        """
+        logger.debug("---> Function _fetch_public_keys() called <---")
         logger.info("Fetching public keys (JWKS)")
         
         try:
-            response = self.session.get(
-                self.config.jwks_endpoint,
-                timeout=10
+            response = self._send(
+                'GET',
+                self.config.jwks_endpoint
             )
+            if response.status_code >= 500:
+                raise keycloak_unavailable(self.config.realm, "Public keys retrieval", f"HTTP {response.status_code}")
             response.raise_for_status()
             
             keys = response.json()
-            logger.info(f"Retrieved {len(keys.get('keys', []))} public keys")
-            return keys
+            logger.info("Retrieved %s public keys", len(keys.get('keys', [])))
+            return keys, response.headers.get('Cache-Control')
             
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            logger.error("Failed to fetch public keys, Keycloak unreachable: %s", e)
+            raise keycloak_unavailable(self.config.realm, "Public keys retrieval", e)
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch public keys: {str(e)}")
+            logger.error("Failed to fetch public keys: %s", e)
             raise KeycloakAuthError(f"Failed to fetch public keys: {str(e)}")
     
-    def logout(self, refresh_token: str = None):
+    def logout(self, refresh_token: str = None, access_token: str = None):
         """
         Logout user and revoke tokens
         
         Args:
             refresh_token: Refresh token to revoke (uses stored token if not provided)
+            access_token: Access token to evict from verification caches (uses stored token if not provided)
             
         Raises:
             KeycloakAuthError: If logout fails
         """
-        logger.debug(f"---> Function logout() called <---")
+        logger.debug("---> Function logout() called <---")
+        token_to_evict = access_token or self.access_token
+        if token_to_evict:
+            invalidate_token(token_to_evict)
         token_to_revoke = refresh_token or self.refresh_token
         
         if not token_to_revoke:
@@ -561,16 +753,16 @@ class KeycloakAuth:
         }
         
         if self.config.client_secret:
-            logger.debug(f"Adding client_secret to payload for client_id: {self.config.client_id}")
+            logger.debug("Adding client_secret to payload for client_id: %s", self.config.client_id)
             payload['client_secret'] = self.config.client_secret
         
         revoke_endpoint = f"{self.config.server_url}/realms/{self.config.realm}/protocol/openid-connect/revoke"
         
         try:
-            response = self.session.post(
+            response = self._send(
+                'POST',
                 revoke_endpoint,
-                data=payload,
-                timeout=10
+                data=payload
             )
             response.raise_for_status()
             
@@ -581,30 +773,31 @@ class KeycloakAuth:
             logger.info("User logged out successfully")
             
         except requests.exceptions.RequestException as e:
-            logger.error(f"Logout failed: {str(e)}")
+            logger.error("Logout failed: %s", e)
             raise KeycloakAuthError(f"Logout failed: {str(e)}")
     
     def is_token_expired(self) -> bool:
         """Check if current access token is expired"""
-        logger.debug(f"---> Function is_token_expired() called <---")
+        logger.debug("---> Function is_token_expired() called <---")
         if not self.token_expiry:
             return True
-        return datetime.now() >= self.token_expiry
+        return time.monotonic() >= self.token_expiry
     
     def _store_tokens(self, token_data: Dict[str, Any]):
         """Store tokens and calculate expiry"""
-        logger.debug(f"---> Function _store_tokens() called <---")
+        logger.debug("---> Function _store_tokens() called <---")
         self.access_token = token_data.get('access_token')
         self.refresh_token = token_data.get('refresh_token')
         
         expires_in = token_data.get('expires_in', 300)
-        self.token_expiry = datetime.now() + timedelta(seconds=expires_in)
+        # Monotonic clock, so wall clock adjustments cannot extend or shorten token life
+        self.token_expiry = time.monotonic() + expires_in
         
-        logger.debug(f"Tokens stored. Access token expires in {expires_in} seconds")
+        logger.debug("Tokens stored. Access token expires in %s seconds", expires_in)
     
     def get_access_token(self) -> str:
         """Get current access token, refresh if expired"""
-        logger.debug(f"---> Function get_access_token() called <---")
+        logger.debug("---> Function get_access_token() called <---")
         if self.is_token_expired() and self.refresh_token:
             logger.info("Access token expired, refreshing...")
             self.refresh_access_token()
@@ -615,23 +808,320 @@ class KeycloakAuth:
         
         return self.access_token
 
+def unverified_claims(token: str) -> Dict[str, Any]:
+    """
+    Decode the claims of a token without verifying it, only to route it (never to trust it)
+    
+    Args:
+        token: Raw JWT token
+        
+    Returns:
+        Dict with the token claims
+        
+    Raises:
+        KeycloakAuthError: If the token cannot be decoded
+    """
+    try:
+        return jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError as e:
+        raise KeycloakAuthError(f"Invalid token: {str(e)}")
+
+def resolve_token_service(token: str) -> str:
+    """
+    Find the configured service of a token from its issuer (iss) and authorized party (azp) claims.
+    The token is then verified with the keys of the service realm, so a forged issuer fails verification.
+    
+    Args:
+        token: Raw JWT token
+        
+    Returns:
+        Service name
+        
+    Raises:
+        KeycloakAuthError: If the token cannot be decoded or no service matches its issuer and client
+    """
+    claims = unverified_claims(token)
+    service = serviceConfig.resolve_service(claims.get('iss'), claims.get('azp'))
+    if service is None:
+        raise KeycloakAuthError("No service configured for the token issuer and authorized party")
+    return service
+
+def invalidate_token(token: str):
+    """
+    Evict a token from the verified token and introspection caches, for every service of its realm
+    (every configured service if the token cannot be decoded)
+    
+    Args:
+        token: Raw access token
+    """
+    logger.debug("---> Function invalidate_token() called <---")
+    services = ()
+    try:
+        realm = realm_from_issuer(unverified_claims(token).get('iss'))
+        if realm is not None:
+            services = serviceConfig.find_services(realm)
+    except KeycloakAuthError:
+        pass
+    if not services:
+        services = serviceConfig.list_services()
+    introspectionCache.invalidate(token, services)
+    for service in services:
+        tokenCache.invalidate(token, service)
+
+class KeycloakClientRegistry:
+    """Long-lived KeycloakAuth clients, one per configured service, sharing one pooled HTTP session"""
+    def __init__(self, http_config: KeycloakHttpConfig = None):
+        self.http_config = http_config or keycloakHttpConfig
+        self._clients: Dict[str, KeycloakAuth] = {}
+        self._session = None
+        self._lock = threading.Lock()
+
+    def _get_session(self) -> requests.Session:
+        """Get the HTTP session shared by all registry clients, creating it on first use"""
+        if self._session is None:
+            self._session = self.http_config.create_session()
+        return self._session
+
+    def get(self, service: str) -> KeycloakAuth:
+        """
+        Get the client of a service, creating it on first use
+        
+        Args:
+            service: Name of the service
+            
+        Returns:
+            KeycloakAuth client configured for the service
+            
+        Raises:
+            KeycloakAuthError: If the service is not configured
+        """
+        client = self._clients.get(service)
+        if client is not None:
+            return client
+        with self._lock:
+            client = self._clients.get(service)
+            if client is None:
+                if not serviceConfig.service_exists(service):
+                    raise KeycloakAuthError(f"Service '{service}' not found in configuration")
+                logger.info("Creating Keycloak client for service %s", service)
+                client = KeycloakAuth(
+                    KeycloakConfig(service=service),
+                    session=self._get_session(),
+                    http_config=self.http_config
+                )
+                self._clients[service] = client
+        return client
+
+    def load_all(self):
+        """Create clients for every configured service"""
+        for service in serviceConfig.list_services():
+            self.get(service)
+        logger.info("Keycloak clients ready for services: %s", list(self._clients.keys()))
+
+    def invalidate(self, services: Iterable[str]):
+        """
+        Drop the clients of services, recreated from the current configuration on next use
+        
+        Args:
+            services: Names of the services
+        """
+        with self._lock:
+            for service in services:
+                self._clients.pop(service, None)
+
+    def close(self):
+        """Drop all clients and close the shared HTTP session"""
+        with self._lock:
+            self._clients.clear()
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+        logger.info("Keycloak client registry closed")
+
+######################################################
+##### Initialize Keycloak client registry instance #####
+######################################################
+keycloakRegistry = KeycloakClientRegistry()
+
+class _ServiceTokenState:
+    """Cached service account tokens of a service"""
+    def __init__(self):
+        self.access_token = None
+        self.refresh_token = None
+        self.expires_at = 0.0
+        self.refresh_expires_at = 0.0
+        self.timer = None
+        self.lock = threading.Lock()
+
+class ServiceTokenManager:
+    """
+    Hand out cached client credentials access tokens per service,
+    refreshing them in the background before they expire
+    """
+    def __init__(self, refresh_fraction: float = 0.8, min_validity: int = 5):
+        """
+        Initialize the token manager
+        
+        Args:
+            refresh_fraction: Fraction of 'expires_in' after which a token is refreshed in background
+            min_validity: Seconds of remaining validity below which a token is no longer handed out
+        """
+        self.refresh_fraction = refresh_fraction
+        self.min_validity = min_validity
+        self._states: Dict[str, _ServiceTokenState] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _get_state(self, service: str) -> _ServiceTokenState:
+        """Get the token state of a service, creating it on first use"""
+        state = self._states.get(service)
+        if state is None:
+            with self._lock:
+                state = self._states.setdefault(service, _ServiceTokenState())
+        return state
+
+    def get_token(self, service: str) -> str:
+        """
+        Get a valid service account access token for a service
+        
+        Args:
+            service: Name of the service
+            
+        Returns:
+            Access token
+            
+        Raises:
+            KeycloakAuthError: If no token can be obtained
+        """
+        state = self._get_state(service)
+        if state.access_token and time.monotonic() < state.expires_at - self.min_validity:
+            return state.access_token
+        # Only one caller refreshes, the others wait for its result
+        with state.lock:
+            if state.access_token and time.monotonic() < state.expires_at - self.min_validity:
+                return state.access_token
+            self._refresh(service, state)
+            return state.access_token
+
+    def _refresh(self, service: str, state: _ServiceTokenState):
+        """
+        Obtain new tokens, using the refresh token when still valid. Must be called holding state.lock
+        
+        Args:
+            service: Name of the service
+            state: Token state of the service
+        """
+        # The registry client is shared: tokens are kept in the state only, never stored on the client
+        auth = keycloakRegistry.get(service)
+        token_data = None
+        if state.refresh_token and time.monotonic() < state.refresh_expires_at:
+            try:
+                token_data = auth.refresh_access_token(state.refresh_token, store_tokens=False)
+            except KeycloakAuthError as e:
+                logger.warning("Refresh of service account token for %s failed, requesting a new one: %s", service, e)
+        if token_data is None:
+            token_data = auth.authenticate_with_client_credentials(store_tokens=False)
+        
+        now = time.monotonic()
+        expires_in = token_data.get('expires_in', 300)
+        state.access_token = token_data.get('access_token')
+        state.refresh_token = token_data.get('refresh_token')
+        state.expires_at = now + expires_in
+        state.refresh_expires_at = now + token_data.get('refresh_expires_in', 0)
+        self._schedule(service, state, expires_in * self.refresh_fraction)
+        logger.info("Service account token for %s obtained, expires in %s seconds", service, expires_in)
+
+    def _schedule(self, service: str, state: _ServiceTokenState, delay: float):
+        """Schedule a background refresh of a service token"""
+        if state.timer is not None:
+            state.timer.cancel()
+        if self._closed:
+            return
+        state.timer = threading.Timer(max(delay, 1), self._background_refresh, args=(service,))
+        state.timer.daemon = True
+        state.timer.start()
+
+    def _background_refresh(self, service: str):
+        """Refresh a service token ahead of its expiry"""
+        state = self._get_state(service)
+        # Skip if a caller is already refreshing
+        if not state.lock.acquire(blocking=False):
+            return
+        try:
+            self._refresh(service, state)
+        except Exception as e:
+            remaining = state.expires_at - time.monotonic()
+            logger.error("Background refresh of service account token for %s failed: %s", service, e)
+            # Retry before the current token expires
+            if remaining > self.min_validity:
+                self._schedule(service, state, remaining / 2)
+        finally:
+            state.lock.release()
+
+    def invalidate(self, service: str = None):
+        """
+        Drop cached tokens and pending refreshes
+        
+        Args:
+            service: Service to drop (all services if not provided)
+        """
+        with self._lock:
+            services = list(self._states.keys()) if service is None else [service]
+            for name in services:
+                state = self._states.pop(name, None)
+                if state is not None and state.timer is not None:
+                    state.timer.cancel()
+
+    def close(self):
+        """Stop all background refreshes"""
+        self._closed = True
+        self.invalidate()
+
+####################################################
+##### Initialize service token manager instance #####
+####################################################
+serviceTokenManager = ServiceTokenManager(
+    refresh_fraction=appSettings.service_token_refresh_fraction
+)
+
+def invalidate_services(services: Set[str]):
+    """
+    Drop the clients and service account tokens of services added, removed or changed
+    on service configuration reload (other services keep theirs)
+    
+    Args:
+        services: Names of the services
+    """
+    keycloakRegistry.invalidate(services)
+    for service in services:
+        serviceTokenManager.invalidate(service)
+    logger.info("Keycloak clients and service account tokens dropped for services: %s", sorted(services))
+
+serviceConfig.add_listener(invalidate_services)
+
 # Convenience functions for quick usage
 def authenticate_user(username: str, password: str, service: str) -> Dict[str, Any]:
         """Quick function to authenticate a user and return access token"""
-        logger.debug(f"---> Quick function authenticate_user() called <---")
-        logger.debug(f"Authenticating user {username} for {service} service using quick function")
-        config = KeycloakConfig(service=service)
-        auth = KeycloakAuth(config)
-        logger.debug(f"---> Calling authenticate_with_password() method on KeycloakAuth instance <---")
-        tokens = auth.authenticate_with_password(username, password)
+        logger.debug("---> Quick function authenticate_user() called <---")
+        logger.debug("Authenticating user %s for %s service using quick function", username, service)
+        auth = keycloakRegistry.get(service)
+        logger.debug("---> Calling authenticate_with_password() method on KeycloakAuth instance <---")
+        # The client is shared across requests, user tokens must not be kept on it
+        tokens = auth.authenticate_with_password(username, password, store_tokens=False)
         return tokens
 
 def authenticate_service_account(config: KeycloakConfig = None) -> str:
     """Quick function to authenticate a service account and return access token"""
-    logger.debug(f"---> Quick function authenticate_service_account() called <---")
+    logger.debug("---> Quick function authenticate_service_account() called <---")
+    if config is not None and config.service is not None:
+        return serviceTokenManager.get_token(config.service)
     auth = KeycloakAuth(config)
-    logger.debug(f"---> Calling authenticate_with_client_credentials() method on KeycloakAuth instance <---")
-    tokens = auth.authenticate_with_client_credentials()
+    logger.debug("---> Calling authenticate_with_client_credentials() method on KeycloakAuth instance <---")
+    # Concurrent callers for the same client share one token request
+    tokens = singleFlight.do(
+        ('client_credentials', auth.config.realm, auth.config.client_id),
+        auth.authenticate_with_client_credentials
+    )
     return tokens['access_token']
 
 def verify_token(token: str, service: str, method: str = 'local') -> Dict[str, Any]:
@@ -643,16 +1133,30 @@ def verify_token(token: str, service: str, method: str = 'local') -> Dict[str, A
         config: Keycloak configuration
         method: 'local' (default, no special permissions needed) or 'introspect' (requires permissions)
     """
-    logger.debug(f"---> Quick function verify_token() called <---")
-    logger.debug(f"Verifying token for {service} service using method: {method}")
-    config = KeycloakConfig(service=service)
-    auth = KeycloakAuth(config)
+    logger.debug("---> Quick function verify_token() called <---")
+    logger.debug("Verifying token for %s service using method: %s", service, method)
+    auth = keycloakRegistry.get(service)
     
     if method == 'local':
-        logger.debug(f"---> Using local verification method <---")
-        logger.debug(f"---> Calling verify_token_locally() method on KeycloakAuth instance <---")
-        return auth.verify_token_locally(token)
+        logger.debug("---> Using local verification method <---")
+        claims = tokenCache.get(token, service)
+        if claims is not None:
+            logger.debug("Token found in verified token cache")
+            return claims
+        logger.debug("---> Calling verify_token_locally() method on KeycloakAuth instance <---")
+        claims = auth.verify_token_locally(token)
+        tokenCache.put(token, service, claims)
+        return claims
     else:
-        logger.debug(f"---> Using introspection verification method <---")
-        logger.debug(f"---> Calling introspect_token() method on KeycloakAuth instance <---")
-        return auth.introspect_token(token)
\ No newline at end of file
+        logger.debug("---> Using introspection verification method <---")
+        introspection = introspectionCache.get(token, service)
+        if introspection is not None:
+            logger.debug("Token found in introspection cache")
+            return introspection
+        logger.debug("---> Calling introspect_token() method on KeycloakAuth instance <---")
+        def introspect() -> Dict[str, Any]:
+            result = auth.introspect_token(token)
+            introspectionCache.put(token, service, result)
+            return result
+        # Concurrent introspections of the same token share one Keycloak call
+        return singleFlight.do(('introspect', service, token_digest(token)), introspect)
\ No newline at end of file
@@ -1,7 +1,109 @@
 import os
 import json
+import queue
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import itertools
+from logging.handlers import TimedRotatingFileHandler, QueueHandler, QueueListener
+from dotenv import load_dotenv # pyright: ignore[reportMissingImports]
+
+# The pipeline starts with the first logger, before settings are parsed: load .env here
+# so its values apply to logging too (variables already set in the environment win)
+load_dotenv()
+
+def _env_int(name, default, minimum=1):
+    """
+    Read a positive integer logging setting. Bad values fall back to the default here,
+    startup then fails on them with the other settings errors (see AppSettings).
+    """
+    raw = os.getenv(name, "").strip()
+    try:
+        value = int(raw) if raw else default
+    except ValueError:
+        value = default
+    return value if value >= minimum else default
+
+def _log_file():
+    """
+    Path of the log file. With several workers (API_WORKERS > 1) every process writes and rotates
+    its own file, suffixed with its pid: processes sharing one file would each rotate it at
+    rollover, deleting the dated file another process had just rotated.
+    """
+    path = os.getenv("DEFAULT_LOG_FILE", "logs/windfire-security-server.log")
+    if _env_int("API_WORKERS", 1) > 1:
+        root, extension = os.path.splitext(path)
+        path = f"{root}.{os.getpid()}{extension}"
+    return path
+
+class _BatchFlushMixin:
+    """Defer the flush done after each record to the end of a batch"""
+    def flush(self):
+        # Called by emit() after every record: the listener flushes once per batch instead
+        pass
+
+    def flush_batch(self):
+        super().flush()
+
+class BatchFileHandler(_BatchFlushMixin, TimedRotatingFileHandler):
+    pass
+
+class BatchStreamHandler(_BatchFlushMixin, logging.StreamHandler):
+    pass
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that never blocks the caller: records are dropped (and counted) when the queue is full"""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Formatting is left to the listener thread, off the request path
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class BatchQueueListener(QueueListener):
+    """Queue listener flushing handlers and reporting dropped records once per batch of records"""
+    def __init__(self, log_queue, *handlers, queue_handler=None, batch_size=256):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.queue_handler = queue_handler
+        self.batch_size = batch_size
+        self._reported_dropped = 0
+        self._pending = 0
+
+    def handle(self, record):
+        super().handle(record)
+        self._pending += 1
+        # A batch ends when the queue is drained or batch_size records were handled
+        if self._pending >= self.batch_size or self.queue.empty():
+            self._end_batch()
+
+    def stop(self):
+        super().stop()
+        self._end_batch()
+
+    def _end_batch(self):
+        self._pending = 0
+        self._report_dropped()
+        for handler in self.handlers:
+            handler.flush_batch()
+
+    def _report_dropped(self):
+        if self.queue_handler is None:
+            return
+        dropped = self.queue_handler.dropped - self._reported_dropped
+        if dropped > 0:
+            self._reported_dropped += dropped
+            super().handle(logging.makeLogRecord({
+                "name": "loggerFactory",
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"{dropped} log records dropped, logging queue full",
+            }))
 
 class LoggerFactory:
     level: int
@@ -43,36 +145,84 @@ class LoggerFactory:
             pass
 
         self.level = level
-    
-    def get_logger(self, logger_name):
-        """Ensure logging is configured and return a logger."""
-        self.logger = logging.getLogger(logger_name)
-        file_handler = TimedRotatingFileHandler(
-            os.getenv("DEFAULT_LOG_FILE", "logs/windfire-security-server.log"), 
+        self.queue_handler = None
+        self.listener = None
+
+    def _start_pipeline(self):
+        """
+        Create the logging pipeline shared by all loggers: loggers put records on a bounded queue
+        and a single background thread owns the file and stream handlers.
+        """
+        file_handler = BatchFileHandler(
+            _log_file(),
             when=os.getenv("DEFAULT_LOG_ROTATION_WHEN", "midnight"), 
-            interval=1 / 86400, 
+            interval=1, 
             backupCount=7
         )
-        stream_handler = logging.StreamHandler()
-        #file_handler.setFormatter(JsonFormatter())
-        file_handler.setFormatter(ColorFormatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
-        stream_handler.setFormatter(ColorFormatter("%(asctime)s - %(levelname)s - %(name)s - %(message)s"))
-        self.logger.handlers = [file_handler]
+        # Structured output with LOG_FORMAT=json, colors only on terminals
+        json_format = os.getenv("LOG_FORMAT", "text").strip().lower() == "json"
+        text_format = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+        file_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(text_format))
+        handlers = [file_handler]
+        # Console output is opt-in (LOG_STREAM=true)
+        if os.getenv("LOG_STREAM", "false").strip().lower() in ("true", "1", "yes", "on"):
+            stream_handler = BatchStreamHandler()
+            if json_format:
+                stream_handler.setFormatter(JsonFormatter())
+            elif stream_handler.stream.isatty():
+                stream_handler.setFormatter(ColorFormatter(text_format))
+            else:
+                stream_handler.setFormatter(logging.Formatter(text_format))
+            handlers.append(stream_handler)
+
+        log_queue = queue.Queue(maxsize=_env_int("LOG_QUEUE_SIZE", 10000))
+        self.queue_handler = DroppingQueueHandler(log_queue)
+        self.listener = BatchQueueListener(
+            log_queue,
+            *handlers,
+            queue_handler=self.queue_handler,
+            batch_size=_env_int("LOG_BATCH_SIZE", 256)
+        )
+        self.listener.start()
+        # Write out queued records when the process exits
+        atexit.register(self.shutdown)
+
+    def get_logger(self, logger_name):
+        """Ensure logging is configured and return a logger."""
+        if self.queue_handler is None:
+            self._start_pipeline()
+        self.logger = logging.getLogger(logger_name)
+        self.logger.handlers = [self.queue_handler]
         #print(f"Logger level set to: {self.level} for logger '{logger_name}'")
         self.logger.setLevel(self.level)
         return self.logger
+
+    def get_stats(self):
+        """Return queued and dropped records counters of the logging pipeline."""
+        if self.queue_handler is None:
+            return {"queued": 0, "dropped": 0}
+        return {"queued": self.queue_handler.queue.qsize(), "dropped": self.queue_handler.dropped}
+
+    def shutdown(self):
+        """Stop the background thread after it has written out all queued records."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
         
 class JsonFormatter(logging.Formatter):
     def format(self, record):
         log_record = {
             "timestamp": self.formatTime(record, self.datefmt),
             "level": record.levelname,
+            "logger": record.name,
             "module": record.module,
             "funcName": record.funcName,
             "lineno": record.lineno,
             "message": record.getMessage(),
         }
-        return json.dumps(log_record)        
+        if record.exc_info:
+            log_record["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_record, default=str)        
 
 class ColorFormatter(logging.Formatter):
     COLORS = {
@@ -85,11 +235,56 @@ class ColorFormatter(logging.Formatter):
     RESET = '\033[0m'
 
     def format(self, record):
-        color = self.COLORS.get(record.levelname, self.RESET)
-        record.levelname = f"{color}{record.levelname}{self.RESET}"
-        return super().format(record)
+        # The record is shared by all handlers: restore the level name once formatted
+        levelname = record.levelname
+        color = self.COLORS.get(levelname, self.RESET)
+        record.levelname = f"{color}{levelname}{self.RESET}"
+        try:
+            return super().format(record)
+        finally:
+            record.levelname = levelname
+
+class LogSampler:
+    """Let through 1 of every N high-volume log lines (e.g. "endpoint called"), counted per route"""
+    def __init__(self, every=1, routes=None):
+        self.every = every
+        self.routes = routes or {}
+        self._counters = {}
+
+    def configure(self, every, routes):
+        """Set the sampling rates once settings are parsed (everything is logged until then)."""
+        self.every = every
+        self.routes = dict(routes)
+        self._counters = {}
+
+    @staticmethod
+    def parse_routes(value):
+        """
+        Parse per route rates, e.g. "/v1/security/verify=100,/v1/monitor/health=1000".
+        Raises ValueError on a malformed entry.
+        """
+        routes = {}
+        for item in value.split(","):
+            if not item.strip():
+                continue
+            route, _, every = item.partition("=")
+            if not route.strip() or not every.strip().isdigit() or int(every) < 1:
+                raise ValueError(f"{item.strip()!r}, expected route=N with N >= 1")
+            routes[route.strip()] = int(every)
+        return routes
+
+    def should_log(self, route):
+        """Return True if this occurrence of the route log line should be written."""
+        every = self.routes.get(route, self.every)
+        if every <= 1:
+            return True
+        counter = self._counters.get(route)
+        if counter is None:
+            counter = self._counters.setdefault(route, itertools.count())
+        return next(counter) % every == 0
     
 ##############################################
 ##### Initialize Logger Factory instance #####
 ##############################################
-logger_factory = LoggerFactory()
\ No newline at end of file
+logger_factory = LoggerFactory()
+log_sampler = LogSampler()
\ No newline at end of file
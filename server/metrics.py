@@ -0,0 +1,240 @@
+import asyncio
+import os
+import threading
+from bisect import bisect_left
+from typing import Dict, Any, Callable, Iterable, List, Tuple
+from config.settings import appSettings
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('metrics')
+
+# Latency buckets (seconds) shared by all duration histograms
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Seconds between event loop lag measurements
+EVENT_LOOP_LAG_INTERVAL = appSettings.metrics_loop_lag_interval
+
+# Last path segment of a Keycloak endpoint -> upstream operation name
+_UPSTREAM_OPERATIONS = {
+    'token': 'token',
+    'certs': 'jwks',
+    'introspect': 'introspect',
+    'userinfo': 'userinfo',
+    'revoke': 'revoke',
+    'logout': 'revoke',
+}
+
+def upstream_operation(url: str) -> str:
+    """
+    Get the operation name of a Keycloak endpoint
+
+    Args:
+        url: Keycloak endpoint URL
+
+    Returns:
+        One of token, jwks, introspect, userinfo, revoke or other
+    """
+    return _UPSTREAM_OPERATIONS.get(url.rstrip('/').rsplit('/', 1)[-1], 'other')
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _add_label(line: str, label: str) -> str:
+    """Add a label (name="value") to a sample line, leaving HELP/TYPE lines unchanged"""
+    if not line or line.startswith('#'):
+        return line
+    name, brace, rest = line.partition('{')
+    if brace and ' ' not in name:
+        return f"{name}{{{label},{rest}"
+    name, _, value = line.partition(' ')
+    return f"{name}{{{label}}} {value}"
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class _Metric:
+    """Base of metric families: samples keyed by label values, updated under a short per-family lock"""
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        lines = self.header()
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonic counter"""
+    kind = 'counter'
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    """Value going up and down"""
+    kind = 'gauge'
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    """Histogram with fixed buckets; each sample costs one bisect and two additions"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(labels)
+            if sample is None:
+                # Per-bucket counts (last one is +Inf) followed by the sum
+                sample = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            sample[index] += 1
+            sample[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(sample)) for labels, sample in self._values.items()]
+        lines = self.header()
+        for labels, sample in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), sample[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(sample[-1])}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Metric families and collectors rendered in the Prometheus text exposition format.
+    Values are kept per process: with several workers, each scrape reaches one of them,
+    so samples carry a pid label and dashboards sum them without it (e.g. sum without (pid)).
+    """
+    def __init__(self, worker_label: bool = False):
+        """
+        Initialize the registry
+
+        Args:
+            worker_label: Add the pid label of the serving worker process to every sample
+        """
+        self.worker_label = worker_label
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Register a metric family and return it"""
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        """Register a callable returning exposition lines computed at scrape time"""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics
+
+        Returns:
+            Metrics in the Prometheus text format (version 0.0.4)
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.error("Metrics collector failed: %s", e)
+        if self.worker_label:
+            # Read at scrape time: workers forked after import do not share the parent's pid
+            label = f'pid="{os.getpid()}"'
+            lines = [_add_label(line, label) for line in lines]
+        return '\n'.join(lines) + '\n'
+
+def _collect_caches() -> List[str]:
+    """Cache hit/miss counters, read from the cache statistics at scrape time"""
+    from cache.jwksCache import jwksCache
+    from cache.tokenCache import tokenCache
+    from cache.introspectionCache import introspectionCache
+    caches = {
+        'jwks': jwksCache.get_stats(),
+        'token': tokenCache.get_stats(),
+        'introspection': introspectionCache.get_stats(),
+    }
+    lines = []
+    for counter in ('hits', 'misses'):
+        name = f"cache_{counter}_total"
+        lines.append(f"# HELP {name} Cache {counter}")
+        lines.append(f"# TYPE {name} counter")
+        for cache, stats in caches.items():
+            lines.append(f'{name}{{cache="{cache}"}} {stats.get(counter, 0)}')
+    lines.append("# HELP log_records_dropped_total Log records dropped because the logging queue was full")
+    lines.append("# TYPE log_records_dropped_total counter")
+    lines.append(f"log_records_dropped_total {logger_factory.get_stats()['dropped']}")
+    return lines
+
+async def monitor_event_loop(interval: float = 0.5):
+    """
+    Measure event loop lag: how late a sleep of interval seconds wakes up.
+    Runs until cancelled.
+
+    Args:
+        interval: Seconds between measurements
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        eventLoopLag.set(lag)
+        eventLoopLagHistogram.observe(lag)
+
+###########################################
+##### Initialize metrics instances #####
+###########################################
+metricsRegistry = MetricsRegistry(worker_label=appSettings.api_workers > 1)
+httpRequests = metricsRegistry.register(Counter(
+    'http_requests_total', 'HTTP requests by route, method and status code', ('route', 'method', 'status')))
+httpRequestDuration = metricsRegistry.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route, method and status code', ('route', 'method', 'status')))
+httpRequestsInFlight = metricsRegistry.register(Gauge(
+    'http_requests_in_flight', 'HTTP requests being served'))
+keycloakRequestDuration = metricsRegistry.register(Histogram(
+    'keycloak_request_duration_seconds', 'Keycloak call latency by operation and outcome', ('operation', 'outcome')))
+keycloakRequestsInFlight = metricsRegistry.register(Gauge(
+    'keycloak_requests_in_flight', 'Keycloak calls in progress by operation', ('operation',)))
+eventLoopLag = metricsRegistry.register(Gauge(
+    'event_loop_lag_seconds', 'Last measured event loop lag'))
+eventLoopLagHistogram = metricsRegistry.register(Histogram(
+    'event_loop_lag_histogram_seconds', 'Event loop lag distribution'))
+metricsRegistry.add_collector(_collect_caches)
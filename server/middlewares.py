@@ -1,49 +1,170 @@
-from fastapi.requests import Request # pyright: ignore[reportMissingImports]
+import hmac
+import time
 from fastapi.responses import RedirectResponse # pyright: ignore[reportMissingImports]
-from apiRouter import api
-from config.settings import settings
+from fastapi.datastructures import URL # pyright: ignore[reportMissingImports]
+from config.settings import appSettings
+from metrics import httpRequests, httpRequestDuration, httpRequestsInFlight
+from serverTiming import (
+    phase, start_request, format_header, record_metrics,
+    SERVER_TIMING_ENABLED, SERVER_TIMING_TOKEN, SERVER_TIMING_REQUEST_HEADER
+)
 # Initialize logger at the top so it's available everywhere 
 from logger.loggerFactory import logger_factory
 logger = logger_factory.get_logger('middlewares')
 
 # =====> START - HTTPs enforcement middleware configuration <=====
-ENFORCE_HTTPS = settings.get('ENFORCE_HTTPS')
-async def https_enforcement_middleware(request: Request, call_next):
-    """
-    Custom middleware to enforce HTTPS with exceptions for health checks
-    """
-    logger.debug(f"Custom middleware to enforce HTTPS with exceptions for health checks")
-    # Skip HTTPS check for health endpoint (useful for load balancers)
-    if request.url.path == "/health":
-        logger.debug("Health check endpoint accessed, skipping HTTPS enforcement")
-        response = await call_next(request)
-        return response
-    
-    # Check if HTTPS enforcement is enabled
-    if ENFORCE_HTTPS == True:
-        # Check if request is HTTPS
+ENFORCE_HTTPS = appSettings.enforce_https
+# Security headers added to all responses, encoded once as ASGI header pairs
+SECURITY_HEADERS = [
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"x-xss-protection", b"1; mode=block"),
+]
+# Liveness and readiness probe paths (as mounted under /v1/monitor) skipping HTTPS enforcement
+# and security headers (useful for load balancers)
+HEALTH_PATHS = frozenset(["/v1/monitor/health", "/v1/monitor/ready"])
+
+class HttpsEnforcementMiddleware:
+    """
+    Pure ASGI middleware enforcing HTTPS with exceptions for health checks:
+    plain HTTP requests are redirected (307) to HTTPS and security headers are added to all responses
+    """
+    def __init__(self, app, enforce_https: bool = None):
+        self.app = app
+        self.enforce_https = ENFORCE_HTTPS if enforce_https is None else enforce_https
+
+    @staticmethod
+    def _is_https(scope) -> bool:
         # Note: When behind a proxy/load balancer, check X-Forwarded-Proto header
-        logger.debug(f"ENFORCE_HTTPS is {ENFORCE_HTTPS}. Checking if request is HTTPS ...")
-        is_https = (
-            request.url.scheme == "https" or
-            request.headers.get("x-forwarded-proto") == "https" or
-            request.headers.get("x-forwarded-ssl") == "on"
-        )
-        
-        if not is_https:
-            # Redirect HTTP to HTTPS
-            logger.debug(f"Request is not HTTPS, redirecting HTTP to HTTPS")
-            https_url = str(request.url).replace("http://", "https://", 1)
-            logger.warning(f"🔒 Redirecting HTTP to HTTPS: {request.url.path}")
-            return RedirectResponse(url=https_url, status_code=307)
-    
-    response = await call_next(request)
-    
-    # Add security headers to all responses
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    
-    return response
-# =====> END - HTTPs enforcement middleware configuration <=====
\ No newline at end of file
+        if scope["scheme"] == "https":
+            return True
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-proto" and value == b"https":
+                return True
+            if name == b"x-forwarded-ssl" and value == b"on":
+                return True
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # Fast path for health checks: no enforcement, no headers, no wrapping
+        if scope["path"] in HEALTH_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if self.enforce_https:
+            with phase("https"):
+                is_https = self._is_https(scope)
+            if not is_https:
+                # Redirect HTTP to HTTPS
+                url = URL(scope=scope)
+                logger.warning("🔒 Redirecting HTTP to HTTPS: %s", url.path)
+                response = RedirectResponse(url=str(url).replace("http://", "https://", 1), status_code=307)
+                await response(scope, receive, send)
+                return
+
+        # Time spent below this middleware (routing, body parsing, endpoint) until the response starts
+        app_phase = phase("app")
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                # Ended before the Server-Timing middleware builds its header from the phases
+                app_phase.stop()
+                message["headers"] = list(message.get("headers", [])) + SECURITY_HEADERS
+            await send(message)
+
+        with app_phase:
+            await self.app(scope, receive, send_with_headers)
+# =====> END - HTTPs enforcement middleware configuration <=====
+
+# =====> START - Metrics middleware configuration <=====
+def route_template(scope) -> str:
+    """
+    Get the path template of the route matched by a request (e.g. /v1/security/verify), or "unmatched"
+    """
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    template = getattr(route, "path_format", route.path)
+    # Routes of included routers usually carry their full prefixed path; when a FastAPI version
+    # only keeps the path below the router prefixes, take the missing prefix from the request path
+    segments = scope["path"].split("/")
+    missing = len(segments) - 1 - template.count("/")
+    if missing > 0 and ":path}" not in route.path:
+        return "/".join(segments[:missing + 1]) + template
+    return template
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count, latency and in-flight requests.
+    Requests are labelled with the matched route template, so path parameters do not create new series.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        httpRequestsInFlight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            httpRequestsInFlight.dec()
+            route_path = route_template(scope)
+            status = str(status_code)
+            httpRequests.inc(route_path, scope["method"], status)
+            httpRequestDuration.observe(elapsed, route_path, scope["method"], status)
+# =====> END - Metrics middleware configuration <=====
+
+# =====> START - Server-Timing middleware configuration <=====
+class ServerTimingMiddleware:
+    """
+    Pure ASGI middleware collecting the phases timed during a request.
+    Phases always feed the metrics; the Server-Timing header is added when SERVER_TIMING_ENABLED is set
+    or when the caller sends the trusted token in the SERVER_TIMING_REQUEST_HEADER header.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def _trusted_caller(scope) -> bool:
+        if SERVER_TIMING_TOKEN is None:
+            return False
+        for name, value in scope["headers"]:
+            if name == SERVER_TIMING_REQUEST_HEADER:
+                return hmac.compare_digest(value, SERVER_TIMING_TOKEN.encode())
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        phases = start_request()
+        start = time.perf_counter()
+        send_with_timing = send
+        if SERVER_TIMING_ENABLED or self._trusted_caller(scope):
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", format_header(phases, time.perf_counter() - start)))
+                    message = {**message, "headers": headers}
+                await send(message)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            record_metrics(phases)
+# =====> END - Server-Timing middleware configuration <=====
\ No newline at end of file
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, Field # pyright: ignore[reportMissingImports]
-from typing import Optional
+from typing import List, Optional
+from config.settings import appSettings
 
 # Pydantic models for Keycloak authentication requests and responses
 class KeycloakLoginRequest(BaseModel):
@@ -16,4 +17,24 @@ class KeycloakTokenResponse(BaseModel):
     scope: Optional[str] = None
 
 class KeycloakService(BaseModel):
-    service: str
\ No newline at end of file
+    service: str
+
+class TokenVerifyItem(BaseModel):
+    token: str = Field(..., description="Token to verify")
+    service: str = Field(..., description="Service")
+
+class TokenVerifyBatchRequest(BaseModel):
+    # Bounded at validation time, so oversized batches are rejected before their items are validated
+    items: List[TokenVerifyItem] = Field(
+        ..., max_length=appSettings.verify_batch_max_items, description="Tokens to verify"
+    )
+
+class TokenVerifyResult(BaseModel):
+    service: str
+    # "valid", "invalid" (rejected token) or "unavailable" (Keycloak unavailable, retry after retry_after seconds)
+    status: str
+    detail: Optional[str] = None
+    retry_after: Optional[int] = None
+
+class TokenVerifyBatchResponse(BaseModel):
+    results: List[TokenVerifyResult]
\ No newline at end of file
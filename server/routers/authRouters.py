@@ -1,14 +1,33 @@
+from typing import Optional
 from fastapi import HTTPException, status, Depends # pyright: ignore[reportMissingImports]
+from fastapi.requests import Request # pyright: ignore[reportMissingImports]
+from fastapi.responses import Response # pyright: ignore[reportMissingImports]
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials # pyright: ignore[reportMissingImports]
 from fastapi.routing import APIRouter # pyright: ignore[reportMissingImports]
-from keycloakAuth import KeycloakAuthError, authenticate_user, verify_token
-from models.keycloakModels import KeycloakLoginRequest, KeycloakTokenResponse, KeycloakService
+from keycloakAuth import KeycloakAuthError, KeycloakUnavailableError, resolve_token_service
+from asyncKeycloakAuth import authenticate_user_async, verify_token_async, verify_tokens_async
+from config.settings import appSettings
+from config.service_config_reader import serviceConfig
+from fastResponses import json_response, VALID_TOKEN_BODY
+from serverTiming import phase
+from jwksPublisher import jwksPublisher, etag_matches, JWKS_MEDIA_TYPE
+from forwardAuth import (
+    bearer_token, claim_headers, cache_control, token_targets_client,
+    DENY_HEADERS, FORWARD_AUTH_SERVICE_HEADER, FORWARD_AUTH_RESOLVE_SERVICE
+)
+from models.keycloakModels import (
+    KeycloakLoginRequest, KeycloakTokenResponse, KeycloakService,
+    TokenVerifyBatchRequest, TokenVerifyBatchResponse, TokenVerifyResult
+)
 # Initialize logger at the top so it's available everywhere 
-from logger.loggerFactory import logger_factory
+from logger.loggerFactory import logger_factory, log_sampler
 logger = logger_factory.get_logger('authRouters')
 
 router = APIRouter(prefix="/security", tags=["Security APIs"])
 
+# Batch verification limit (the batch size is bounded by TokenVerifyBatchRequest)
+VERIFY_BATCH_CONCURRENCY = appSettings.verify_batch_concurrency
+
 # Instantiates FastAPI’s HTTPBearer dependency 
 # It extracts a Bearer token from the Authorization header of incoming requests. 
 security = HTTPBearer()
@@ -25,37 +44,46 @@ async def keycloak_login(login_request: KeycloakLoginRequest):
     Returns:
         Access token and refresh token
     """
-    logger.info(f"====> /v1/security/auth endpoint called for service: {login_request.service} <====")
-    logger.debug(f"---> Function keycloak_login() called <---")
-    logger.info(f"Keycloak login attempt for user {login_request.username} for service {login_request.service}")
+    if log_sampler.should_log("/v1/security/auth"):
+        logger.info("====> /v1/security/auth endpoint called for service: %s <====", login_request.service)
+    logger.debug("---> Function keycloak_login() called <---")
+    logger.info("Keycloak login attempt for user %s for service %s", login_request.username, login_request.service)
     try:
         # Authenticate with Keycloak
-        logger.debug(f"---> Calling keycloakAuth authenticate_user() function <---")
-        token_response = authenticate_user(
+        logger.debug("---> Calling asyncKeycloakAuth authenticate_user_async() function <---")
+        token_response = await authenticate_user_async(
             login_request.username,
             login_request.password,
             login_request.service
         )
         
-        logger.info(f"User {login_request.username} authenticated successfully for {login_request.service} service with Keycloak")
+        logger.info("User %s authenticated successfully for %s service with Keycloak", login_request.username, login_request.service)
         
-        return KeycloakTokenResponse(
+        # Validated once here and serialized by Pydantic: returning the model would validate it again as response_model
+        return json_response(KeycloakTokenResponse(
             access_token=token_response.get('access_token'),
             token_type="Bearer",
             expires_in=token_response.get('expires_in', 0),
             refresh_token=token_response.get('refresh_token'),
             refresh_expires_in=token_response.get('refresh_expires_in'),
             scope=token_response.get('scope')
-        )
+        ).model_dump_json().encode())
         
+    except KeycloakUnavailableError as e:
+        logger.warning("Keycloak unavailable, failing fast authentication for user %s", login_request.username)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service temporarily unavailable",
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except KeycloakAuthError as e:
-        logger.warning(f"Keycloak authentication failed for user {login_request.username}: {str(e)}")
+        logger.warning("Keycloak authentication failed for user %s: %s", login_request.username, e)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
         )
     except Exception as e:
-        logger.error(f"Keycloak authentication error: {str(e)}")
+        logger.error("Keycloak authentication error: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Authentication error"
@@ -65,13 +93,165 @@ async def keycloak_login(login_request: KeycloakLoginRequest):
 async def verify(tokenValidate: KeycloakService, credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         service = tokenValidate.service
-        logger.info(f"====> /v1/security/verify endpoint called for service: {tokenValidate.service} <====")
-        logger.debug(f"---> Function verify() called <---")
-        logger.debug(f"---> Calling keycloakAuth verify_token() function <---")
-        token_claims = verify_token(credentials.credentials, service=service, method='local')
-        return {"status": "valid"}
+        if log_sampler.should_log("/v1/security/verify"):
+            logger.info("====> /v1/security/verify endpoint called for service: %s <====", service)
+        logger.debug("---> Function verify() called <---")
+        logger.debug("---> Calling asyncKeycloakAuth verify_token_async() function <---")
+        await verify_token_async(credentials.credentials, service=service, method='local')
+        return json_response(VALID_TOKEN_BODY)
+    except KeycloakUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+@router.get("/verify")
+async def verify_from_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    Verify a token without request body: the service is resolved from the token
+    issuer (iss) and authorized party (azp) claims
+    
+    Args:
+        credentials: Bearer token
+        
+    Returns:
+        {"status": "valid"}
+    """
+    try:
+        with phase('service_resolve'):
+            service = resolve_token_service(credentials.credentials)
+        if log_sampler.should_log("/v1/security/verify"):
+            logger.info("====> GET /v1/security/verify endpoint called, resolved service: %s <====", service)
+        await verify_token_async(credentials.credentials, service=service, method='local')
+        return json_response(VALID_TOKEN_BODY)
+    except KeycloakUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail=str(e))
+
+@router.get("/forward-auth")
+@router.get("/forward-auth/{service}")
+async def forward_auth(request: Request, service: Optional[str] = None):
+    """
+    Forward-auth endpoint for reverse proxies (nginx auth_request, Traefik forwardAuth).
+    The target service comes from the path or the FORWARD_AUTH_SERVICE_HEADER header, both set by the proxy
+    (the proxy must not pass the header through from the client), or with FORWARD_AUTH_RESOLVE_SERVICE
+    from the token issuer and azp. The token must be valid and issued to or for the service client (azp or aud).
+    Allowed requests get 200 with the configured claims as headers and a Cache-Control max-age
+    bounded by the token lifetime (proxies caching decisions must key them on the Authorization header).
+    Denied requests get 401 with Cache-Control no-store. Responses have no body.
+    
+    Args:
+        request: Incoming request (Authorization and service headers)
+        service: Name of the target service
+        
+    Returns:
+        Empty 200, 401 or 503 response
+    """
+    token = bearer_token(request.headers.get("authorization"))
+    if token is None:
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers=DENY_HEADERS)
+    service = service or request.headers.get(FORWARD_AUTH_SERVICE_HEADER)
+    if not service and not FORWARD_AUTH_RESOLVE_SERVICE:
+        logger.debug("Forward-auth denied: no target service in path or %s header", FORWARD_AUTH_SERVICE_HEADER)
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers=DENY_HEADERS)
+    try:
+        if not service:
+            with phase('service_resolve'):
+                service = resolve_token_service(token)
+        if log_sampler.should_log("/v1/security/forward-auth"):
+            logger.info("====> /v1/security/forward-auth endpoint called for service: %s <====", service)
+        claims = await verify_token_async(token, service=service, method='local')
+        # A valid token of another client of the realm does not grant access to this service
+        if not token_targets_client(claims, serviceConfig.get_service(service).client_id):
+            raise KeycloakAuthError(f"Token was not issued for service {service}")
+    except KeycloakUnavailableError as e:
+        return Response(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            headers={"retry-after": str(e.retry_after), "cache-control": "no-store"}
+        )
+    except Exception as e:
+        logger.debug("Forward-auth denied for service %s: %s", service, e)
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers=DENY_HEADERS)
+    headers = claim_headers(claims)
+    headers["x-auth-service"] = service
+    headers["cache-control"] = cache_control(claims)
+    headers["vary"] = "Authorization"
+    return Response(status_code=status.HTTP_200_OK, headers=headers)
+
+@router.get("/jwks")
+@router.get("/jwks/{service}")
+async def jwks(request: Request, service: Optional[str] = None):
+    """
+    Publish the cached JWKS of all configured realms merged, or of the realm of one service,
+    so resource servers can verify tokens in-process and only poll for key changes.
+    Served from the realm JWKS cache, with a strong ETag (If-None-Match answered with 304)
+    and a Cache-Control max-age bounded by the cache freshness.
+    
+    Args:
+        request: Incoming request (If-None-Match header)
+        service: Name of the service (all realms if not provided)
+        
+    Returns:
+        JWK Set document, or empty 304 response
+    """
+    if log_sampler.should_log("/v1/security/jwks"):
+        logger.info("====> /v1/security/jwks endpoint called for service: %s <====", service)
+    realm_services = jwksPublisher.realm_services(service)
+    if realm_services is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Service '{service}' not found")
+    try:
+        body, etag, max_age = await jwksPublisher.document(realm_services)
+    except KeycloakUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except Exception as e:
+        logger.error("JWKS not available: %s", e)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="JWKS not available")
+    headers = {"etag": etag, "cache-control": f"public, max-age={max_age}"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type=JWKS_MEDIA_TYPE, headers=headers)
+
+@router.post("/verify/batch", response_model=TokenVerifyBatchResponse)
+async def verify_batch(batch: TokenVerifyBatchRequest):
+    """
+    Verify many tokens in one call
+    
+    Args:
+        batch: list of token and service pairs
+        
+    Returns:
+        Per-item verification results, in request order: tokens that could not be verified because
+        Keycloak is unavailable are reported as "unavailable" with a retry_after, not as "invalid"
+    """
+    if log_sampler.should_log("/v1/security/verify/batch"):
+        logger.info("====> /v1/security/verify/batch endpoint called for %d tokens <====", len(batch.items))
+    outcomes = await verify_tokens_async(
+        [(item.token, item.service) for item in batch.items],
+        concurrency=VERIFY_BATCH_CONCURRENCY
+    )
+    results = []
+    for item, outcome in zip(batch.items, outcomes):
+        if isinstance(outcome, KeycloakUnavailableError):
+            results.append(TokenVerifyResult(
+                service=item.service, status="unavailable", detail=str(outcome), retry_after=outcome.retry_after
+            ))
+        elif isinstance(outcome, Exception):
+            results.append(TokenVerifyResult(service=item.service, status="invalid", detail=str(outcome)))
+        else:
+            results.append(TokenVerifyResult(service=item.service, status="valid"))
+    return TokenVerifyBatchResponse(results=results)
 # ###############################################################
 # ########### END - Keycloak Authentication endpoints ###########
 # ###############################################################
\ No newline at end of file
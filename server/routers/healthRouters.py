@@ -1,11 +1,22 @@
 from fastapi.routing import APIRouter # pyright: ignore[reportMissingImports]
-from config.settings import settings
+from fastapi.requests import Request # pyright: ignore[reportMissingImports]
+from fastapi.responses import JSONResponse, PlainTextResponse # pyright: ignore[reportMissingImports]
+from config.settings import appSettings
+from cache.jwksCache import jwksCache
+from cache.keyStore import keyStore
+from cache.tokenCache import tokenCache
+from cache.introspectionCache import introspectionCache
+from circuitBreaker import circuitBreakers
+from metrics import metricsRegistry
+from fastResponses import json_bytes, json_response
 # Initialize logger at the top so it's available everywhere 
-from logger.loggerFactory import logger_factory
+from logger.loggerFactory import logger_factory, log_sampler
 logger = logger_factory.get_logger('healthRouters')
 
-SERVICE_NAME = settings.get('APP_NAME')
+SERVICE_NAME = appSettings.app_name
 router = APIRouter(prefix="/monitor", tags=["Monitor APIs"])
+# Constant part of the health response, encoded once: only the circuit states are encoded per probe
+HEALTH_BODY_PREFIX = json_bytes({"status": "healthy", "service": SERVICE_NAME})[:-1] + b',"circuits":'
 
 # Health check endpoint
 @router.get("/health")
@@ -13,5 +24,43 @@ async def health_check():
     """
     Health check endpoint
     """
-    logger.info("====> /v1/monitor/health endpoint called <====")
-    return {"status": "healthy", "service": SERVICE_NAME}
\ No newline at end of file
+    if log_sampler.should_log("/v1/monitor/health"):
+        logger.info("====> /v1/monitor/health endpoint called <====")
+    return json_response(HEALTH_BODY_PREFIX + json_bytes(circuitBreakers.snapshot()) + b"}")
+
+# Readiness endpoint
+@router.get("/ready")
+async def readiness_check(request: Request):
+    """
+    Readiness endpoint, not ready until startup warm-up completes
+    """
+    if log_sampler.should_log("/v1/monitor/ready"):
+        logger.info("====> /v1/monitor/ready endpoint called <====")
+    if not getattr(request.app.state, 'ready', False):
+        return JSONResponse(status_code=503, content={"status": "not ready", "service": SERVICE_NAME})
+    return {"status": "ready", "service": SERVICE_NAME, "warmup": request.app.state.warmup}
+
+# Cache statistics endpoint
+@router.get("/cache")
+async def cache_stats():
+    """
+    Cache statistics endpoint
+    """
+    if log_sampler.should_log("/v1/monitor/cache"):
+        logger.info("====> /v1/monitor/cache endpoint called <====")
+    return {
+        "jwks": jwksCache.get_stats(),
+        "keys": keyStore.get_stats(),
+        "tokens": tokenCache.get_stats(),
+        "introspection": introspectionCache.get_stats(),
+    }
+
+# Prometheus metrics endpoint
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Metrics endpoint in the Prometheus text exposition format.
+    Metrics are those of the worker process serving the scrape: with API_WORKERS > 1,
+    samples carry a pid label and are aggregated with sum without (pid)
+    """
+    return PlainTextResponse(metricsRegistry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,92 @@
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+from config.settings import appSettings
+from metrics import metricsRegistry, Histogram
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('serverTiming')
+
+# Phases (name, seconds) of the current request, None outside of a timed request
+_phases: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('server_timing_phases', default=None)
+
+class _Phase:
+    """Context manager adding the time spent in its block to the current request phases"""
+    __slots__ = ('name', 'phases', 'start')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.phases = _phases.get()
+        self.start = None
+
+    def __enter__(self):
+        if self.phases is not None:
+            self.start = time.perf_counter()
+        return self
+
+    def stop(self):
+        """End the phase before its block exits (e.g. when the response starts), later calls do nothing"""
+        if self.start is not None:
+            self.phases.append((self.name, time.perf_counter() - self.start))
+            self.start = None
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+def phase(name: str) -> _Phase:
+    """
+    Time a step of the current request, e.g. `with phase('jwks'): ...`.
+    Outside of a timed request this costs one context variable lookup.
+
+    Args:
+        name: Phase name reported in the Server-Timing header and metrics
+
+    Returns:
+        Context manager timing its block
+    """
+    return _Phase(name)
+
+def start_request() -> List[Tuple[str, float]]:
+    """
+    Start timing phases for the current request (called by the middleware).
+    Tasks and threads started by the request inherit the context, so they append to the same list.
+
+    Returns:
+        The list collecting the request phases
+    """
+    phases = []
+    _phases.set(phases)
+    return phases
+
+def format_header(phases: List[Tuple[str, float]], total: float) -> bytes:
+    """
+    Build a Server-Timing header value, durations in milliseconds, repeated phases summed
+
+    Args:
+        phases: Phases of the request
+        total: Total time spent in the server
+
+    Returns:
+        Header value, e.g. b"jwks;dur=0.120, verify;dur=0.310, total;dur=1.200"
+    """
+    durations = {}
+    for name, seconds in phases:
+        durations[name] = durations.get(name, 0.0) + seconds
+    durations['total'] = total
+    return ', '.join(f"{name};dur={seconds * 1000:.3f}" for name, seconds in durations.items()).encode('latin-1')
+
+def record_metrics(phases: List[Tuple[str, float]]):
+    """Feed the phases of a finished request into the phase duration histogram"""
+    for name, seconds in phases:
+        requestPhaseDuration.observe(seconds, name)
+
+##############################################
+##### Initialize Server-Timing settings #####
+##############################################
+# Header added to every response, or only when the caller sends the trusted token header
+SERVER_TIMING_ENABLED = appSettings.server_timing_enabled
+SERVER_TIMING_TOKEN = appSettings.server_timing_token
+SERVER_TIMING_REQUEST_HEADER = appSettings.server_timing_request_header.lower().encode('latin-1')
+requestPhaseDuration = metricsRegistry.register(Histogram(
+    'request_phase_duration_seconds', 'Time spent in request phases (Server-Timing)', ('phase',)))
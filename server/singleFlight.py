@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from typing import Dict, Any, Callable, Awaitable, Hashable, Tuple
+# Initialize logger at the top so it's available everywhere
+from logger.loggerFactory import logger_factory
+logger = logger_factory.get_logger('singleFlight')
+
+class _Call:
+    """In-flight call shared by a leader thread and its waiters"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent identical calls made from threads into one execution"""
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {'executions': 0, 'coalesced': 0}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check if a call for key is currently running"""
+        return key in self._calls
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers using the same key
+
+        Args:
+            key: Identity of the call
+            fn: Function to execute
+
+        Returns:
+            The result of fn, shared by all callers
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._stats['executions'] += 1
+            else:
+                self._stats['coalesced'] += 1
+        if not leader:
+            logger.debug(f"Joining in-flight call {key}")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get executions and coalesced calls counters"""
+        with self._lock:
+            return dict(self._stats)
+
+class AsyncSingleFlight:
+    """Coalesce concurrent identical coroutine calls into one task"""
+    def __init__(self):
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+        self._stats = {'executions': 0, 'coalesced': 0}
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check if a call for key is currently running on the current event loop"""
+        return (id(asyncio.get_running_loop()), key) in self._tasks
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn once for all concurrent callers using the same key.
+        The call runs as its own task, so a cancelled caller does not cancel it for the others.
+
+        Args:
+            key: Identity of the call
+            fn: Coroutine function to execute
+
+        Returns:
+            The result of fn, shared by all callers
+
+        Raises:
+            Exception: Whatever fn raised, re-raised in every caller
+        """
+        # Tasks are bound to their event loop
+        task_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[task_key] = task
+            task.add_done_callback(lambda done: self._forget(task_key, done))
+            self._stats['executions'] += 1
+        else:
+            logger.debug(f"Joining in-flight call {key}")
+            self._stats['coalesced'] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, task_key: Tuple[int, Hashable], task: asyncio.Task):
+        """Drop a finished task, marking its exception as retrieved if every caller went away"""
+        self._tasks.pop(task_key, None)
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get executions and coalesced calls counters"""
+        return dict(self._stats)
+
+############################################
+##### Initialize single flight instances #####
+############################################
+singleFlight = SingleFlight()
+asyncSingleFlight = AsyncSingleFlight()
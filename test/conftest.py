@@ -0,0 +1,41 @@
+"""
+Unit tests of the Windfire Security server components.
+
+Server modules create their singletons (settings, service configuration, caches) on import,
+so the environment they read is prepared here, before any test module imports them:
+a scratch working directory holding a service configuration and the logs directory,
+and the settings the server requires.
+
+Usage (from the repository root):
+    python3 -m pytest test
+"""
+import json
+import os
+import sys
+import tempfile
+
+SERVER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server')
+sys.path.insert(0, SERVER_DIR)
+
+WORK_DIR = tempfile.mkdtemp(prefix='windfire-security-test-')
+os.makedirs(os.path.join(WORK_DIR, 'config'))
+os.makedirs(os.path.join(WORK_DIR, 'logs'))
+with open(os.path.join(WORK_DIR, 'config', 'service_config.json'), 'w') as f:
+    json.dump({"services": {
+        "svc-a": {"realm": "realm-1", "client_id": "client-a", "client_secret": "secret-a"},
+        "svc-b": {"realm": "realm-1", "client_id": "client-b", "client_secret": "secret-b"},
+        "svc-c": {"realm": "realm-2", "client_id": "client-c", "client_secret": "secret-c"},
+    }}, f)
+os.chdir(WORK_DIR)
+
+# Explicit values win over a local .env (load_dotenv never overrides the environment)
+os.environ.update({
+    'ALLOWED_HOSTS': 'localhost,testserver',
+    'KEYCLOAK_SERVER_URL': 'http://keycloak.test',
+    'ENFORCE_HTTPS': 'false',
+    'API_WORKERS': '1',
+    'CACHE_BACKEND': 'memory',
+    'JWKS_SNAPSHOT_MAX_AGE': '0',
+    'LOG_LEVEL': 'WARNING',
+    'LOG_STREAM': 'false',
+})
@@ -0,0 +1,72 @@
+"""
+Local stand-in for the Keycloak endpoints the server calls: a RSA signing key, the realm JWKS
+served through an httpx mock transport, and tokens signed like Keycloak access tokens.
+"""
+import base64
+import time
+from typing import Any, Dict, List
+import httpx # pyright: ignore[reportMissingImports]
+import jwt # pyright: ignore[reportMissingImports]
+from cryptography.hazmat.primitives.asymmetric import rsa # pyright: ignore[reportMissingImports]
+import asyncKeycloakAuth
+import keycloakAuth
+import jwksPublisher
+from circuitBreaker import CircuitBreakerRegistry
+from keycloakAuth import KeycloakHttpConfig
+from cache.jwksCache import jwksCache
+from cache.tokenCache import tokenCache
+
+SERVER_URL = 'http://keycloak.test'
+
+def _b64_uint(value: int) -> str:
+    return base64.urlsafe_b64encode(value.to_bytes((value.bit_length() + 7) // 8, 'big')).rstrip(b'=').decode()
+
+class KeycloakStandIn:
+    def __init__(self, kid: str = 'test-key'):
+        self.kid = kid
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        numbers = self.key.public_key().public_numbers()
+        self.jwks = {"keys": [{"kid": kid, "kty": "RSA", "alg": "RS256", "use": "sig",
+                               "n": _b64_uint(numbers.n), "e": _b64_uint(numbers.e)}]}
+        # Requests received, as "METHOD path"
+        self.requests: List[str] = []
+        # Set to answer every request with 503, like Keycloak during an outage
+        self.down = False
+        self._realms = set()
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(f"{request.method} {request.url.path}")
+        if self.down:
+            return httpx.Response(503)
+        if request.url.path.endswith('/protocol/openid-connect/certs'):
+            self._realms.add(request.url.path.split('/')[2])
+            return httpx.Response(200, json=self.jwks, headers={'cache-control': 'max-age=60'})
+        return httpx.Response(404)
+
+    def install(self, monkeypatch) -> 'asyncKeycloakAuth.AsyncKeycloakClientRegistry':
+        """Replace the async client registry by one talking to this stand-in, without retry delays and with fresh circuits"""
+        registry = asyncKeycloakAuth.AsyncKeycloakClientRegistry(http_config=KeycloakHttpConfig(backoff_factor=0))
+        registry._http_client = httpx.AsyncClient(transport=httpx.MockTransport(self._handle))
+        monkeypatch.setattr(asyncKeycloakAuth, 'asyncKeycloakRegistry', registry)
+        monkeypatch.setattr(jwksPublisher, 'asyncKeycloakRegistry', registry)
+        breakers = CircuitBreakerRegistry()
+        monkeypatch.setattr(asyncKeycloakAuth, 'circuitBreakers', breakers)
+        monkeypatch.setattr(keycloakAuth, 'circuitBreakers', breakers)
+        return registry
+
+    def reset(self):
+        """Bring the stand-in back up, forget the requests received and drop the realm keys and verified tokens cached from it"""
+        self.down = False
+        self.requests.clear()
+        for realm in self._realms:
+            jwksCache.invalidate(realm)
+        tokenCache.clear()
+
+    def token(self, realm: str = 'realm-1', client_id: str = 'client-a', ttl: float = 300, **claims: Any) -> str:
+        """Sign an access token issued by realm to client_id (azp), claims overriding the defaults"""
+        payload: Dict[str, Any] = {
+            'iss': f"{SERVER_URL}/realms/{realm}", 'azp': client_id, 'aud': 'account',
+            'sub': 'user-id', 'preferred_username': 'user', 'exp': int(time.time() + ttl),
+        }
+        payload.update(claims)
+        return jwt.encode(payload, self.key, algorithm='RS256', headers={'kid': self.kid})
@@ -0,0 +1,140 @@
+"""
+Local stand-in for a Redis protocol (RESP2) server, implementing the commands RedisBackend sends:
+AUTH, SELECT, PING, GET, SET (with PX), DEL and SCAN (with MATCH and COUNT).
+It runs an asyncio server in a background thread, so the blocking backend client can talk to it.
+"""
+import asyncio
+import fnmatch
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+class RespStandIn:
+    def __init__(self, password: str = None):
+        self.password = password
+        self.port = None
+        # Database number -> key -> (value, expiry as monotonic time or None, insertion sequence)
+        self.databases: Dict[int, Dict[bytes, Tuple[bytes, Optional[float], int]]] = {}
+        self._sequence = 0
+        # Commands received, as lists of bytes
+        self.commands: List[List[bytes]] = []
+        self.connections = 0
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._writers = set()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self) -> 'RespStandIn':
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result(5)
+        return self
+
+    async def _start(self):
+        self._server = await asyncio.start_server(self._serve, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    async def _stop(self):
+        self._server.close()
+        self.drop_connections()
+        await self._server.wait_closed()
+
+    def drop_connections(self):
+        """Close every client connection (the next command of a client fails on a broken socket)"""
+        for writer in list(self._writers):
+            writer.close()
+
+    def disconnect_all(self):
+        """Thread safe drop_connections()"""
+        self._loop.call_soon_threadsafe(self.drop_connections)
+
+    def keys(self, db: int = 0) -> List[bytes]:
+        now = time.monotonic()
+        return sorted(key for key, (_, expires_at, _) in self.databases.get(db, {}).items()
+                      if expires_at is None or expires_at > now)
+
+    async def _read_command(self, reader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            raise ValueError(f"inline commands are not supported: {line!r}")
+        args = []
+        for _ in range(int(line[1:-2])):
+            header = await reader.readline()
+            if not header.startswith(b'$'):
+                raise ValueError(f"bulk string expected: {header!r}")
+            data = await reader.readexactly(int(header[1:-2]) + 2)
+            args.append(data[:-2])
+        return args
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        state = {'db': 0, 'authenticated': self.password is None}
+        try:
+            while True:
+                try:
+                    args = await self._read_command(reader)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                if args is None:
+                    return
+                self.commands.append(args)
+                writer.write(self._execute(args, state))
+                await writer.drain()
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _execute(self, args: List[bytes], state: dict) -> bytes:
+        command = args[0].upper()
+        if command == b'AUTH':
+            if args[1].decode() != self.password:
+                return b'-WRONGPASS invalid password\r\n'
+            state['authenticated'] = True
+            return b'+OK\r\n'
+        if not state['authenticated']:
+            return b'-NOAUTH Authentication required.\r\n'
+        if command == b'SELECT':
+            state['db'] = int(args[1])
+            return b'+OK\r\n'
+        if command == b'PING':
+            return b'+PONG\r\n'
+        db = self.databases.setdefault(state['db'], {})
+        now = time.monotonic()
+        for key in [key for key, (_, expires_at, _) in db.items() if expires_at is not None and expires_at <= now]:
+            del db[key]
+        if command == b'GET':
+            entry = db.get(args[1])
+            if entry is None:
+                return b'$-1\r\n'
+            return b'$%d\r\n%s\r\n' % (len(entry[0]), entry[0])
+        if command == b'SET':
+            expires_at = None
+            options = [arg.upper() for arg in args[3:]]
+            if b'PX' in options:
+                expires_at = now + int(args[3 + options.index(b'PX') + 1]) / 1000
+            self._sequence += 1
+            db[args[1]] = (args[2], expires_at, self._sequence)
+            return b'+OK\r\n'
+        if command == b'DEL':
+            return b':%d\r\n' % sum(1 for key in args[1:] if db.pop(key, None) is not None)
+        if command == b'SCAN':
+            # Pages of COUNT keys in insertion order, the cursor being the sequence of the next key:
+            # like Redis, keys present during the whole scan are returned even if others are deleted
+            options = [arg.upper() for arg in args[2:]]
+            pattern = args[2 + options.index(b'MATCH') + 1].decode() if b'MATCH' in options else '*'
+            count = int(args[2 + options.index(b'COUNT') + 1]) if b'COUNT' in options else 10
+            cursor = int(args[1])
+            keys = sorted((sequence, key) for key, (_, _, sequence) in db.items() if sequence >= cursor)
+            page = [key for _, key in keys[:count] if fnmatch.fnmatchcase(key.decode(), pattern)]
+            following = keys[count][0] if len(keys) > count else 0
+            reply = [b'*2\r\n', b'$%d\r\n%d\r\n' % (len(str(following)), following), b'*%d\r\n' % len(page)]
+            reply += [b'$%d\r\n%s\r\n' % (len(key), key) for key in page]
+            return b''.join(reply)
+        return b'-ERR unknown command\r\n'
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import threading
+import time
+import pytest # pyright: ignore[reportMissingImports]
+from respStandIn import RespStandIn
+from cache.cacheBackend import (
+    CacheBackend, CacheBackendError, MemoryBackend, SharedMemoryBackend, RedisBackend, default_shm_directory
+)
+from cache.jwksCache import JwksCache
+from cache.tokenCache import TokenCache
+
+JWKS = {"keys": [{"kid": "key-1", "kty": "RSA", "n": "AQAB", "e": "AQAB"}]}
+
+@pytest.fixture
+def resp_server():
+    server = RespStandIn().start()
+    yield server
+    server.stop()
+
+def redis_backend(server: RespStandIn, **kwargs) -> RedisBackend:
+    return RedisBackend(url=f"redis://127.0.0.1:{server.port}/0", prefix='test:', **kwargs)
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Incomplete(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_memory_backend_expires_entries():
+    backend = MemoryBackend(max_entries=10)
+    backend.set('a', {'v': 1}, 0.05)
+    assert backend.get('a') == {'v': 1}
+    time.sleep(0.06)
+    assert backend.get('a') is None
+    assert backend.get_stats()['expirations'] == 1
+
+def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryBackend(max_entries=2)
+    backend.set('a', 1, 60)
+    backend.set('b', 2, 60)
+    assert backend.get('a') == 1
+    backend.set('c', 3, 60)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1 and backend.get('c') == 3
+    assert backend.get_stats()['evictions'] == 1
+
+def test_memory_backend_bounds_estimated_bytes():
+    backend = MemoryBackend(max_entries=100, max_bytes=1000)
+    for index in range(10):
+        backend.set(f'k{index}', 'x' * 100, 60)
+    stats = backend.get_stats()
+    assert stats['bytes'] <= 1000
+    assert stats['entries'] < 10
+    assert backend.get('k9') == 'x' * 100
+    # A value larger than the whole budget is not cached
+    backend.set('huge', 'x' * 2000, 60)
+    assert backend.get('huge') is None
+
+def test_shm_backend_is_shared_between_instances(tmp_path):
+    writer = SharedMemoryBackend(directory=str(tmp_path))
+    reader = SharedMemoryBackend(directory=str(tmp_path))
+    writer.set('a', {'v': 1}, 60)
+    writer.set('short', 1, 0.05)
+    assert reader.get('a') == {'v': 1}
+    reader.delete('a')
+    assert writer.get('a') is None
+    time.sleep(0.06)
+    assert reader.get('short') is None
+
+def test_shm_backend_creates_a_private_directory(tmp_path):
+    backend = SharedMemoryBackend(directory=str(tmp_path / 'cache'))
+    assert os.stat(backend.directory).st_mode & 0o777 == 0o700
+
+def test_default_shm_directory_is_per_user(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_RUNTIME_DIR', str(tmp_path))
+    assert default_shm_directory() == str(tmp_path / 'windfire-security')
+    monkeypatch.delenv('XDG_RUNTIME_DIR')
+    assert default_shm_directory().endswith(f'windfire-security-{os.getuid()}')
+
+def test_shm_backend_refuses_a_directory_open_to_other_users(tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir()
+    directory.chmod(0o777)
+    with pytest.raises(CacheBackendError, match='accessible to other users'):
+        SharedMemoryBackend(directory=str(directory))
+
+@pytest.mark.skipif(os.getuid() != 0, reason="changing the owner of a directory requires root")
+def test_shm_backend_refuses_a_directory_of_another_user(tmp_path):
+    directory = tmp_path / 'cache'
+    directory.mkdir(mode=0o700)
+    os.chown(directory, 65534, 65534)
+    with pytest.raises(CacheBackendError, match='owned by uid 65534'):
+        SharedMemoryBackend(directory=str(directory))
+
+def test_shm_backend_refuses_a_symlinked_directory(tmp_path):
+    target = tmp_path / 'target'
+    target.mkdir(mode=0o700)
+    (tmp_path / 'cache').symlink_to(target)
+    with pytest.raises(CacheBackendError, match='not a directory'):
+        SharedMemoryBackend(directory=str(tmp_path / 'cache'))
+
+def test_shm_backend_sweep_keeps_max_entries(tmp_path):
+    backend = SharedMemoryBackend(directory=str(tmp_path), max_entries=3, sweep_every=1000)
+    for index in range(5):
+        backend.set(f'k{index}', index, 60 + index)
+    backend.set('expired', 0, 0.01)
+    time.sleep(0.02)
+    backend.sweep()
+    # Expired first, then the entries expiring soonest
+    assert [backend.get(f'k{index}') for index in range(5)] == [None, None, 2, 3, 4]
+    assert backend.get_stats()['expirations'] == 1
+    assert backend.get_stats()['evictions'] == 2
+
+def test_redis_backend_round_trip(resp_server):
+    backend = redis_backend(resp_server)
+    backend.set('a', {'claims': ['x', 'y']}, 1.5)
+    assert backend.get('a') == {'claims': ['x', 'y']}
+    assert backend.get('missing') is None
+    assert resp_server.keys() == [b'test:a']
+    assert resp_server.commands[0] == [b'SET', b'test:a', b'{"claims":["x","y"]}', b'PX', b'1500']
+    backend.close()
+
+def test_redis_backend_expires_entries(resp_server):
+    backend = redis_backend(resp_server)
+    backend.set('a', 1, 0.05)
+    # No zero or negative PX is ever sent
+    backend.set('b', 1, 0.0001)
+    time.sleep(0.06)
+    assert backend.get('a') is None
+    assert [command[0] for command in resp_server.commands] == [b'SET', b'GET']
+    backend.close()
+
+def test_redis_backend_authenticates_and_selects_database():
+    server = RespStandIn(password='s3cret').start()
+    try:
+        backend = RedisBackend(url=f"redis://:s3cret@127.0.0.1:{server.port}/2", prefix='test:')
+        backend.set('a', 1, 60)
+        assert server.commands[:2] == [[b'AUTH', b's3cret'], [b'SELECT', b'2']]
+        assert server.keys(db=2) == [b'test:a']
+        backend.close()
+    finally:
+        server.stop()
+
+def test_redis_backend_delete_reaches_other_workers(resp_server):
+    first, second = redis_backend(resp_server), redis_backend(resp_server)
+    first.set('a', 1, 60)
+    assert second.get('a') == 1
+    second.delete('a')
+    assert first.get('a') is None
+    first.close()
+    second.close()
+
+def test_redis_backend_clear_drops_only_prefixed_keys(resp_server):
+    backend = redis_backend(resp_server)
+    other = RedisBackend(url=f"redis://127.0.0.1:{resp_server.port}/0", prefix='other:')
+    for index in range(1200):
+        backend.set(f'k{index}', index, 60)
+    other.set('kept', 1, 60)
+    backend.clear()
+    assert resp_server.keys() == [b'other:kept']
+    backend.close()
+    other.close()
+
+def test_redis_backend_reconnects_after_a_dropped_connection(resp_server):
+    backend = redis_backend(resp_server)
+    backend.set('a', 1, 60)
+    resp_server.disconnect_all()
+    time.sleep(0.05)
+    assert backend.get('a') == 1
+    assert resp_server.connections == 2
+    assert backend.get_stats()['errors'] == 0
+    backend.close()
+
+def test_redis_backend_failures_are_cache_misses():
+    server = RespStandIn().start()
+    backend = redis_backend(server, timeout=0.2)
+    server.stop()
+    assert backend.get('a') is None
+    backend.set('a', 1, 60)
+    backend.delete('a')
+    assert backend.get_stats()['errors'] == 3
+
+def test_blocking_backends_run_off_the_event_loop():
+    class RecordingBackend(MemoryBackend):
+        def __init__(self, blocking):
+            super().__init__()
+            self.blocking = blocking
+            self.threads = set()
+
+        def get(self, key):
+            self.threads.add(threading.get_ident())
+            return super().get(key)
+
+        def set(self, key, value, ttl):
+            self.threads.add(threading.get_ident())
+            super().set(key, value, ttl)
+
+    async def scenario(backend):
+        await backend.aset('a', 1, 60)
+        assert await backend.aget('a') == 1
+        return threading.get_ident()
+
+    blocking = RecordingBackend(blocking=True)
+    loop_thread = asyncio.run(scenario(blocking))
+    assert loop_thread not in blocking.threads
+    in_memory = RecordingBackend(blocking=False)
+    assert in_memory.threads == set() and asyncio.run(scenario(in_memory)) in in_memory.threads
+
+def test_token_invalidation_reaches_every_worker(resp_server):
+    workers = [TokenCache(backend=redis_backend(resp_server)) for _ in range(2)]
+    claims = {'sub': 'user', 'exp': time.time() + 60}
+    asyncio.run(workers[0].aput('token', 'svc-a', claims))
+    assert asyncio.run(workers[1].aget('token', 'svc-a')) == claims
+    workers[1].invalidate('token', 'svc-a')
+    assert workers[0].get('token', 'svc-a') is None
+
+def test_jwks_is_adopted_and_invalidated_across_workers(resp_server):
+    workers = [JwksCache(backend=redis_backend(resp_server), sync_interval=0) for _ in range(2)]
+    asyncio.run(workers[0].astore('realm-1', JWKS, 'max-age=60'))
+    entry = asyncio.run(workers[1].alookup('realm-1'))
+    assert entry is not None and entry.kids == {'key-1'}
+    assert workers[1].get_stats()['shared_adopted'] == 1
+    workers[0].invalidate('realm-1')
+    # The tombstone is newer than the copy of the second worker, which drops it
+    time.sleep(0.01)
+    assert workers[1].lookup('realm-1') is None
@@ -0,0 +1,200 @@
+import asyncio
+import time
+import httpx # pyright: ignore[reportMissingImports]
+import pytest # pyright: ignore[reportMissingImports]
+import requests # pyright: ignore[reportMissingModuleSource]
+import asyncKeycloakAuth
+import keycloakAuth
+from circuitBreaker import CircuitBreaker, CircuitBreakerRegistry, CLOSED, OPEN, HALF_OPEN
+from keycloakAuth import KeycloakAuthError, KeycloakConfig, KeycloakHttpConfig, KeycloakUnavailableError
+
+RESET_TIMEOUT = 0.05
+
+def open_breaker(threshold: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker('test', failure_threshold=threshold, reset_timeout=RESET_TIMEOUT)
+    for _ in range(threshold):
+        assert breaker.allow()
+        breaker.record_failure()
+    return breaker
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('test', failure_threshold=3, reset_timeout=RESET_TIMEOUT)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.retry_after() >= 1
+
+def test_half_open_lets_a_single_probe_through():
+    breaker = open_breaker()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+def test_probe_success_closes_the_circuit():
+    breaker = open_breaker()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+def test_probe_failure_reopens_the_circuit():
+    breaker = open_breaker()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_released_probe_is_handed_out_again():
+    breaker = open_breaker()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+def test_lost_probe_expires_after_reset_timeout():
+    breaker = open_breaker()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.allow()
+    # The probe caller never reports back
+    assert not breaker.allow()
+    time.sleep(RESET_TIMEOUT)
+    assert breaker.allow()
+
+def test_release_of_a_closed_circuit_call_is_a_no_op():
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+def test_registry_returns_one_breaker_per_name():
+    registry = CircuitBreakerRegistry(failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    assert registry.get('realm-1') is registry.get('realm-1')
+    registry.get('realm-1').record_failure()
+    assert registry.snapshot()['realm-1']['state'] == OPEN
+    assert registry.get('realm-2').state == CLOSED
+
+@pytest.fixture
+def breakers(monkeypatch):
+    registry = CircuitBreakerRegistry(failure_threshold=1, reset_timeout=RESET_TIMEOUT)
+    monkeypatch.setattr(asyncKeycloakAuth, 'circuitBreakers', registry)
+    return registry
+
+def async_client(handler, max_retries: int = 0) -> asyncKeycloakAuth.AsyncKeycloakAuth:
+    return asyncKeycloakAuth.AsyncKeycloakAuth(
+        KeycloakConfig(service='svc-a'),
+        httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        KeycloakHttpConfig(max_retries=max_retries, backoff_factor=0)
+    )
+
+def test_cancelled_probe_does_not_wedge_the_circuit(breakers):
+    async def handler(request):
+        await asyncio.sleep(10)
+        return httpx.Response(200, json={})
+
+    async def scenario():
+        auth = async_client(handler)
+        breaker = breakers.get('realm-1')
+        breaker.record_failure()
+        await asyncio.sleep(RESET_TIMEOUT)
+        probe = asyncio.create_task(auth._get(auth.config.jwks_endpoint))
+        await asyncio.sleep(0.01)
+        assert breaker.state == HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        # The cancelled probe recorded no outcome and gave its slot back
+        assert breaker.allow()
+
+    asyncio.run(scenario())
+
+def test_retried_get_counts_as_one_breaker_failure(breakers):
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        return httpx.Response(503)
+
+    async def scenario():
+        breakers.failure_threshold = 2
+        auth = async_client(handler, max_retries=2)
+        response = await auth._get(auth.config.jwks_endpoint)
+        assert response.status_code == 503
+        assert len(attempts) == 3
+        breaker = breakers.get('realm-1')
+        assert breaker.failures == 1
+        assert breaker.state == CLOSED
+        await auth._get(auth.config.jwks_endpoint)
+        assert breaker.state == OPEN
+        with pytest.raises(KeycloakUnavailableError):
+            await auth._get(auth.config.jwks_endpoint)
+        assert len(attempts) == 6
+
+    asyncio.run(scenario())
+
+def test_transport_errors_are_retried_then_recorded_once(breakers):
+    attempts = []
+
+    def handler(request):
+        attempts.append(request)
+        raise httpx.ConnectError("connection refused", request=request)
+
+    async def scenario():
+        auth = async_client(handler, max_retries=1)
+        with pytest.raises(httpx.ConnectError):
+            await auth._get(auth.config.jwks_endpoint)
+        assert len(attempts) == 2
+        assert breakers.get('realm-1').failures == 1
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize('outcome', ['connect_error', 'timeout', 503])
+def test_token_endpoint_outage_is_unavailable_from_the_first_failure(breakers, outcome):
+    def handler(request):
+        if outcome == 'connect_error':
+            raise httpx.ConnectError("connection refused", request=request)
+        if outcome == 'timeout':
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(outcome)
+
+    async def scenario():
+        auth = async_client(handler)
+        breakers.failure_threshold = 5
+        with pytest.raises(KeycloakUnavailableError) as error:
+            await auth.authenticate_with_password('user', 'password')
+        assert error.value.retry_after >= 1
+        assert breakers.get('realm-1').state == CLOSED
+
+    asyncio.run(scenario())
+
+def test_refused_credentials_are_not_an_outage(breakers):
+    async def scenario():
+        auth = async_client(lambda request: httpx.Response(401, json={'error': 'invalid_grant'}))
+        with pytest.raises(KeycloakAuthError) as error:
+            await auth.authenticate_with_password('user', 'wrong')
+        assert not isinstance(error.value, KeycloakUnavailableError)
+
+    asyncio.run(scenario())
+
+def test_sync_token_endpoint_outage_is_unavailable(breakers, monkeypatch):
+    monkeypatch.setattr(keycloakAuth, 'circuitBreakers', breakers)
+    session = requests.Session()
+    def refuse(*args, **kwargs):
+        raise requests.exceptions.ConnectionError("connection refused")
+    monkeypatch.setattr(session, 'request', refuse)
+    auth = keycloakAuth.KeycloakAuth(KeycloakConfig(service='svc-a'), session=session)
+    with pytest.raises(KeycloakUnavailableError):
+        auth.authenticate_with_password('user', 'password', store_tokens=False)
+    with pytest.raises(KeycloakUnavailableError):
+        auth.authenticate_with_client_credentials()
@@ -0,0 +1,107 @@
+import time
+import pytest # pyright: ignore[reportMissingImports]
+from fastapi import FastAPI # pyright: ignore[reportMissingImports]
+from fastapi.testclient import TestClient # pyright: ignore[reportMissingImports]
+from keycloakStandIn import KeycloakStandIn
+import forwardAuth
+from forwardAuth import bearer_token, cache_control, claim_headers, parse_claim_headers, token_targets_client
+from config.settings import SettingsError
+from routers import authRouters
+
+@pytest.fixture(scope='module')
+def keycloak():
+    return KeycloakStandIn()
+
+@pytest.fixture
+def client(keycloak, monkeypatch):
+    keycloak.install(monkeypatch)
+    app = FastAPI()
+    app.include_router(authRouters.router, prefix="/v1")
+    yield TestClient(app)
+    keycloak.reset()
+
+def forward_auth(client, token: str, path: str = "/v1/security/forward-auth/svc-a", **headers):
+    return client.get(path, headers={"authorization": f"Bearer {token}", **headers})
+
+def test_token_of_the_service_client_is_allowed(client, keycloak):
+    token = keycloak.token(email='user@example.com', realm_access={'roles': ['reader', 'writer']})
+    response = forward_auth(client, token)
+    assert response.status_code == 200 and response.content == b''
+    assert response.headers["x-auth-service"] == "svc-a"
+    assert response.headers["x-auth-subject"] == "user-id"
+    assert response.headers["x-auth-user"] == "user"
+    assert response.headers["x-auth-email"] == "user@example.com"
+    assert response.headers["x-auth-roles"] == "reader,writer"
+    assert response.headers["vary"] == "Authorization"
+
+def test_token_of_another_client_of_the_realm_is_denied(client, keycloak):
+    # svc-a and svc-b share realm-1: a valid svc-a token must not open svc-b
+    response = forward_auth(client, keycloak.token(client_id='client-a'), "/v1/security/forward-auth/svc-b")
+    assert response.status_code == 401
+    assert response.headers["cache-control"] == "no-store"
+    # A token issued to another client for svc-b (audience) is allowed
+    token = keycloak.token(client_id='client-a', aud=['account', 'client-b'])
+    assert forward_auth(client, token, "/v1/security/forward-auth/svc-b").status_code == 200
+
+def test_service_header_is_subject_to_the_same_check(client, keycloak):
+    token = keycloak.token(client_id='client-a')
+    path = "/v1/security/forward-auth"
+    assert forward_auth(client, token, path, **{"x-forward-auth-service": "svc-a"}).status_code == 200
+    assert forward_auth(client, token, path, **{"x-forward-auth-service": "svc-b"}).status_code == 401
+
+def test_service_is_not_resolved_from_the_token_unless_enabled(client, keycloak, monkeypatch):
+    token = keycloak.token(client_id='client-b')
+    path = "/v1/security/forward-auth"
+    assert forward_auth(client, token, path).status_code == 401
+    monkeypatch.setattr(authRouters, 'FORWARD_AUTH_RESOLVE_SERVICE', True)
+    response = forward_auth(client, token, path)
+    assert response.status_code == 200 and response.headers["x-auth-service"] == "svc-b"
+
+@pytest.mark.parametrize('authorization', [None, "Basic dXNlcjpwYXNz", "Bearer not-a-token"])
+def test_missing_or_invalid_credentials_are_denied(client, authorization):
+    headers = {"authorization": authorization} if authorization else {}
+    response = client.get("/v1/security/forward-auth/svc-a", headers=headers)
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    assert response.headers["cache-control"] == "no-store"
+
+def test_expired_token_and_unknown_service_are_denied(client, keycloak):
+    assert forward_auth(client, keycloak.token(ttl=-60)).status_code == 401
+    assert forward_auth(client, keycloak.token(), "/v1/security/forward-auth/unknown").status_code == 401
+
+def test_allow_decision_is_cached_no_longer_than_the_token(client, keycloak, monkeypatch):
+    monkeypatch.setattr(forwardAuth, 'FORWARD_AUTH_MAX_AGE', 60)
+    assert forward_auth(client, keycloak.token(ttl=3600)).headers["cache-control"] == "max-age=60"
+    max_age = int(forward_auth(client, keycloak.token(ttl=20)).headers["cache-control"].split("=")[1])
+    assert 18 <= max_age <= 20
+
+def test_cache_control_helpers(monkeypatch):
+    monkeypatch.setattr(forwardAuth, 'FORWARD_AUTH_MAX_AGE', 60)
+    assert cache_control({'exp': time.time() + 3600}) == "max-age=60"
+    assert cache_control({'exp': time.time() - 1}) == "no-cache"
+    assert cache_control({}) == "no-cache"
+    monkeypatch.setattr(forwardAuth, 'FORWARD_AUTH_MAX_AGE', 0)
+    assert cache_control({'exp': time.time() + 3600}) == "no-cache"
+
+def test_claim_headers_are_safe_header_values(monkeypatch):
+    monkeypatch.setattr(forwardAuth, 'FORWARD_AUTH_CLAIM_HEADERS', parse_claim_headers(
+        "sub=X-Auth-Subject, name=X-Auth-Name, realm_access.roles=X-Auth-Roles, missing.claim=X-Missing"
+    ))
+    headers = claim_headers({'sub': 'a\r\nb', 'name': 'Zoë', 'realm_access': {'roles': ['r1', 'r2']}})
+    assert headers == {'x-auth-subject': 'a  b', 'x-auth-name': 'Zo%C3%AB', 'x-auth-roles': 'r1,r2'}
+    with pytest.raises(SettingsError):
+        parse_claim_headers("sub")
+
+def test_token_targets_client():
+    assert token_targets_client({'azp': 'client-a'}, 'client-a')
+    assert token_targets_client({'azp': 'other', 'aud': 'client-a'}, 'client-a')
+    assert token_targets_client({'aud': ['account', 'client-a']}, 'client-a')
+    assert not token_targets_client({'azp': 'other', 'aud': ['account']}, 'client-a')
+    assert not token_targets_client({}, 'client-a')
+
+def test_bearer_token():
+    assert bearer_token("Bearer abc") == "abc"
+    assert bearer_token("bearer  abc ") == "abc"
+    assert bearer_token("Basic abc") is None
+    assert bearer_token("Bearer ") is None
+    assert bearer_token(None) is None
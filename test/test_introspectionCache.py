@@ -0,0 +1,57 @@
+import asyncio
+import time
+from cache.introspectionCache import IntrospectionCache
+
+def active(ttl: float = 3600) -> dict:
+    return {'active': True, 'sub': 'user', 'exp': time.time() + ttl}
+
+def test_active_result_is_cached_for_active_ttl():
+    cache = IntrospectionCache(active_ttl=0.05, inactive_ttl=5)
+    cache.put('token', 'svc-a', active())
+    assert cache.get('token', 'svc-a')['active'] is True
+    time.sleep(0.06)
+    assert cache.get('token', 'svc-a') is None
+
+def test_active_result_never_outlives_the_token():
+    cache = IntrospectionCache(active_ttl=30, inactive_ttl=5)
+    cache.put('token', 'svc-a', active(ttl=0.05))
+    cache.put('expired', 'svc-a', active(ttl=-1))
+    assert cache.get('token', 'svc-a') is not None
+    assert cache.get('expired', 'svc-a') is None
+    time.sleep(0.06)
+    assert cache.get('token', 'svc-a') is None
+
+def test_inactive_result_is_cached_for_inactive_ttl():
+    cache = IntrospectionCache(active_ttl=30, inactive_ttl=0.05)
+    cache.put('revoked', 'svc-a', {'active': False})
+    assert cache.get('revoked', 'svc-a') == {'active': False}
+    time.sleep(0.06)
+    assert cache.get('revoked', 'svc-a') is None
+
+def test_zero_inactive_ttl_does_not_cache_inactive_results():
+    cache = IntrospectionCache(active_ttl=30, inactive_ttl=0)
+    cache.put('revoked', 'svc-a', {'active': False})
+    assert cache.get('revoked', 'svc-a') is None
+
+def test_results_are_scoped_by_service():
+    cache = IntrospectionCache()
+    asyncio.run(cache.aput('token', 'svc-a', active()))
+    assert asyncio.run(cache.aget('token', 'svc-a'))['sub'] == 'user'
+    assert cache.get('token', 'svc-b') is None
+
+def test_invalidate_drops_the_token_for_every_service():
+    cache = IntrospectionCache()
+    for service in ('svc-a', 'svc-b', 'svc-c'):
+        cache.put('token', service, active())
+    cache.put('other', 'svc-a', active())
+    cache.invalidate('token', ['svc-a', 'svc-b'])
+    assert cache.get('token', 'svc-a') is None and cache.get('token', 'svc-b') is None
+    assert cache.get('token', 'svc-c') is not None
+    assert cache.get('other', 'svc-a') is not None
+    assert cache.get_stats()['invalidations'] == 1
+
+def test_zero_max_entries_disables_the_cache():
+    cache = IntrospectionCache(max_entries=0)
+    cache.put('token', 'svc-a', active())
+    assert cache.get('token', 'svc-a') is None
+    assert cache.get_stats()['misses'] == 0
@@ -0,0 +1,92 @@
+import time
+import pytest # pyright: ignore[reportMissingImports]
+from cache import jwksCache as jwksCacheModule
+from cache.jwksCache import JwksCache
+
+JWKS = {"keys": [{"kid": "key-1", "kty": "RSA", "n": "AQAB", "e": "AQAB"}]}
+
+class Clock:
+    """Stand-in for the time module of the cache, moved forward by the tests"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return time.time() + self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(jwksCacheModule, 'time', clock)
+    return clock
+
+@pytest.mark.parametrize('cache_control, ttl', [
+    (None, 300),
+    ('public', 300),
+    ('max-age=60', 60),
+    ('public, max-age="120", must-revalidate', 120),
+    ('s-maxage=30', 30),
+    ('MAX-AGE=45', 45),
+    ('max-age=86400', 3600),
+    ('no-store, max-age=60', 0),
+    ('max-stale=60', 300),
+])
+def test_ttl_is_taken_from_cache_control_within_bounds(cache_control, ttl):
+    assert JwksCache(ttl=300, max_ttl=3600)._ttl_from_cache_control(cache_control) == ttl
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = JwksCache(ttl=300)
+    entry = cache.store('realm-1', JWKS, 'max-age=60')
+    assert entry.kids == frozenset({'key-1'})
+    clock.now += 59
+    assert cache.lookup('realm-1') is entry
+    clock.now += 1
+    assert cache.lookup('realm-1') is None
+    # Expired keys remain available while Keycloak is unavailable
+    assert cache.stale('realm-1') is entry
+
+def test_expired_entries_are_fetched_again(clock):
+    cache = JwksCache(ttl=60)
+    fetches = []
+    fetcher = lambda: fetches.append(1) or (JWKS, None)
+    first = cache.get('realm-1', fetcher)
+    assert cache.get('realm-1', fetcher) is first and len(fetches) == 1
+    clock.now += 61
+    assert cache.get('realm-1', fetcher) is not first and len(fetches) == 2
+
+def test_forced_refreshes_are_throttled_per_realm(clock):
+    cache = JwksCache(min_refresh_interval=10)
+    cache.store('realm-1', JWKS)
+    # Known kids never force a refresh
+    assert not cache.should_force_refresh('realm-1', 'key-1')
+    assert cache.should_force_refresh('realm-1', 'unknown')
+    clock.now += 9
+    assert not cache.should_force_refresh('realm-1', 'other')
+    assert cache.should_force_refresh('realm-2', 'unknown')
+    clock.now += 1
+    assert cache.should_force_refresh('realm-1', 'other')
+    stats = cache.get_stats()
+    assert stats['forced_refreshes'] == 3 and stats['forced_refreshes_throttled'] == 1
+
+def test_unknown_kid_refetches_once_per_interval(clock):
+    cache = JwksCache(min_refresh_interval=10)
+    fetches = []
+    fetcher = lambda: fetches.append(1) or (JWKS, None)
+    cache.get('realm-1', fetcher)
+    for _ in range(5):
+        cache.get('realm-1', fetcher, kid='bogus')
+    assert len(fetches) == 2
+
+def test_stale_keys_warning_is_sampled_per_realm(monkeypatch):
+    warnings = []
+    monkeypatch.setattr(jwksCacheModule.logger, 'warning', lambda message, *args: warnings.append(args[0]))
+    cache = JwksCache(stale_log_every=10)
+    cache.store('realm-1', JWKS)
+    cache.store('realm-2', JWKS)
+    for _ in range(25):
+        assert cache.stale('realm-1') is not None
+    cache.stale('realm-2')
+    assert warnings == ['realm-1', 'realm-1', 'realm-1', 'realm-2']
+    assert cache.get_stats()['stale_served'] == 26
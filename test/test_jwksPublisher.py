@@ -0,0 +1,66 @@
+import json
+import pytest # pyright: ignore[reportMissingImports]
+from fastapi import FastAPI # pyright: ignore[reportMissingImports]
+from fastapi.testclient import TestClient # pyright: ignore[reportMissingImports]
+from keycloakStandIn import KeycloakStandIn
+from jwksPublisher import JWKS_MEDIA_TYPE, etag_matches
+from routers import authRouters
+
+@pytest.fixture(scope='module')
+def keycloak():
+    return KeycloakStandIn()
+
+@pytest.fixture
+def client(keycloak, monkeypatch):
+    keycloak.install(monkeypatch)
+    app = FastAPI()
+    app.include_router(authRouters.router, prefix="/v1")
+    yield TestClient(app)
+    keycloak.reset()
+
+def test_realm_jwks_is_published_from_the_cache(client, keycloak):
+    response = client.get("/v1/security/jwks/svc-a")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == JWKS_MEDIA_TYPE
+    assert json.loads(response.content) == keycloak.jwks
+    assert 0 < int(response.headers["cache-control"].removeprefix("public, max-age=")) <= 60
+    # svc-b shares the realm of svc-a: same document, no new Keycloak call
+    assert client.get("/v1/security/jwks/svc-b").headers["etag"] == response.headers["etag"]
+    assert keycloak.requests == ["GET /realms/realm-1/protocol/openid-connect/certs"]
+
+def test_all_realms_are_merged(client, keycloak):
+    response = client.get("/v1/security/jwks")
+    assert response.status_code == 200
+    assert len(json.loads(response.content)["keys"]) == 2
+    assert response.headers["etag"] != client.get("/v1/security/jwks/svc-a").headers["etag"]
+
+@pytest.mark.parametrize('if_none_match', ['{etag}', 'W/{etag}', '"other", {etag}', '*'])
+def test_current_copies_are_answered_with_not_modified(client, if_none_match):
+    etag = client.get("/v1/security/jwks/svc-a").headers["etag"]
+    response = client.get("/v1/security/jwks/svc-a", headers={"if-none-match": if_none_match.format(etag=etag)})
+    assert response.status_code == 304 and response.content == b""
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"].startswith("public, max-age=")
+
+def test_outdated_copies_get_the_document(client):
+    response = client.get("/v1/security/jwks/svc-a", headers={"if-none-match": '"outdated"'})
+    assert response.status_code == 200 and response.content
+
+def test_unknown_service_is_not_found(client, keycloak):
+    assert client.get("/v1/security/jwks/unknown").status_code == 404
+    assert keycloak.requests == []
+
+def test_jwks_unavailable_while_keycloak_is_down(client, keycloak):
+    keycloak.down = True
+    response = client.get("/v1/security/jwks/svc-c")
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches(' "x" , "abc" ', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abcd"', '"abc"')
+    assert not etag_matches('', '"abc"')
+    assert not etag_matches(None, '"abc"')
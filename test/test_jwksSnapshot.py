@@ -0,0 +1,44 @@
+import asyncio
+import os
+import threading
+import time
+from cache.jwksCache import JwksCache
+from cache.jwksSnapshot import JwksSnapshotStore
+
+JWKS = {"keys": [{"kid": "key-1", "kty": "RSA", "n": "AQAB", "e": "AQAB"}]}
+
+def test_async_store_writes_the_snapshot_off_the_event_loop(tmp_path, monkeypatch):
+    store = JwksSnapshotStore(directory=str(tmp_path), max_age=3600)
+    threads = []
+    save = store.save
+    monkeypatch.setattr(store, 'save', lambda *args: threads.append(threading.get_ident()) or save(*args))
+
+    async def scenario():
+        await JwksCache(snapshots=store).astore('realm/1', JWKS, 'max-age=60')
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+    [snapshot] = store.load_all()
+    assert snapshot['realm'] == 'realm/1' and snapshot['jwks'] == JWKS
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
+
+def test_snapshots_are_loaded_as_fresh_or_stale_keys(tmp_path):
+    store = JwksSnapshotStore(directory=str(tmp_path), max_age=3600)
+    now = time.time()
+    store.save('fresh', JWKS, now - 10, now + 50)
+    store.save('expired', JWKS, now - 600, now - 300)
+    store.save('too-old', JWKS, now - 7200, now - 6900)
+    cache = JwksCache(snapshots=store)
+    assert cache.load_snapshots() == 2
+    assert cache.lookup('fresh') is not None
+    # Expired snapshots are only served while Keycloak is unavailable
+    assert cache.lookup('expired') is None
+    assert cache.stale('expired') is not None
+    assert cache.stale('too-old') is None
+
+def test_disabled_snapshots_are_neither_written_nor_loaded(tmp_path):
+    store = JwksSnapshotStore(directory=str(tmp_path), max_age=0)
+    asyncio.run(store.asave('realm', JWKS, time.time(), time.time() + 60))
+    assert os.listdir(tmp_path) == []
+    assert store.load_all() == []
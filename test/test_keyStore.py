@@ -0,0 +1,72 @@
+import time
+import pytest # pyright: ignore[reportMissingImports]
+from keycloakStandIn import KeycloakStandIn
+from cache.jwksCache import JwksEntry
+from cache.keyStore import KeyStore, jwk_to_public_key
+
+@pytest.fixture(scope='module')
+def jwks():
+    """Published JWK of distinct RSA keys, by kid"""
+    return {kid: KeycloakStandIn(kid).jwks['keys'][0] for kid in ('key-1', 'key-2', 'key-3')}
+
+def entry(version: int, *keys) -> JwksEntry:
+    return JwksEntry(jwks={'keys': list(keys)}, kids=frozenset(key['kid'] for key in keys),
+                     fetched_at=time.monotonic(), expires_at=time.monotonic() + 60, version=version)
+
+def test_keys_are_converted_once_per_jwks_version(jwks):
+    store = KeyStore()
+    first = entry(1, jwks['key-1'], jwks['key-2'])
+    key = store.get_key('realm-1', first, 'key-1')
+    assert key.public_numbers() == jwk_to_public_key(jwks['key-1']).public_numbers()
+    assert store.get_key('realm-1', first, 'key-1') is key
+    assert store.get_key('realm-1', first, 'unknown') is None
+    assert store.get_stats()['conversions'] == 2
+    # A new version publishing the same keys reuses their objects and converts only new ones
+    second = entry(2, jwks['key-1'], jwks['key-2'], jwks['key-3'])
+    assert store.get_key('realm-1', second, 'key-1') is key
+    assert store.get_key('realm-1', second, 'key-3') is not None
+    assert store.get_stats()['conversions'] == 3
+
+def test_keys_no_longer_published_are_evicted(jwks):
+    store = KeyStore()
+    store.sync('realm-1', entry(1, jwks['key-1'], jwks['key-2']))
+    store.sync('realm-2', entry(1, jwks['key-1']))
+    store.sync('realm-1', entry(2, jwks['key-2']))
+    assert store.get_key('realm-1', entry(2, jwks['key-2']), 'key-1') is None
+    # Realms are independent: realm-2 still publishes key-1
+    assert store.get_key('realm-2', entry(1, jwks['key-1']), 'key-1') is not None
+    stats = store.get_stats()
+    assert stats['evictions'] == 1 and stats['keys'] == 2
+
+def test_rotated_key_material_is_converted_again(jwks):
+    store = KeyStore()
+    store.sync('realm-1', entry(1, jwks['key-1']))
+    rotated = dict(jwks['key-2'], kid='key-1')
+    key = store.get_key('realm-1', entry(2, rotated), 'key-1')
+    assert key.public_numbers() == jwk_to_public_key(jwks['key-2']).public_numbers()
+
+def test_unusable_keys_are_skipped(jwks):
+    store = KeyStore()
+    broken = {'kid': 'broken', 'kty': 'RSA', 'n': '', 'e': 'AQAB'}
+    ec_key = {'kid': 'ec', 'kty': 'EC', 'crv': 'P-256', 'x': 'AA', 'y': 'AA'}
+    current = entry(1, jwks['key-1'], broken, ec_key)
+    assert store.get_key('realm-1', current, 'broken') is None
+    assert store.get_key('realm-1', current, 'ec') is None
+    assert store.get_key('realm-1', current, 'key-1') is not None
+    assert store.get_stats()['conversion_errors'] == 1
+
+def test_invalidate_drops_the_realm_keys(jwks):
+    store = KeyStore()
+    current = entry(1, jwks['key-1'])
+    store.sync('realm-1', current)
+    store.sync('realm-2', current)
+    store.invalidate('realm-1')
+    assert store.get_stats()['keys'] == 1
+    # The next lookup syncs the realm again
+    assert store.get_key('realm-1', current, 'key-1') is not None
+    store.invalidate()
+    assert store.get_stats()['keys'] == 0
+
+def test_only_rsa_keys_are_supported():
+    with pytest.raises(ValueError):
+        jwk_to_public_key({'kty': 'EC'})
@@ -0,0 +1,21 @@
+import keycloakAuth
+from keycloakAuth import KeycloakHttpConfig
+
+def test_retry_policy_caps_and_jitters_the_backoff():
+    retry = KeycloakHttpConfig(max_retries=3, backoff_factor=0.5, backoff_max=1.5).retry()
+    assert retry.total == 3 and retry.other == 0
+    assert retry.allowed_methods == frozenset({'GET'})
+    assert retry.backoff_max == 1.5
+    assert retry.backoff_jitter == 0.5
+
+def test_retry_policy_without_backoff_options(monkeypatch):
+    # urllib3 < 2 Retry rejects backoff_max and backoff_jitter
+    monkeypatch.setattr(keycloakAuth, '_RETRY_BACKOFF_OPTIONS', False)
+    retry = KeycloakHttpConfig(max_retries=1, backoff_factor=0.5, backoff_max=1.5).retry()
+    assert retry.total == 1
+    assert retry.backoff_jitter == 0.0
+
+def test_backoff_is_exponential_capped_and_jittered():
+    config = KeycloakHttpConfig(backoff_factor=0.2, backoff_max=0.5)
+    for attempt, delay in ((1, 0.2), (2, 0.4), (3, 0.5), (6, 0.5)):
+        assert delay / 2 <= config.backoff(attempt) <= delay
@@ -0,0 +1,12 @@
+import os
+from logger.loggerFactory import _log_file
+
+def test_single_process_logs_to_the_configured_file(monkeypatch):
+    monkeypatch.setenv('API_WORKERS', '1')
+    monkeypatch.setenv('DEFAULT_LOG_FILE', 'logs/server.log')
+    assert _log_file() == 'logs/server.log'
+
+def test_each_worker_logs_to_its_own_file(monkeypatch):
+    monkeypatch.setenv('API_WORKERS', '4')
+    monkeypatch.setenv('DEFAULT_LOG_FILE', 'logs/server.log')
+    assert _log_file() == f'logs/server.{os.getpid()}.log'
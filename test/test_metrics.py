@@ -0,0 +1,28 @@
+import os
+from metrics import Counter, Gauge, Histogram, MetricsRegistry
+
+def registry(worker_label: bool) -> MetricsRegistry:
+    registry = MetricsRegistry(worker_label=worker_label)
+    registry.register(Counter('requests_total', 'Requests', ('route',))).inc('/a')
+    registry.register(Gauge('in_flight', 'In flight')).set(2)
+    registry.register(Histogram('duration_seconds', 'Duration', buckets=(0.1,))).observe(0.05)
+    registry.add_collector(lambda: ['# TYPE collected counter', 'collected{cache="jwks"} 3'])
+    return registry
+
+def test_single_process_samples_have_no_worker_label():
+    lines = registry(worker_label=False).render().splitlines()
+    assert 'requests_total{route="/a"} 1' in lines
+    assert 'in_flight 2' in lines
+    assert 'collected{cache="jwks"} 3' in lines
+
+def test_worker_samples_are_labelled_with_their_pid():
+    pid = f'pid="{os.getpid()}"'
+    lines = registry(worker_label=True).render().splitlines()
+    samples = [line for line in lines if not line.startswith('#')]
+    assert all(pid in line for line in samples)
+    assert f'requests_total{{{pid},route="/a"}} 1' in lines
+    assert f'in_flight{{{pid}}} 2' in lines
+    assert f'duration_seconds_bucket{{{pid},le="0.1"}} 1' in lines
+    assert f'duration_seconds_sum{{{pid}}} 0.05' in lines
+    assert f'collected{{{pid},cache="jwks"}} 3' in lines
+    assert '# TYPE collected counter' in lines
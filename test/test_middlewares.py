@@ -0,0 +1,81 @@
+from fastapi import APIRouter, FastAPI # pyright: ignore[reportMissingImports]
+from fastapi.testclient import TestClient # pyright: ignore[reportMissingImports]
+import middlewares
+from middlewares import HttpsEnforcementMiddleware, ServerTimingMiddleware, route_template
+from serverTiming import phase
+
+def create_client() -> TestClient:
+    # Same mounting as the server: /v1 router including a /monitor router
+    monitor = APIRouter(prefix="/monitor")
+    security = APIRouter(prefix="/security")
+    routes = {}
+
+    @monitor.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @monitor.get("/ready")
+    async def ready():
+        return {"status": "ready"}
+
+    @security.get("/items/{item}")
+    async def item(item: str):
+        return {"item": item}
+
+    api = APIRouter(prefix="/v1")
+    api.include_router(monitor)
+    api.include_router(security)
+    app = FastAPI()
+    app.include_router(api)
+
+    @app.middleware("http")
+    async def capture_route(request, call_next):
+        response = await call_next(request)
+        routes[request.url.path] = route_template(request.scope)
+        return response
+
+    app.add_middleware(HttpsEnforcementMiddleware, enforce_https=True)
+    client = TestClient(app, base_url="http://testserver")
+    client.routes = routes
+    return client
+
+def test_health_probes_skip_enforcement_and_headers():
+    client = create_client()
+    for path in ("/v1/monitor/health", "/v1/monitor/ready"):
+        response = client.get(path, follow_redirects=False)
+        assert response.status_code == 200
+        assert "strict-transport-security" not in response.headers
+
+def test_plain_http_is_redirected_to_https():
+    client = create_client()
+    response = client.get("/v1/security/items/1?full=true", follow_redirects=False)
+    assert response.status_code == 307
+    assert response.headers["location"] == "https://testserver/v1/security/items/1?full=true"
+
+def test_https_responses_carry_security_headers():
+    client = create_client()
+    response = client.get("/v1/security/items/1", headers={"x-forwarded-proto": "https"})
+    assert response.status_code == 200
+    assert response.headers["strict-transport-security"] == "max-age=31536000; includeSubDomains"
+    assert response.headers["x-frame-options"] == "DENY"
+
+def test_route_template_keeps_router_prefixes():
+    client = create_client()
+    client.get("/v1/security/items/42", headers={"x-forwarded-proto": "https"})
+    assert client.routes["/v1/security/items/42"] == "/v1/security/items/{item}"
+
+def test_server_timing_header_includes_the_app_phase(monkeypatch):
+    monkeypatch.setattr(middlewares, 'SERVER_TIMING_ENABLED', True)
+    app = FastAPI()
+
+    @app.get("/v1/security/timed")
+    async def timed():
+        with phase("verify"):
+            pass
+        return {"status": "valid"}
+
+    app.add_middleware(HttpsEnforcementMiddleware, enforce_https=True)
+    app.add_middleware(ServerTimingMiddleware)
+    response = TestClient(app).get("/v1/security/timed", headers={"x-forwarded-proto": "https"})
+    names = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert names == ["https", "verify", "app", "total"]
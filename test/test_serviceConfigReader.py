@@ -0,0 +1,153 @@
+import asyncio
+import json
+import os
+import threading
+import jwt # pyright: ignore[reportMissingImports]
+import pytest # pyright: ignore[reportMissingImports]
+from config.service_config_reader import ServiceConfig, ServiceConfigReader, ConfigError, build_index, realm_from_issuer
+from keycloakAuth import KeycloakAuthError, resolve_token_service
+
+SERVICES = {
+    "svc-a": {"realm": "realm-1", "client_id": "client-a", "client_secret": "secret-a"},
+    "svc-b": {"realm": "realm-1", "client_id": "client-b", "client_secret": "secret-b"},
+}
+
+def write_config(path, services: dict, mtime_ns: int = None):
+    path.write_text(json.dumps({"services": services}))
+    if mtime_ns is not None:
+        # Distinct modification times, whatever the file system timestamp resolution
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / 'service_config.json'
+    write_config(path, SERVICES, mtime_ns=1_000_000_000)
+    return path
+
+def test_reload_swaps_in_the_new_configuration(config_file):
+    reader = ServiceConfigReader(str(config_file))
+    notified = []
+    reader.add_listener(notified.append)
+    previous = reader.config
+    services = dict(SERVICES)
+    services["svc-a"] = dict(SERVICES["svc-a"], client_secret="rotated")
+    del services["svc-b"]
+    services["svc-c"] = {"realm": "realm-2", "client_id": "client-c", "client_secret": "secret-c"}
+    write_config(config_file, services)
+    assert reader.reload_config() == {"svc-a", "svc-b", "svc-c"}
+    assert notified == [{"svc-a", "svc-b", "svc-c"}]
+    # Readers holding the previous mapping keep a complete, unchanged configuration
+    assert set(previous) == {"svc-a", "svc-b"} and previous["svc-a"].client_secret == "secret-a"
+    assert reader.list_services() == ["svc-a", "svc-c"]
+    assert reader.find_services("realm-1") == ("svc-a",)
+    assert reader.find_services("realm-2", "client-c") == ("svc-c",)
+
+def test_unchanged_reload_notifies_nobody(config_file):
+    reader = ServiceConfigReader(str(config_file))
+    notified = []
+    reader.add_listener(notified.append)
+    assert reader.reload_config() == set()
+    assert notified == []
+
+def test_failing_listener_does_not_stop_the_others(config_file):
+    reader = ServiceConfigReader(str(config_file))
+    notified = []
+    reader.add_listener(lambda changed: 1 / 0)
+    reader.add_listener(notified.append)
+    write_config(config_file, {"svc-a": SERVICES["svc-a"]})
+    reader.reload_config()
+    assert notified == [{"svc-b"}]
+
+@pytest.mark.parametrize('content', ['{not json', '{"services": {"svc-a": {"realm": ""}}}', '[]'])
+def test_invalid_file_keeps_the_current_configuration(config_file, content):
+    reader = ServiceConfigReader(str(config_file))
+    current = reader.config
+    config_file.write_text(content)
+    with pytest.raises(ConfigError):
+        reader.reload_config()
+    assert reader.config is current
+
+def test_file_is_read_only_when_its_signature_changes(config_file):
+    reader = ServiceConfigReader(str(config_file))
+    assert reader._read_if_changed() is None
+    write_config(config_file, {"svc-a": SERVICES["svc-a"]}, mtime_ns=2_000_000_000)
+    assert set(reader._read_if_changed()) == {"svc-a"}
+    assert reader._read_if_changed() is None
+    # An invalid change is reported once, then ignored until the file changes again
+    config_file.write_text('{not json')
+    os.utime(config_file, ns=(3_000_000_000, 3_000_000_000))
+    with pytest.raises(ConfigError):
+        reader._read_if_changed()
+    assert reader._read_if_changed() is None
+
+def test_cache_scope_changes_only_with_the_service_configuration(config_file):
+    reader = ServiceConfigReader(str(config_file))
+    scope_a, scope_b = reader.cache_scope("svc-a"), reader.cache_scope("svc-b")
+    assert scope_a != scope_b and "secret-a" not in scope_a
+    write_config(config_file, {"svc-a": dict(SERVICES["svc-a"], client_secret="rotated"), "svc-b": SERVICES["svc-b"]})
+    reader.reload_config()
+    assert reader.cache_scope("svc-a") != scope_a
+    assert reader.cache_scope("svc-b") == scope_b
+    assert reader.cache_scope("unknown") == "unknown"
+
+def test_watch_reloads_changed_files_in_a_worker_thread(config_file):
+    reader = ServiceConfigReader(str(config_file))
+    threads = set()
+    read_if_changed = reader._read_if_changed
+    reader._read_if_changed = lambda: threads.add(threading.get_ident()) or read_if_changed()
+    notified = []
+    reader.add_listener(notified.append)
+
+    async def scenario():
+        watcher = asyncio.ensure_future(reader.watch(interval=0.01))
+        await asyncio.sleep(0.03)
+        config_file.write_text('{not json')
+        os.utime(config_file, ns=(2_000_000_000, 2_000_000_000))
+        await asyncio.sleep(0.03)
+        write_config(config_file, {"svc-b": SERVICES["svc-b"]}, mtime_ns=3_000_000_000)
+        await asyncio.sleep(0.05)
+        watcher.cancel()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert threads and loop_thread not in threads
+    assert notified == [{"svc-a"}]
+    assert reader.list_services() == ["svc-b"]
+
+def test_index_keeps_services_in_configuration_order():
+    services = {name: ServiceConfig(**config) for name, config in SERVICES.items()}
+    services["svc-a2"] = ServiceConfig(realm="realm-1", client_id="client-a", client_secret="other")
+    index = build_index(services)
+    assert index.by_realm == {"realm-1": ("svc-a", "svc-b", "svc-a2")}
+    assert index.by_client == {("realm-1", "client-a"): ("svc-a", "svc-a2"), ("realm-1", "client-b"): ("svc-b",)}
+    with pytest.raises(TypeError):
+        index.by_realm["realm-2"] = ()
+
+@pytest.mark.parametrize('issuer, realm', [
+    ("https://sso.example.com/realms/demo", "demo"),
+    ("https://sso.example.com/auth/realms/demo/", "demo"),
+    ("https://sso.example.com/realms/demo/protocol", None),
+    ("https://sso.example.com/realms/", None),
+    ("https://sso.example.com/demo", None),
+    ("", None),
+    (None, None),
+])
+def test_realm_from_issuer(issuer, realm):
+    assert realm_from_issuer(issuer) == realm
+
+def unsigned_token(**claims) -> str:
+    # Routing only reads the claims: the signature is checked by the verification that follows
+    return jwt.encode(claims, 'not-the-key-of-the-realm-of-the-token', algorithm='HS256')
+
+def test_token_service_is_resolved_from_issuer_and_authorized_party():
+    issuer = "http://keycloak.test/realms/realm-1"
+    assert resolve_token_service(unsigned_token(iss=issuer, azp="client-b")) == "svc-b"
+    assert resolve_token_service(unsigned_token(iss="http://keycloak.test/realms/realm-2", azp="client-c")) == "svc-c"
+    for token in (
+        unsigned_token(iss=issuer, azp="client-c"),
+        unsigned_token(iss="http://keycloak.test/realms/unknown", azp="client-a"),
+        unsigned_token(iss=issuer),
+        "not-a-token",
+    ):
+        with pytest.raises(KeycloakAuthError):
+            resolve_token_service(token)
@@ -0,0 +1,57 @@
+import json
+from urllib.parse import parse_qs, urlencode
+import pytest # pyright: ignore[reportMissingImports]
+import requests # pyright: ignore[reportMissingModuleSource]
+import keycloakAuth
+from circuitBreaker import CircuitBreakerRegistry
+from keycloakAuth import KeycloakClientRegistry, ServiceTokenManager
+
+class TokenEndpoint:
+    """Session standing in for the Keycloak token endpoint, recording the grant types requested"""
+    def __init__(self):
+        self.grants = []
+
+    def request(self, method, url, data=None, **kwargs):
+        self.grants.append(parse_qs(data if isinstance(data, str) else urlencode(data))['grant_type'][0])
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps({
+            'access_token': f'token-{len(self.grants)}', 'expires_in': 300,
+            'refresh_token': f'refresh-{len(self.grants)}', 'refresh_expires_in': 1800,
+        }).encode()
+        return response
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def endpoint(monkeypatch):
+    endpoint = TokenEndpoint()
+    registry = KeycloakClientRegistry()
+    registry._session = endpoint
+    monkeypatch.setattr(keycloakAuth, 'keycloakRegistry', registry)
+    monkeypatch.setattr(keycloakAuth, 'circuitBreakers', CircuitBreakerRegistry())
+    return endpoint
+
+@pytest.fixture
+def manager():
+    manager = ServiceTokenManager()
+    yield manager
+    manager.close()
+
+def test_service_tokens_are_kept_by_the_manager_only(endpoint, manager):
+    assert manager.get_token('svc-a') == 'token-1'
+    assert manager.get_token('svc-a') == 'token-1'
+    # An expired access token is renewed with the refresh token
+    manager._get_state('svc-a').expires_at = 0
+    assert manager.get_token('svc-a') == 'token-2'
+    assert endpoint.grants == ['client_credentials', 'refresh_token']
+    # The registry client is shared with the other callers of the service: it holds no tokens
+    shared = keycloakAuth.keycloakRegistry.get('svc-a')
+    assert shared.access_token is None and shared.refresh_token is None
+
+def test_services_get_their_own_tokens(endpoint, manager):
+    assert manager.get_token('svc-a') == 'token-1'
+    assert manager.get_token('svc-b') == 'token-2'
+    manager.invalidate('svc-a')
+    assert manager.get_token('svc-a') == 'token-3'
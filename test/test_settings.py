@@ -0,0 +1,58 @@
+import dataclasses
+import pytest # pyright: ignore[reportMissingImports]
+from config.settings import AppSettings, SettingsError
+
+def test_defaults_and_parsed_types(monkeypatch):
+    monkeypatch.setenv('ALLOWED_HOSTS', ' localhost, example.com ,')
+    monkeypatch.setenv('ENFORCE_HTTPS', 'Yes')
+    monkeypatch.setenv('API_PORT', '9000')
+    monkeypatch.setenv('KEYCLOAK_CONNECT_TIMEOUT', '1.5')
+    monkeypatch.setenv('CACHE_BACKEND', 'Redis')
+    monkeypatch.setenv('TOKEN_CACHE_MAX_TTL', '')
+    settings = AppSettings.from_env()
+    assert settings.allowed_hosts == ('localhost', 'example.com')
+    assert settings.enforce_https is True
+    assert settings.api_port == 9000
+    assert settings.keycloak_connect_timeout == 1.5
+    assert settings.cache_backend == 'redis'
+    # Empty values fall back to the default
+    assert settings.token_cache_max_ttl == 300
+
+def test_all_errors_are_reported_at_once(monkeypatch):
+    monkeypatch.delenv('ALLOWED_HOSTS')
+    monkeypatch.setenv('API_PORT', '70000')
+    monkeypatch.setenv('API_WORKERS', 'many')
+    monkeypatch.setenv('ENFORCE_HTTPS', 'maybe')
+    monkeypatch.setenv('CACHE_BACKEND', 'memcached')
+    monkeypatch.setenv('CIRCUIT_RESET_TIMEOUT', '0')
+    monkeypatch.setenv('TOKEN_CACHE_MAX_ENTRIES', '-1')
+    with pytest.raises(SettingsError) as error:
+        AppSettings.from_env()
+    message = str(error.value)
+    for expected in (
+        "ALLOWED_HOSTS is required",
+        "API_PORT='70000' must be at most 65535",
+        "API_WORKERS='many' is invalid",
+        "ENFORCE_HTTPS='maybe' is invalid",
+        "CACHE_BACKEND='memcached' must be one of memory, shm, redis",
+        "CIRCUIT_RESET_TIMEOUT='0' must be greater than 0",
+        "TOKEN_CACHE_MAX_ENTRIES='-1' must be at least 0",
+    ):
+        assert expected in message
+    assert message.count(';') == 6
+
+def test_logging_settings_are_validated(monkeypatch):
+    monkeypatch.setenv('LOG_FORMAT', 'xml')
+    monkeypatch.setenv('LOG_QUEUE_SIZE', '0')
+    with pytest.raises(SettingsError) as error:
+        AppSettings.from_env()
+    assert "LOG_FORMAT='xml' must be one of text, json" in str(error.value)
+    assert "LOG_QUEUE_SIZE='0' must be at least 1" in str(error.value)
+
+def test_settings_are_immutable_and_hide_secrets(monkeypatch):
+    monkeypatch.setenv('SERVER_TIMING_TOKEN', 'timing-secret')
+    settings = AppSettings.from_env()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        settings.api_port = 1
+    assert settings.server_timing_token == 'timing-secret'
+    assert 'timing-secret' not in repr(settings)
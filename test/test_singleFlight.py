@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+import pytest # pyright: ignore[reportMissingImports]
+from singleFlight import SingleFlight, AsyncSingleFlight
+
+def run_threads(count: int, target) -> list:
+    results = [None] * count
+    def worker(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results
+
+def test_concurrent_threads_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    def fetch():
+        calls.append(1)
+        time.sleep(0.05)
+        return {'token': 'shared'}
+
+    results = run_threads(5, lambda: flight.do('key', fetch))
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results) and results[0] == {'token': 'shared'}
+    assert flight.get_stats() == {'executions': 1, 'coalesced': 4}
+    assert not flight.in_flight('key')
+
+def test_thread_errors_reach_every_caller_and_are_not_cached():
+    flight = SingleFlight()
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError('keycloak down')
+
+    results = run_threads(3, lambda: flight.do('key', fail))
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.do('key', lambda: 'recovered') == 'recovered'
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do('a', lambda: 1) == 1
+    assert flight.do('b', lambda: 2) == 2
+    assert flight.get_stats() == {'executions': 2, 'coalesced': 0}
+
+def test_concurrent_coroutines_share_one_task():
+    flight = AsyncSingleFlight()
+    calls = []
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'shared'
+
+    async def scenario():
+        pending = [asyncio.ensure_future(flight.do('key', fetch)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight('key')
+        results = await asyncio.gather(*pending)
+        assert not flight.in_flight('key')
+        return results
+
+    assert asyncio.run(scenario()) == ['shared'] * 5
+    assert len(calls) == 1
+    assert flight.get_stats() == {'executions': 1, 'coalesced': 4}
+
+def test_coroutine_errors_reach_every_caller():
+    flight = AsyncSingleFlight()
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError('keycloak down')
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        async def recovered():
+            return 'recovered'
+        assert await flight.do('key', recovered) == 'recovered'
+
+    asyncio.run(scenario())
+
+def test_cancelled_caller_does_not_cancel_the_shared_call():
+    flight = AsyncSingleFlight()
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return 'shared'
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do('key', fetch))
+        second = asyncio.ensure_future(flight.do('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == 'shared'
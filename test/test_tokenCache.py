@@ -0,0 +1,88 @@
+import asyncio
+import json
+import time
+import pytest # pyright: ignore[reportMissingImports]
+import cache.tokenCache
+from cache.tokenCache import TokenCache, token_digest
+from config.service_config_reader import ServiceConfigReader
+
+def claims(ttl: float = 60, subject: str = 'user') -> dict:
+    return {'sub': subject, 'exp': time.time() + ttl}
+
+def write_config(path, secret: str):
+    path.write_text(json.dumps({"services": {
+        "svc-a": {"realm": "realm-1", "client_id": "client-a", "client_secret": secret},
+        "svc-b": {"realm": "realm-1", "client_id": "client-b", "client_secret": "secret-b"},
+    }}))
+
+def test_digest_scopes_tokens_by_service():
+    assert token_digest('token', 'svc-a') != token_digest('token', 'svc-b')
+    assert 'token' not in token_digest('token', 'svc-a')
+
+def test_cached_claims_are_copies():
+    cache = TokenCache(max_entries=10)
+    cache.put('token', 'svc-a', claims())
+    cached = cache.get('token', 'svc-a')
+    cached['sub'] = 'changed'
+    assert cache.get('token', 'svc-a')['sub'] == 'user'
+    assert cache.get('token', 'svc-b') is None
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['hit_ratio']) == (2, 1, 0.6667)
+
+def test_least_recently_used_token_is_evicted():
+    cache = TokenCache(max_entries=2)
+    cache.put('t1', 'svc-a', claims(subject='1'))
+    cache.put('t2', 'svc-a', claims(subject='2'))
+    assert cache.get('t1', 'svc-a') is not None
+    cache.put('t3', 'svc-a', claims(subject='3'))
+    assert cache.get('t2', 'svc-a') is None
+    assert cache.get('t1', 'svc-a')['sub'] == '1' and cache.get('t3', 'svc-a')['sub'] == '3'
+    assert cache.get_stats()['evictions'] == 1
+
+def test_entries_expire_at_the_token_exp():
+    cache = TokenCache(max_entries=10, max_ttl=300)
+    cache.put('short', 'svc-a', claims(ttl=0.05))
+    # Already expired tokens are not cached at all
+    cache.put('expired', 'svc-a', claims(ttl=-1))
+    assert cache.get('short', 'svc-a') is not None
+    assert cache.get_stats()['entries'] == 1
+    time.sleep(0.06)
+    assert cache.get('short', 'svc-a') is None
+
+def test_entries_expire_after_max_ttl():
+    cache = TokenCache(max_entries=10, max_ttl=0.05)
+    cache.put('long', 'svc-a', claims(ttl=3600))
+    cache.put('no-exp', 'svc-a', {'sub': 'user'})
+    assert cache.get('long', 'svc-a') is not None and cache.get('no-exp', 'svc-a') is not None
+    time.sleep(0.06)
+    assert cache.get('long', 'svc-a') is None and cache.get('no-exp', 'svc-a') is None
+
+def test_zero_max_entries_disables_the_cache():
+    cache = TokenCache(max_entries=0)
+    assert not cache.enabled
+    cache.put('token', 'svc-a', claims())
+    assert asyncio.run(cache.aput('token', 'svc-a', claims())) is None
+    assert cache.get('token', 'svc-a') is None
+    assert asyncio.run(cache.aget('token', 'svc-a')) is None
+    assert cache.get_stats()['entries'] == 0
+
+def test_async_variants_share_the_entries():
+    cache = TokenCache(max_entries=10)
+    asyncio.run(cache.aput('token', 'svc-a', claims()))
+    assert cache.get('token', 'svc-a')['sub'] == 'user'
+    cache.invalidate('token', 'svc-a')
+    assert asyncio.run(cache.aget('token', 'svc-a')) is None
+
+@pytest.mark.parametrize('secret, reachable', [('secret-a', True), ('rotated', False)])
+def test_reload_scopes_out_entries_of_changed_services(tmp_path, monkeypatch, secret, reachable):
+    config_file = tmp_path / 'service_config.json'
+    write_config(config_file, 'secret-a')
+    reader = ServiceConfigReader(str(config_file))
+    monkeypatch.setattr(cache.tokenCache, 'serviceConfig', reader)
+    tokens = TokenCache(max_entries=10)
+    tokens.put('token', 'svc-a', claims())
+    tokens.put('token', 'svc-b', claims())
+    write_config(config_file, secret)
+    reader.reload_config()
+    assert (tokens.get('token', 'svc-a') is not None) == reachable
+    assert tokens.get('token', 'svc-b') is not None
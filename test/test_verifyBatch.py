@@ -0,0 +1,85 @@
+import asyncio
+import threading
+import pytest # pyright: ignore[reportMissingImports]
+from pydantic import ValidationError # pyright: ignore[reportMissingImports]
+from fastapi import FastAPI # pyright: ignore[reportMissingImports]
+from fastapi.testclient import TestClient # pyright: ignore[reportMissingImports]
+from keycloakStandIn import KeycloakStandIn
+import asyncKeycloakAuth
+from routers import authRouters
+from config.settings import appSettings
+from models.keycloakModels import TokenVerifyBatchRequest
+
+@pytest.fixture(scope='module')
+def keycloak():
+    return KeycloakStandIn()
+
+@pytest.fixture
+def registry(keycloak, monkeypatch):
+    registry = keycloak.install(monkeypatch)
+    yield registry
+    keycloak.reset()
+
+def sign(keycloak, subject: str) -> str:
+    return keycloak.token(realm='realm-2', client_id='client-c', sub=subject)
+
+def test_batch_signatures_are_verified_off_the_event_loop(registry, keycloak, monkeypatch):
+    threads = []
+    decode_token = asyncKeycloakAuth.decode_token
+    monkeypatch.setattr(
+        asyncKeycloakAuth, 'decode_token',
+        lambda *args: threads.append(threading.get_ident()) or decode_token(*args)
+    )
+    items = [(sign(keycloak, f'user-{index}'), 'svc-c') for index in range(4)]
+    items.append(('not-a-token', 'svc-c'))
+    items.append((items[0][0], 'unknown-service'))
+
+    async def scenario():
+        results = await asyncKeycloakAuth.verify_tokens_async(items, concurrency=2)
+        return results, threading.get_ident()
+
+    results, loop_thread = asyncio.run(scenario())
+    assert [result['sub'] for result in results[:4]] == ['user-0', 'user-1', 'user-2', 'user-3']
+    assert isinstance(results[4], asyncKeycloakAuth.KeycloakAuthError)
+    assert isinstance(results[5], asyncKeycloakAuth.KeycloakAuthError)
+    assert len(threads) == 4 and loop_thread not in threads
+
+def test_single_verification_stays_on_the_event_loop(registry, keycloak, monkeypatch):
+    threads = []
+    decode_token = asyncKeycloakAuth.decode_token
+    monkeypatch.setattr(
+        asyncKeycloakAuth, 'decode_token',
+        lambda *args: threads.append(threading.get_ident()) or decode_token(*args)
+    )
+
+    async def scenario():
+        claims = await asyncKeycloakAuth.verify_token_async(sign(keycloak, 'single'), 'svc-c')
+        return claims, threading.get_ident()
+
+    claims, loop_thread = asyncio.run(scenario())
+    assert claims['sub'] == 'single'
+    assert threads == [loop_thread]
+
+def test_batch_reports_keycloak_outages_apart_from_invalid_tokens(registry, keycloak):
+    app = FastAPI()
+    app.include_router(authRouters.router, prefix="/v1")
+    client = TestClient(app)
+    # realm-1 keys are cached before the outage, realm-2 keys never were
+    valid = keycloak.token(realm='realm-1', client_id='client-a')
+    assert client.post("/v1/security/verify/batch", json={"items": [{"token": valid, "service": "svc-a"}]}).status_code == 200
+    keycloak.down = True
+    items = [
+        {"token": valid, "service": "svc-a"},
+        {"token": "not-a-token", "service": "svc-a"},
+        {"token": sign(keycloak, 'user'), "service": "svc-c"},
+    ]
+    results = client.post("/v1/security/verify/batch", json={"items": items}).json()["results"]
+    assert [result["status"] for result in results] == ["valid", "invalid", "unavailable"]
+    assert results[2]["retry_after"] >= 1 and results[1]["retry_after"] is None
+
+def test_batch_size_is_bounded_at_validation():
+    item = {'token': 'token', 'service': 'svc-a'}
+    TokenVerifyBatchRequest(items=[item] * appSettings.verify_batch_max_items)
+    with pytest.raises(ValidationError) as error:
+        TokenVerifyBatchRequest(items=[item] * (appSettings.verify_batch_max_items + 1))
+    assert error.value.errors()[0]['type'] == 'too_long'